@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for battlestern, a standalone runner with JSON output.
+
+micro benchmarks time the hot paths on their own,
+Coordinate construction, Fleet setup and validation, strike resolution and board marking.
+macro benchmarks play full random games, on the classic board and a large custom one.
+startup benchmarks time importing the package in a fresh interpreter, as every
+worker process does.
+
+Every benchmark is timed with timeit, repeated, and the fastest repeat is reported
+as seconds per operation, the least noisy estimate of what the code costs.
+Some operations are a sweep of the board, e.g. 100 strikes, see each benchmark's docstring.
+
+Usage, from the repository root
+Run everything, print a table and write the results
+python benchmarks/run.py run --output results.json
+
+Store a new baseline, on the machine the comparisons will be run on
+python benchmarks/run.py run --output benchmarks/baseline.json
+
+Run again and flag anything more than 10% slower than the baseline,
+exiting with status 1 if there are regressions
+python benchmarks/run.py compare benchmarks/baseline.json --threshold 0.10
+
+Compare two stored results without running anything
+python benchmarks/run.py compare benchmarks/baseline.json results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import timeit
+from collections import OrderedDict
+from fnmatch import fnmatch
+from os import path
+from typing import Callable, Dict, List, Union
+SRC = path.join(path.dirname(path.dirname(path.abspath(__file__))), 'src')
+sys.path.append(SRC)
+
+from battlestern.boards import Board, BitBoard
+from battlestern.coordinates import Coordinate
+from battlestern.games import Game
+from battlestern.geometry import Geometry, DEFAULT_GEOMETRY
+from battlestern.ships import Fleet, BitFleet
+from battlestern.simulation import play_game
+from battlestern.strategies import random_strategy, DensityStrategy
+
+BASELINE = path.join(path.dirname(path.abspath(__file__)), 'baseline.json')
+LARGE_GEOMETRY = Geometry(100, 100)
+CELLS = [DEFAULT_GEOMETRY.coord(index) for index in range(DEFAULT_GEOMETRY.area)]
+ROSTER, OTHER_ROSTER = Fleet.random_rosters(2, seed=1)
+
+# name: (group, setup), setup returns the callable to time,
+# or for startup benchmarks a callable returning the seconds it measured itself
+BENCHMARKS: Dict[str, tuple] = OrderedDict()
+
+
+def benchmark(group: str) -> Callable:
+    """
+    Registers a setup function under its name without the `bench_` prefix
+    """
+    def register(setup: Callable) -> Callable:
+        BENCHMARKS[setup.__name__[len('bench_'):]] = (group, setup)
+        return setup
+    return register
+
+
+@benchmark('micro')
+def bench_coordinate():
+    """Constructing an interned Coordinate on the 10x10 grid"""
+    return lambda: Coordinate('c', 3)
+
+
+@benchmark('micro')
+def bench_coordinate_large():
+    """Constructing a Coordinate validated against a 100x100 geometry"""
+    return lambda: Coordinate('ab', 40, geometry=LARGE_GEOMETRY)
+
+
+@benchmark('micro')
+def bench_fleet_setup():
+    """Building a Fleet from a fleetroster"""
+    return lambda: Fleet(fleetroster=ROSTER)
+
+
+@benchmark('micro')
+def bench_fleet_random():
+    """Building a Fleet with random, legal placements"""
+    rng = random.Random(1)
+    return lambda: Fleet(fleetroster=None, seed=rng)
+
+
+@benchmark('micro')
+def bench_validate_coords():
+    """Fleet.validate_coords over a full armada"""
+    fleet = Fleet(fleetroster=ROSTER)
+    return lambda: fleet.validate_coords(fleet.armada)
+
+
+def _strike_sweep(fleet):
+    strike = fleet._strike
+
+    def sweep():
+        fleet.reset()
+        for coord in CELLS:
+            strike(coord)
+    return sweep
+
+
+@benchmark('micro')
+def bench_fleet_strike():
+    """Fleet._strike on all 100 cells of a repaired fleet, 17 hits and 83 misses"""
+    return _strike_sweep(Fleet(fleetroster=ROSTER))
+
+
+@benchmark('micro')
+def bench_bitfleet_strike():
+    """BitFleet._strike on all 100 cells of a repaired fleet"""
+    return _strike_sweep(BitFleet(fleetroster=ROSTER))
+
+
+def _mark_sweep(board):
+    mark_strike = board.mark_strike
+
+    def sweep():
+        board.reset()
+        for coord in CELLS:
+            mark_strike(coord, 'miss')
+    return sweep
+
+
+@benchmark('micro')
+def bench_board_mark_strike():
+    """Board.mark_strike on all 100 cells of a cleared board"""
+    return _mark_sweep(Board())
+
+
+@benchmark('micro')
+def bench_bitboard_mark_strike():
+    """BitBoard.mark_strike on all 100 cells of a cleared board"""
+    return _mark_sweep(BitBoard())
+
+
+@benchmark('macro')
+def bench_game_setup():
+    """Game with two random fleets and a journal"""
+    rng = random.Random(1)
+    return lambda: Game(seed=rng)
+
+
+@benchmark('macro')
+def bench_random_game():
+    """A full self-play game between two random strategies"""
+    seeds = iter(range(1 << 62))
+    return lambda: play_game(random_strategy, random_strategy, seed=next(seeds))
+
+
+@benchmark('macro')
+def bench_density_game():
+    """A full self-play game, the density strategy against random"""
+    seeds = iter(range(1 << 62))
+    return lambda: play_game(DensityStrategy, random_strategy, seed=next(seeds))
+
+
+@benchmark('macro')
+def bench_large_board_game():
+    """A 100x100 Game with random fleets and 1000 strikes by each player"""
+    rng = random.Random(1)
+    shots = [LARGE_GEOMETRY.coord(index)
+             for index in rng.sample(range(LARGE_GEOMETRY.area), 1000)]
+
+    def game():
+        played = Game(geometry=LARGE_GEOMETRY, seed=rng, log=False)
+        played.strike_many(played.player1, shots)
+        played.strike_many(played.player2, shots)
+    return game
+
+
+def _import_time(module: str) -> float:
+    """
+    Seconds taken to import a module in a new interpreter, not counting the interpreter
+    """
+    code = ('import time; started = time.perf_counter(); import {}; '
+            'print(time.perf_counter() - started)'.format(module))
+    environment = dict(os.environ, PYTHONPATH=SRC)
+    output = subprocess.run([sys.executable, '-c', code], env=environment,
+                            stdout=subprocess.PIPE, check=True).stdout
+    return float(output)
+
+
+@benchmark('startup')
+def bench_import_package():
+    """import battlestern, which loads its classes lazily"""
+    return lambda: _import_time('battlestern')
+
+
+@benchmark('startup')
+def bench_import_games():
+    """import battlestern.games, what a game actually needs"""
+    return lambda: _import_time('battlestern.games')
+
+
+def time_startup(setup: Callable, repeat: int = 5) -> Dict[str, float]:
+    """
+    Runs a startup benchmark's measurement repeat times, 3 times at least,
+    returning the fastest and mean seconds
+    """
+    measure = setup()
+    timings = [measure() for _ in range(max(repeat, 3))]
+    return {'best': min(timings),
+            'mean': sum(timings) / len(timings),
+            'number': 1,
+            'repeat': len(timings)}
+
+
+def time_benchmark(setup: Callable, repeat: int = 5, min_time: float = 0.2) -> Dict[str, float]:
+    """
+    Times the callable returned by setup, calibrated so each repeat takes at least min_time.
+    Returns the fastest and mean seconds per operation.
+    """
+    timer = timeit.Timer(setup())
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9)))
+    timings = [elapsed] + timer.repeat(repeat - 1, number)
+    return {'best': min(timings) / number,
+            'mean': sum(timings) / len(timings) / number,
+            'number': number,
+            'repeat': repeat}
+
+
+def run(pattern: str = '*', repeat: int = 5, min_time: float = 0.2) -> Dict:
+    """
+    Runs the benchmarks with names matching a glob pattern.
+    Returns the results with the environment they were measured in.
+    """
+    results = OrderedDict()
+    for name, (group, setup) in BENCHMARKS.items():
+        if fnmatch(name, pattern):
+            if group == 'startup':
+                timing = time_startup(setup, repeat)
+            else:
+                timing = time_benchmark(setup, repeat, min_time)
+            results[name] = dict(group=group, **timing)
+    return {'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'benchmarks': results}
+
+
+def compare(baseline: Dict, current: Dict, threshold: float = 0.10) -> List[Dict]:
+    """
+    Compares the best times of the benchmarks in both results.
+    A change is the ratio of current to baseline time less one, so 0.25 is 25% slower.
+    Returns a row per benchmark, those with a change above threshold are regressions.
+    """
+    rows = []
+    for name, result in current['benchmarks'].items():
+        base = baseline['benchmarks'].get(name)
+        if base is None:
+            continue
+        change = result['best'] / base['best'] - 1
+        rows.append({'name': name,
+                     'baseline': base['best'],
+                     'current': result['best'],
+                     'change': change,
+                     'regression': change > threshold})
+    return rows
+
+
+def _format_time(seconds: float) -> str:
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return '{:.3g} {}'.format(seconds / scale, unit)
+    return '{:.3g} ns'.format(seconds / 1e-9)
+
+
+def _print_results(results: Dict) -> None:
+    for name, result in results['benchmarks'].items():
+        print('{:<24} {:<6} {:>12} per op'.format(name, result['group'],
+                                                 _format_time(result['best'])))
+
+
+def _print_comparison(rows: List[Dict]) -> None:
+    for row in rows:
+        print('{:<24} {:>12} {:>12} {:>+8.1%}{}'.format(
+            row['name'], _format_time(row['baseline']), _format_time(row['current']),
+            row['change'], '  REGRESSION' if row['regression'] else ''))
+
+
+def _load(filename: str) -> Dict:
+    with open(filename) as results:
+        return json.load(results)
+
+
+def main(argv: Union[List[str], None] = None) -> int:
+    parser = argparse.ArgumentParser(description='battlestern benchmarks')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+    for command in ('run', 'compare'):
+        options = commands.add_parser(command)
+        options.add_argument('--filter', default='*',
+                             help='only benchmarks with names matching this glob')
+        options.add_argument('--repeat', type=int, default=5)
+        options.add_argument('--min-time', type=float, default=0.2,
+                             help='minimum seconds per repeat')
+        if command == 'run':
+            options.add_argument('--output', help='write the results to this JSON file')
+        else:
+            options.add_argument('baseline', nargs='?', default=BASELINE)
+            options.add_argument('current', nargs='?',
+                                 help='stored results to compare, defaults to a new run')
+            options.add_argument('--threshold', type=float, default=0.10,
+                                 help='slowdown flagged as a regression, 0.10 is 10%%')
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        results = run(args.filter, args.repeat, args.min_time)
+        _print_results(results)
+        if args.output:
+            with open(args.output, 'w') as output:
+                json.dump(results, output, indent=2)
+        return 0
+
+    baseline = _load(args.baseline)
+    if args.current:
+        current = _load(args.current)
+    else:
+        current = run(args.filter, args.repeat, args.min_time)
+    rows = compare(baseline, current, args.threshold)
+    _print_comparison(rows)
+    return 1 if any(row['regression'] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
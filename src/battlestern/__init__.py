@@ -0,0 +1,37 @@
+"""
+battlestern - a backend for the game battleship
+
+The main classes can be imported from the package
+from battlestern import Game
+
+They are loaded on first use, so `import battlestern` on its own imports nothing
+else and a worker process only pays for the modules it actually uses.
+"""
+
+# name: the submodule it's loaded from
+_lazy = {
+    'Game': 'games',
+    'GamePool': 'games',
+    'Fleet': 'ships',
+    'BitFleet': 'ships',
+    'Board': 'boards',
+    'BitBoard': 'boards',
+    'Geometry': 'geometry',
+    'Coordinate': 'coordinates',
+}
+
+__all__ = list(_lazy)
+
+
+def __getattr__(name):
+    module = _lazy.get(name)
+    if module is None:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    from importlib import import_module
+    value = getattr(import_module('.' + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
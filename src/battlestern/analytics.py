@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Aggregate statistics over archives of finished games, for tuning strategies.
+
+A stored game is a (player 1 fleetroster, player 2 fleetroster, moves) tuple,
+where the fleetrosters are dictionaries as accepted by Fleet or their
+`encode_roster` encodings and the moves are journal records,
+(player, cell, result) tuples as in battlestern.journal.
+`log_games` reads them from move logs.
+
+Games are folded into a GameStats of fixed size arrays, however many there are:
+
+placements   for each ship of Fleet.shipyard, the fleets with it on each cell
+shots        the strikes on each cell, repeated strikes count once
+hits         the strikes on each cell that hit a ship
+first_hit    a histogram of the shots a player took to first hit any ship
+ship_found   for each ship, a histogram of the shots a player took to first hit it
+to_sink      for each ship, a histogram of the shots from first hitting it to sinking it
+
+Arrays are flat array.array('Q') with the ship arrays in rows of Fleet.shipyard order.
+Histograms have a bin for every shot count up to the area of the board,
+which also counts anything longer.
+
+GameStats are mergeable, so an archive can be split into chunks, each chunk
+folded in a process pool and the partial results added up, see `analyse`.
+At most `window` chunks are in flight so memory stays bounded.
+
+e.g.
+stats = analyse(log_games(logs), processes=4)
+stats.placement('carrier')
+"""
+
+import sys
+from array import array
+from collections import deque
+from multiprocessing import Pool
+from typing import Iterable, Iterator, List, Mapping, Tuple, Union
+
+from .exceptions import SerializationError
+from .geometry import Geometry, DEFAULT_GEOMETRY
+from .journal import DEJAVU
+from .serialization import decode_roster, decode_rosters
+from .ships import Fleet
+
+Roster = Union[Mapping[str, Mapping[str, Union[str, int]]], bytes]
+StoredGame = Tuple[Roster, Roster, Iterable[Tuple[int, int, int]]]
+
+_shipyard: List[str] = list(Fleet.shipyard)
+_lengths: List[int] = [ship.length for ship in Fleet.shipyard.values()]
+
+
+class GameStats(object):
+    """
+    Accumulators of placements and shots over any number of games,
+    see the module docstring for the arrays.
+
+    :param geometry: The dimensions of the board, defaults to the 10x10 grid
+    :type geometry: battlestern.geometry.Geometry
+    """
+
+    arrays = ('placements', 'shots', 'hits', 'first_hit', 'ship_found', 'to_sink')
+
+    def __init__(self, geometry: Geometry = None) -> None:
+        self.geometry = geometry or DEFAULT_GEOMETRY
+        area = self.geometry.area
+        self.bins = area + 1
+        self.games = 0
+        self.fleets = 0
+        self.placements = array('Q', bytes(8 * len(_shipyard) * area))
+        self.shots = array('Q', bytes(8 * area))
+        self.hits = array('Q', bytes(8 * area))
+        self.first_hit = array('Q', bytes(8 * self.bins))
+        self.ship_found = array('Q', bytes(8 * len(_shipyard) * self.bins))
+        self.to_sink = array('Q', bytes(8 * len(_shipyard) * self.bins))
+
+    def _cells(self, roster: Roster) -> bytearray:
+        """
+        The position in the shipyard of the ship on each cell plus one, 0 for open sea,
+        counting the fleet's placements
+        """
+        if isinstance(roster, (bytes, bytearray, memoryview)):
+            roster = decode_roster(roster, self.geometry)
+        geometry = self.geometry
+        width, height, area = geometry.width, geometry.height, geometry.area
+        cells = bytearray(area)
+        placements = self.placements
+        for name, specs in roster.items():
+            kind = _shipyard.index(name.lower())
+            col = geometry.column_index(specs['col'])
+            row = specs['row'] - 1
+            if specs['orientation'] == 'vertical':
+                span = range(row * width + col, min(row + _lengths[kind], height) * width, width)
+            else:
+                span = range(row * width + col, row * width + min(col + _lengths[kind], width))
+            for cell in span:
+                if not cells[cell]:
+                    cells[cell] = kind + 1
+                    placements[kind * area + cell] += 1
+        self.fleets += 1
+        return cells
+
+    def add_roster(self, roster: Roster) -> None:
+        """
+        Counts the placements of a fleetroster on its own, without any moves
+        """
+        self._cells(roster)
+
+    def add_game(self,
+                 player1fleet: Roster,
+                 player2fleet: Roster,
+                 moves: Iterable[Tuple[int, int, int]]) -> None:
+        """
+        Folds a stored game into the accumulators.
+        Hits and sinks are worked out from the fleetrosters,
+        only the DEJAVU flag of the results is used.
+        """
+        fleets = (None, self._cells(player2fleet), self._cells(player1fleet))
+        area = self.geometry.area
+        bins = self.bins
+        shots, hits = self.shots, self.hits
+        ship_found, to_sink = self.ship_found, self.to_sink
+        taken = [0, 0, 0]
+        found = (None, [0] * len(_shipyard), [0] * len(_shipyard))
+        intact = (None, [0] * len(_shipyard), [0] * len(_shipyard))
+        for number in (1, 2):
+            for kind in fleets[number]:
+                if kind:
+                    intact[number][kind - 1] += 1
+        for player, cell, result in moves:
+            taken[player] += 1
+            if result & DEJAVU:
+                continue
+            shots[cell] += 1
+            kind = fleets[player][cell]
+            if not kind:
+                continue
+            hits[cell] += 1
+            kind -= 1
+            shot = taken[player]
+            first = found[player]
+            if not any(first):
+                self.first_hit[min(shot, area)] += 1
+            if not first[kind]:
+                first[kind] = shot
+                ship_found[kind * bins + min(shot, area)] += 1
+            intact[player][kind] -= 1
+            if not intact[player][kind]:
+                to_sink[kind * bins + min(shot - first[kind] + 1, area)] += 1
+        self.games += 1
+
+    def merge(self, other: 'GameStats') -> 'GameStats':
+        """
+        Adds another GameStats of the same geometry into this one, returning this one
+        """
+        if other.geometry != self.geometry:
+            raise SerializationError('Can not merge stats of a {}x{} board'.format(
+                other.geometry.width, other.geometry.height))
+        self.games += other.games
+        self.fleets += other.fleets
+        for name in self.arrays:
+            mine = getattr(self, name)
+            for position, count in enumerate(getattr(other, name)):
+                if count:
+                    mine[position] += count
+        return self
+
+    def _row(self, values: array, shipname: str, size: int) -> array:
+        kind = _shipyard.index(shipname)
+        return values[kind * size:(kind + 1) * size]
+
+    def placement(self, shipname: str) -> array:
+        """
+        The fleets with a ship on each cell, in row-major order
+        """
+        return self._row(self.placements, shipname, self.geometry.area)
+
+    def found_after(self, shipname: str) -> array:
+        """
+        The histogram of the shots taken to first hit a ship
+        """
+        return self._row(self.ship_found, shipname, self.bins)
+
+    def sunk_after(self, shipname: str) -> array:
+        """
+        The histogram of the shots from first hitting a ship to sinking it
+        """
+        return self._row(self.to_sink, shipname, self.bins)
+
+    def to_bytes(self) -> bytes:
+        """
+        The arrays in module docstring order, little-endian, with the game and fleet
+        counts first, for writing a result to disk
+        """
+        counts = array('Q', (self.games, self.fleets))
+        parts = [counts] + [getattr(self, name) for name in self.arrays]
+        if sys.byteorder == 'big':
+            parts = [array('Q', part) for part in parts]
+            for part in parts:
+                part.byteswap()
+        return b''.join(part.tobytes() for part in parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, geometry: Geometry = None) -> 'GameStats':
+        """
+        Reads back `to_bytes`
+        """
+        stats = cls(geometry)
+        values = array('Q')
+        values.frombytes(data)
+        if sys.byteorder == 'big':
+            values.byteswap()
+        sizes = [2] + [len(getattr(stats, name)) for name in cls.arrays]
+        if len(values) != sum(sizes):
+            raise SerializationError('Not the stats of a {}x{} board'.format(
+                stats.geometry.width, stats.geometry.height))
+        stats.games, stats.fleets = values[:2]
+        offset = 2
+        for name, size in zip(cls.arrays, sizes[1:]):
+            setattr(stats, name, values[offset:offset + size])
+            offset += size
+        return stats
+
+
+def log_games(logs: Iterable) -> Iterator[StoredGame]:
+    """
+    The stored games of move logs journaled from the first move,
+    as (player 1 fleetroster, player 2 fleetroster, moves).
+    The moves are read lazily from each log.
+
+    :param logs: battlestern.journal.MoveLog
+    :type logs: Iterable
+    """
+    for log in logs:
+        if not log.checkpoints or log.checkpoints[0][0] != 0:
+            raise SerializationError('A move log without its starting checkpoint')
+        _, (player1fleet, player2fleet) = decode_rosters(log.checkpoints[0][1])
+        yield player1fleet, player2fleet, log.records()
+
+
+def _analyse_chunk(args: Tuple[List[StoredGame], Geometry]) -> GameStats:
+    games, geometry = args
+    stats = GameStats(geometry)
+    for player1fleet, player2fleet, moves in games:
+        stats.add_game(player1fleet, player2fleet, moves)
+    return stats
+
+
+def _chunks(games: Iterable[StoredGame],
+            chunksize: int,
+            geometry: Geometry) -> Iterator[Tuple[List[StoredGame], Geometry]]:
+    """
+    Lists of chunksize games, their moves read into lists so they can be sent to a worker
+    """
+    chunk = []
+    for player1fleet, player2fleet, moves in games:
+        chunk.append((player1fleet, player2fleet, list(moves)))
+        if len(chunk) == chunksize:
+            yield chunk, geometry
+            chunk = []
+    if chunk:
+        yield chunk, geometry
+
+
+def analyse(games: Iterable[StoredGame],
+            geometry: Geometry = None,
+            processes: int = 1,
+            chunksize: int = 1000,
+            window: Union[int, None] = None) -> GameStats:
+    """
+    Folds a stream of stored games into one GameStats.
+
+    :param games: Stored games, see the module docstring
+    :type games: Iterable of (fleetroster, fleetroster, moves)
+    :param geometry: The dimensions of the board, defaults to the 10x10 grid
+    :type geometry: battlestern.geometry.Geometry
+    :param processes: Worker processes folding chunks, 1 folds in this process
+    :type processes: int
+    :param chunksize: Games folded together by a worker
+    :type chunksize: int
+    :param window: Chunks in flight at once, defaults to twice the processes
+    :type window: int or None
+    """
+    geometry = geometry or DEFAULT_GEOMETRY
+    stats = GameStats(geometry)
+    if processes == 1:
+        for player1fleet, player2fleet, moves in games:
+            stats.add_game(player1fleet, player2fleet, moves)
+        return stats
+    window = window or 2 * processes
+    with Pool(processes) as pool:
+        pending = deque()
+        for chunk in _chunks(games, chunksize, geometry):
+            pending.append(pool.apply_async(_analyse_chunk, (chunk,)))
+            if len(pending) >= window:
+                stats.merge(pending.popleft().get())
+        while pending:
+            stats.merge(pending.popleft().get())
+    return stats
@@ -0,0 +1,558 @@
+#!/usr/bin/env python3
+"""
+An arena holds the state of many games in fixed size slots of a single
+multiprocessing.shared_memory block, so worker processes can pick up any game
+in place, with nothing pickled or copied, and a supervisor can scan every game
+for stats while the workers play.
+
+The block starts with a header, b'BSAR', version (B), width (H), height (H)
+and the number of slots (I), followed by the slots.
+Every slot is laid out the same, little-endian:
+
+header    the slot's status, FREE or IN_USE (B), the number of the player
+          to move next (B) and the number of cells each player has struck (I)
+names     for each player, the name in utf-8, padded with nul bytes to 16 bytes
+rosters   for each player, for each ship of Fleet.shipyard in order,
+          its orientation, 0 horizontal, 1 vertical or 0xff when it's not
+          in the roster (B) and the row-major index of its bow (I)
+intact    for each player, the intact coordinates of each ship (B)
+boards    for each player, a byte per cell of their tracking board,
+          0 not struck, 1 a miss or 2 a hit
+damage    for each player, a byte per cell of their fleet, 1 where it's damaged
+
+e.g.
+arena = Arena(slots=10000)
+slot = arena.new_game(seed=1)
+game = arena.game(slot)
+game.strike(game.player1, ('a', 1))
+
+and in a worker process, given the arena or just its name
+arena = Arena(name=name)
+game = arena.game(slot)
+
+An ArenaGame is a Game whose players' boards and fleets read and write the slot,
+so the game can be played, journaled, watched and encoded like any other.
+Only one process should play a game at a time, scans may see a game a strike behind.
+Names are read when a game is opened, renaming a player doesn't change the slot.
+
+Needs Python 3.8 or later for multiprocessing.shared_memory,
+which is imported when the first arena is created.
+"""
+
+import gc
+import struct
+import sys
+from collections import namedtuple
+
+from .boards import Board
+from .exceptions import ArenaError, BoardError
+from .games import Game
+from .geometry import Geometry, DEFAULT_GEOMETRY
+from .players import Player
+from .ships import Fleet
+
+MAGIC = b'BSAR'
+VERSION = 1
+
+FREE = 0
+IN_USE = 1
+
+NAME_SIZE = 16
+ABSENT = 0xff
+ORIENTATIONS = ('horizontal', 'vertical')
+# the byte marking a board cell, by result
+MARKS = {'miss': 1, 'hit': 2}
+RESULTS = (None, 'miss', 'hit')
+
+_header = struct.Struct('<4sBxHHIxxxx')
+_slot_header = struct.Struct('<BBxxII')
+_ship = struct.Struct('<BI')
+_shipyard = list(Fleet.shipyard)
+
+SlotSummary = namedtuple('SlotSummary', ['slot', 'turn', 'shots', 'finished'])
+SlotSummary.__doc__ = """
+A game in an arena, see Arena.scan
+
+turn: the number of the player to move next
+shots: the cells struck by player 1 and player 2, repeated shots count once
+finished: True once either fleet is sunk
+"""
+
+ArenaStats = namedtuple('ArenaStats', ['games', 'finished', 'shots'])
+ArenaStats.__doc__ = """
+Totals over the games in an arena, see Arena.stats
+"""
+
+
+class SlotLayout(object):
+    """
+    The offsets of each section of a slot, within the slot, for a geometry.
+    Sections hold player 1 then player 2, see `player`.
+
+    :param geometry: The dimensions of the boards
+    :type geometry: battlestern.geometry.Geometry
+    """
+
+    def __init__(self, geometry: Geometry) -> None:
+        ships = len(_shipyard)
+        self.names = _slot_header.size
+        self.rosters = self.names + 2 * NAME_SIZE
+        self.intact = self.rosters + 2 * ships * _ship.size
+        self.boards = self.intact + 2 * ships
+        self.damage = self.boards + 2 * geometry.area
+        # rounded up so every slot starts 8 byte aligned
+        self.size = (self.damage + 2 * geometry.area + 7) // 8 * 8
+        self.sizes = {'names': NAME_SIZE, 'rosters': ships * _ship.size,
+                      'intact': ships, 'boards': geometry.area, 'damage': geometry.area}
+
+    def player(self, section: str, number: int) -> slice:
+        """
+        The bytes of a section for player 1 or 2, within the slot
+        """
+        size = self.sizes[section]
+        start = getattr(self, section) + (number - 1) * size
+        return slice(start, start + size)
+
+
+class Arena(object):
+    """
+    Fixed size slots of game state in one shared memory block.
+
+    :param slots: The number of games to make room for when creating an arena
+    :type slots: int
+    :param geometry: The dimensions of the boards, defaults to the 10x10 grid
+    :type geometry: battlestern.geometry.Geometry
+    :param name: The name of an existing arena to attach to, instead of creating one
+    :type name: str or None
+
+    The process that created the arena should `unlink` it once every process is done,
+    every process should `close` it. Arenas pickle as their name,
+    so one passed to a worker process attaches to the same block.
+    """
+
+    def __init__(self,
+                 slots: int = None,
+                 geometry: Geometry = None,
+                 name: str = None) -> None:
+        # imported on first use, shared_memory arrived in Python 3.8
+        from multiprocessing import shared_memory
+        if name is None:
+            if not slots or slots < 0:
+                raise ArenaError('An arena needs at least one slot')
+            self.geometry = geometry or DEFAULT_GEOMETRY
+            self.layout = SlotLayout(self.geometry)
+            self._memory = shared_memory.SharedMemory(
+                create=True, size=_header.size + slots * self.layout.size)
+            _header.pack_into(self._memory.buf, 0, MAGIC, VERSION,
+                              self.geometry.width, self.geometry.height, slots)
+        else:
+            self._memory = _attach(shared_memory, name)
+            magic, version, width, height, slots = _header.unpack_from(self._memory.buf, 0)
+            if magic != MAGIC or version != VERSION:
+                self._memory.close()
+                raise ArenaError('{} is not a version {} arena'.format(name, VERSION))
+            if (width, height) == (DEFAULT_GEOMETRY.width, DEFAULT_GEOMETRY.height):
+                self.geometry = DEFAULT_GEOMETRY
+            else:
+                self.geometry = Geometry(width, height)
+            self.layout = SlotLayout(self.geometry)
+        self.slots = slots
+        self.name = self._memory.name
+        self._buffer = self._memory.buf
+
+    def __reduce__(self):
+        return Arena, (None, None, self.name)
+
+    def __len__(self) -> int:
+        return self.slots
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Detaches this process from the arena, games opened from it mustn't be used after
+        """
+        self._buffer = None
+        try:
+            self._memory.close()
+        except BufferError:
+            # games hold views of the memory, and players and opponents are reference cycles
+            gc.collect()
+            self._memory.close()
+
+    def unlink(self) -> None:
+        """
+        Frees the shared memory once every process has closed the arena
+        """
+        self._memory.unlink()
+
+    def slot(self, slot: int) -> memoryview:
+        """
+        The bytes of a slot, a view into the shared memory
+        """
+        if not 0 <= slot < self.slots:
+            raise ArenaError('Slot {} is not in the arena'.format(slot))
+        start = _header.size + slot * self.layout.size
+        return self._buffer[start:start + self.layout.size]
+
+    def allocate(self) -> int:
+        """
+        Claims the first free slot, zeroed and marked IN_USE.
+        Slots should be allocated by one process, e.g. the supervisor.
+        """
+        size = self.layout.size
+        buffer = self._buffer
+        for slot in range(self.slots):
+            start = _header.size + slot * size
+            if buffer[start] == FREE:
+                buffer[start:start + size] = bytes(size)
+                _slot_header.pack_into(buffer, start, IN_USE, 1, 0, 0)
+                return slot
+        raise ArenaError('The arena is full')
+
+    def release(self, slot: int) -> None:
+        """
+        Frees a slot for another game, games opened on it mustn't be used after
+        """
+        self.slot(slot)[0] = FREE
+
+    def new_game(self,
+                 player1fleet=None,
+                 player2fleet=None,
+                 seed=None,
+                 player1name: str = None,
+                 player2name: str = None) -> int:
+        """
+        Starts a game in a free slot, fleets, seed and names are as for Game.
+        Returns the slot.
+        """
+        slot = self.allocate()
+        data = self.slot(slot)
+        names = (player1name or 'Bob', player2name or 'Alice')
+        if names[0] == names[1]:
+            names = (names[0], names[1] + '_1')
+        for number, name in enumerate(names, 1):
+            data[self.layout.player('names', number)] = _encode_name(name)
+        self.game(slot).reset(player1fleet, player2fleet, seed=seed)
+        return slot
+
+    def store(self, game: Game, slot: int = None) -> int:
+        """
+        Copies a game into a slot, a free one unless given.
+        Returns the slot.
+        """
+        if game.geometry != self.geometry:
+            raise ArenaError('The game is on a {}x{} board'.format(
+                game.geometry.width, game.geometry.height))
+        if slot is None:
+            slot = self.allocate()
+        data = self.slot(slot)
+        layout = self.layout
+        index = self.geometry.index
+        players = (game.player1, game.player2)
+        data[:] = bytes(layout.size)
+        _slot_header.pack_into(data, 0, IN_USE, game.turn,
+                               len(game.player1.board.coords), len(game.player2.board.coords))
+        for player in players:
+            number = player.number
+            data[layout.player('names', number)] = _encode_name(player.name)
+            fleet = player.fleet
+            rosters = data[layout.player('rosters', number)]
+            _write_roster(rosters, {ship.name: ship for ship in fleet._fleet}, self.geometry)
+            intact = data[layout.player('intact', number)]
+            damage = data[layout.player('damage', number)]
+            for ship, coords in fleet.armada.items():
+                for coord, status in coords.items():
+                    if status == 'intact':
+                        intact[_shipyard.index(ship)] += 1
+                    elif self.geometry.contains(coord):
+                        damage[index(coord)] = 1
+            board = data[layout.player('boards', number)]
+            for coord, result in player.board.coords.items():
+                board[index(coord)] = MARKS[result]
+        return slot
+
+    def game(self, slot: int, instrumentation=None, concurrent: bool = False) -> 'ArenaGame':
+        """
+        Opens the game in a slot, see ArenaGame
+        """
+        if self.slot(slot)[0] != IN_USE:
+            raise ArenaError('Slot {} is free'.format(slot))
+        return ArenaGame(self, slot, instrumentation=instrumentation, concurrent=concurrent)
+
+    def scan(self):
+        """
+        Yields a SlotSummary of each game in the arena,
+        read straight from the shared memory without stopping the workers.
+        """
+        layout = self.layout
+        ships = len(_shipyard)
+        buffer = self._buffer
+        for slot in range(self.slots):
+            start = _header.size + slot * layout.size
+            status, turn, shots1, shots2 = _slot_header.unpack_from(buffer, start)
+            if status != IN_USE:
+                continue
+            rosters = bytes(buffer[start + layout.rosters:start + layout.intact])
+            intact = bytes(buffer[start + layout.intact:start + layout.boards])
+            finished = False
+            for number in (0, 1):
+                kinds = rosters[number * ships * _ship.size:(number + 1) * ships * _ship.size:
+                                _ship.size]
+                afloat = intact[number * ships:(number + 1) * ships]
+                if any(kind != ABSENT for kind in kinds) and \
+                        not any(count for kind, count in zip(kinds, afloat) if kind != ABSENT):
+                    finished = True
+            yield SlotSummary(slot, turn, (shots1, shots2), finished)
+
+    def stats(self) -> ArenaStats:
+        """
+        The number of games in the arena, how many are finished and the cells struck in all
+        """
+        games = finished = shots = 0
+        for summary in self.scan():
+            games += 1
+            finished += summary.finished
+            shots += sum(summary.shots)
+        return ArenaStats(games, finished, shots)
+
+
+def _attach(shared_memory, name):
+    """
+    Attaches to an existing block without the resource tracker unlinking it
+    when this process exits, which it does before Python 3.13
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    from multiprocessing import resource_tracker
+    memory = shared_memory.SharedMemory(name=name)
+    resource_tracker.unregister(memory._name, 'shared_memory')
+    return memory
+
+
+def _encode_name(name: str) -> bytes:
+    encoded = name.encode('utf-8')
+    if len(encoded) > NAME_SIZE:
+        raise ArenaError('Player names are limited to {} bytes in an arena'.format(NAME_SIZE))
+    return encoded.ljust(NAME_SIZE, b'\0')
+
+
+def _write_roster(rosters: memoryview, ships, geometry: Geometry) -> None:
+    """
+    Writes a roster section from ship names mapped to their Ship
+    """
+    for kind, name in enumerate(_shipyard):
+        ship = ships.get(name)
+        if ship is None:
+            _ship.pack_into(rosters, kind * _ship.size, ABSENT, 0)
+        else:
+            _ship.pack_into(rosters, kind * _ship.size,
+                            ORIENTATIONS.index(ship.orientation),
+                            geometry.index(ship.bow_coordinate))
+
+
+class SlotBoard(Board):
+    """
+    A Board backend reading and writing a board section of an arena slot
+
+    :param geometry: The dimensions of the board
+    :type geometry: battlestern.geometry.Geometry
+    :param cells: The board's section of the slot, a byte per cell
+    :type cells: memoryview
+    :param shots: The player's shot count in the slot's header
+    :type shots: memoryview of one unsigned int
+    """
+
+    def __init__(self, geometry: Geometry, cells: memoryview, shots: memoryview) -> None:
+        self.geometry = geometry
+        self._cells = cells
+        self._shots = shots
+        self.sunk = []
+        self._index = None
+
+    @property
+    def coords(self):
+        """
+        The board materialised in the same dictionary format as Board.coords,
+        built on demand so it is a copy and not the live state.
+        """
+        coord = self.geometry.coord
+        return {coord(cell): RESULTS[mark] for cell, mark in enumerate(self._cells) if mark}
+
+    def get_coord(self, coord):
+        if not self.geometry.contains(coord):
+            raise BoardError('{} is not on the board'.format(coord))
+        return RESULTS[self._cells[self.geometry.index(coord)]]
+
+    def mark_strike(self, coord, result):
+        if not self.geometry.contains(coord):
+            raise BoardError('{} is not on the board'.format(coord))
+        cell = self.geometry.index(coord)
+        if self._cells[cell]:
+            return 'Dejavu' # Hey if you waste a shot on the same coords too bad
+        self._cells[cell] = MARKS[result]
+        self._shots[0] += 1
+        if self._index is not None:
+            self._index.mark(cell, result)
+        return None
+
+    def reset(self):
+        self._cells[:] = bytes(len(self._cells))
+        self._shots[0] = 0
+        self.sunk.clear()
+        self._index = None
+
+
+class SlotFleet(Fleet):
+    """
+    A Fleet backend reading and writing the roster, intact and damage sections
+    of an arena slot, for one player.
+    The ships are loaded from the roster when the fleet is built or reset.
+
+    :param geometry: The dimensions of the board the fleet is placed on
+    :type geometry: battlestern.geometry.Geometry
+    :param rosters: The fleet's roster section of the slot
+    :type rosters: memoryview
+    :param intact: The intact counts of the fleet's ships in the slot
+    :type intact: memoryview
+    :param damage: The fleet's damage section of the slot, a byte per cell
+    :type damage: memoryview
+    """
+
+    def __init__(self,
+                 geometry: Geometry,
+                 rosters: memoryview,
+                 intact: memoryview,
+                 damage: memoryview) -> None:
+        self.geometry = geometry
+        self._rosters = rosters
+        self._counts = intact
+        self._damage = damage
+        self._load()
+
+    def _load(self) -> None:
+        """
+        Loads the ships of the roster in the slot
+        """
+        fleetroster = {}
+        for kind, name in enumerate(_shipyard):
+            orientation, bow = _ship.unpack_from(self._rosters, kind * _ship.size)
+            if orientation == ABSENT:
+                continue
+            col, row = self.geometry.coord(bow)
+            fleetroster[name] = {'col': col, 'row': row,
+                                 'orientation': ORIENTATIONS[orientation]}
+        self._fleetroster = fleetroster
+        self._fleet = self._load_fleet(fleetroster)
+        armada = self._expand_fleet(self._fleet)
+        self.duplicates, self.out_of_bounds = self._validate_fleet(armada)
+        self._index, _ = self._index_fleet(armada)
+        self._kinds = [_shipyard.index(ship.name) for ship in self._fleet]
+
+    @property
+    def armada(self):
+        """
+        The armada materialised in the same nested dictionary format as Fleet.armada,
+        built on demand so it is a copy and not the live state.
+        """
+        armada = self._expand_fleet(self._fleet)
+        for coords in armada.values():
+            for coord in coords:
+                if self.geometry.contains(coord) and self._damage[self.geometry.index(coord)]:
+                    coords[coord] = 'damaged'
+        return armada
+
+    def is_sunk(self, shipname: str) -> bool:
+        return not self._counts[_shipyard.index(shipname)]
+
+    @property
+    def all_sunk(self) -> bool:
+        counts = self._counts
+        return not any(counts[kind] for kind in self._kinds)
+
+    def _resolve_strike(self, coordinates):
+        ship = self._index.get(coordinates)
+        if ship is None:
+            return None, False
+        cell = self.geometry.index(coordinates)
+        if self._damage[cell]:
+            return ship, False
+        self._damage[cell] = 1
+        kind = _shipyard.index(ship)
+        self._counts[kind] -= 1
+        return ship, not self._counts[kind]
+
+    def reset(self, fleetroster=None) -> None:
+        """
+        Readies the fleet for a new game in the slot, see Fleet.reset
+        """
+        if fleetroster:
+            ships = {ship.name: ship for ship in self._load_fleet(fleetroster)}
+            _write_roster(self._rosters, ships, self.geometry)
+            self._load()
+        self._damage[:] = bytes(len(self._damage))
+        for kind in range(len(_shipyard)):
+            self._counts[kind] = 0
+        for ship in self._fleet:
+            self._counts[_shipyard.index(ship.name)] = ship.length
+
+
+class ArenaGame(Game):
+    """
+    A Game whose state lives in a slot of an Arena, see Arena.game.
+    Strikes, resets and everything else read and write the slot in place.
+
+    :param arena: The arena the game is in
+    :type arena: Arena
+    :param slot: The game's slot
+    :type slot: int
+    :param instrumentation: As for Game
+    :param concurrent: As for Game, the locks are only shared by the threads
+        of this process
+    """
+
+    def __init__(self, arena: Arena, slot: int, instrumentation=None, concurrent=False) -> None:
+        self.arena = arena
+        self.slot = slot
+        self._compact = False
+        self.geometry = arena.geometry
+        layout = arena.layout
+        self._data = data = arena.slot(slot)
+        shots = data[4:12].cast('I')
+        players = []
+        for number in (1, 2):
+            name = bytes(data[layout.player('names', number)]).rstrip(b'\0').decode('utf-8')
+            player = Player(name=name, number=number)
+            player.board = SlotBoard(self.geometry, data[layout.player('boards', number)],
+                                     shots[number - 1:number])
+            player.fleet = SlotFleet(self.geometry,
+                                     data[layout.player('rosters', number)],
+                                     data[layout.player('intact', number)],
+                                     data[layout.player('damage', number)])
+            players.append(player)
+        self._player1, self._player2 = players
+        self._player1.opponent = self._player2
+        self._player2.opponent = self._player1
+        for player in players:
+            fleet = player.opponent.fleet
+            for ship in fleet._fleet:
+                if fleet.is_sunk(ship.name):
+                    player.board.mark_sunk(fleet.ship_coordinates(ship.name))
+        if instrumentation is not None:
+            instrumentation.instrument(self)
+        if concurrent:
+            self._make_concurrent()
+        self._feed = None
+        self.log = None
+
+    @property
+    def _turn(self):
+        return self._data[1]
+
+    @_turn.setter
+    def _turn(self, number):
+        self._data[1] = number
@@ -1,8 +1,14 @@
 #!/usr/bin/env python3
 """
 A board is a mapping of coordinate tuples to state
-Initialized as None, then marked with hit or miss
+Unknown (None) until marked with hit or miss
 
+Strategies query a board each turn for the unshot coordinates, a random one of them,
+the open hits (hits on ships not yet sunk) and the unshot coordinates next to them,
+and the shots in each row and column. These are answered from a BoardIndex,
+built on the first query then kept up to date by mark_strike and mark_sunk,
+so a query costs the same however big the board is.
+Boards that are never queried never build one.
 """
 
 # attack the player's tracking board, which attacks the opponent's Fleet
@@ -16,38 +22,128 @@ Initialized as None, then marked with hit or miss
 # Pass in missile strike, store if hit, return 'hit' or 'miss'
 
 
-from itertools import product
-from pprint import pprint
+import random
+from array import array
+from typing import Iterable, List, Tuple
 
-import sys
-from os import path
-sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
+from .exceptions import BoardError
+from .geometry import Geometry, DEFAULT_GEOMETRY
+
+
+class BoardIndex(object):
+    """
+    Query indexes of the strikes on a board, by row-major cell index.
+    Use the Board query methods rather than building one.
+
+    unshot     the cells not yet struck, in no particular order
+    frontier   the hit cells that aren't part of a sunk ship
+    row_shots  the cells struck in each row, and row_hits those that were hits
+    col_shots  the cells struck in each column, and col_hits those that were hits
+
+    Unshot cells are kept in a list with the position of each cell in it,
+    a strike swaps the last cell into the struck cell's place so removing one
+    and sampling one are both constant time.
+
+    :param geometry: The dimensions of the board
+    :type geometry: battlestern.geometry.Geometry
+    :param strikes: The (cell, result) of the strikes already on the board
+    :type strikes: Iterable of Tuple[int, str]
+    :param sunk: The cells of the ships already sunk
+    :type sunk: Iterable of int
+    """
+
+    __slots__ = ('geometry', 'unshot', '_position', 'frontier',
+                 'row_shots', 'row_hits', 'col_shots', 'col_hits')
+
+    def __init__(self,
+                 geometry: Geometry,
+                 strikes: Iterable[Tuple[int, str]] = (),
+                 sunk: Iterable[int] = ()) -> None:
+        self.geometry = geometry
+        self.unshot: List[int] = list(range(geometry.area))
+        self._position = array('q', self.unshot)
+        self.frontier = set()
+        self.row_shots = [0] * geometry.height
+        self.row_hits = [0] * geometry.height
+        self.col_shots = [0] * geometry.width
+        self.col_hits = [0] * geometry.width
+        for cell, result in strikes:
+            self.mark(cell, result)
+        self.frontier.difference_update(sunk)
+
+    def mark(self, cell: int, result: str) -> None:
+        """
+        Records a strike on a cell that hadn't been struck before
+        """
+        position = self._position
+        unshot = self.unshot
+        last = unshot.pop()
+        if last != cell:
+            unshot[position[cell]] = last
+            position[last] = position[cell]
+        position[cell] = -1
+        row, col = divmod(cell, self.geometry.width)
+        self.row_shots[row] += 1
+        self.col_shots[col] += 1
+        if result == 'hit':
+            self.row_hits[row] += 1
+            self.col_hits[col] += 1
+            self.frontier.add(cell)
+
+    def is_unshot(self, cell: int) -> bool:
+        return self._position[cell] >= 0
+
+    def candidates(self) -> List[int]:
+        """
+        The unshot cells next to an open hit, above, below, left or right of it,
+        in row-major order
+        """
+        width = self.geometry.width
+        area = self.geometry.area
+        position = self._position
+        candidates = set()
+        for cell in self.frontier:
+            col = cell % width
+            for neighbour, onboard in ((cell - width, cell >= width),
+                                       (cell + width, cell + width < area),
+                                       (cell - 1, col > 0),
+                                       (cell + 1, col < width - 1)):
+                if onboard and position[neighbour] >= 0:
+                    candidates.add(neighbour)
+        return sorted(candidates)
 
-from battlestern.exceptions import BoardError
 
 class Board(object):
+    """
+    A player's tracking board of strikes against the opponent's fleet.
 
-    def __init__(self):
+    :param geometry: The dimensions of the board, defaults to the 10x10 grid
+    :type geometry: battlestern.geometry.Geometry
+    """
+
+    def __init__(self, geometry: Geometry = None):
+        self.geometry = geometry or DEFAULT_GEOMETRY
         self.coords = self.new_coords()
+        self.sunk = []
+        self._index = None
 
     def new_coords(self):
         """
         Board stores the state of the game, hits and misses for missile strikes,
         where a coordinates as a dictionary (hash map).
 
-        Uses tuples of coordinates (col, row) as the dictionary keys.
-        Initial values of None (Unknown state), are replaced with 'hit' or 'miss'
-        If this were larger it could be generated lazily but it's trivial to create eagerly.
-        A list of cols are rows are combined using a cartestian product function that 
-        is effectively a memory optimised nested loop (uses generators).
+        Uses tuples of coordinates (col, row) as the dictionary keys,
+        with 'hit' or 'miss' for values.
+        The board is sparse, only coordinates that have been struck are stored
+        so memory grows with the number of strikes rather than the area of the board.
+        Any other coordinate on the grid is in the Unknown state (None).
         """
-        cols = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j']
-        rows = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
-        coords = {(col, row):None for (col, row) in product(cols, rows)}
-        return coords
+        return {}
 
     def get_coord(self, coord):
-        return self.coords[coord]
+        if not self.geometry.contains(coord):
+            raise BoardError('{} is not on the board'.format(coord))
+        return self.coords.get(coord)
 
     def mark_strike(self, coord, result):
         current_state =  self.get_coord(coord) 
@@ -55,5 +151,194 @@ class Board(object):
             return 'Dejavu' # Hey if you waste a shot on the same coords too bad
         else:
             self.coords[coord] = result
+            if self._index is not None:
+                self._index.mark(self.geometry.index(coord), result)
+            return None
+
+    def mark_sunk(self, coords):
+        """
+        Records the coordinates of a ship the player has sunk,
+        its hits are no longer open hits.
+
+        :param coords: The coordinates of the sunk ship
+        :type coords: Iterable of Tuple[str, int]
+        """
+        wreck = tuple(coords)
+        self.sunk.append(wreck)
+        if self._index is not None:
+            self._index.frontier.difference_update(self.geometry.index(coord) for coord in wreck)
+
+    def reset(self):
+        """
+        Clears every strike in place, for a new game on the same board
+        """
+        self.coords.clear()
+        self.sunk.clear()
+        self._index = None
+
+    def _indexed(self):
+        """
+        The board's BoardIndex, built on first use
+        """
+        if self._index is None:
+            index = self.geometry.index
+            self._index = BoardIndex(
+                self.geometry,
+                ((index(coord), result) for coord, result in self.coords.items()),
+                (index(coord) for wreck in self.sunk for coord in wreck))
+        return self._index
+
+    def unshot_count(self):
+        """
+        The number of coordinates not yet struck
+        """
+        return len(self._indexed().unshot)
+
+    def random_unshot(self, rng=random):
+        """
+        A uniformly random coordinate not yet struck, or None if every one has been
+
+        :param rng: The random number generator to draw from
+        :type rng: random.Random or the random module
+        """
+        unshot = self._indexed().unshot
+        if not unshot:
             return None
+        return self.geometry.coord(rng.choice(unshot))
 
+    def open_hits(self):
+        """
+        The hits on ships not yet sunk, in row-major order
+        """
+        coord = self.geometry.coord
+        return [coord(cell) for cell in sorted(self._indexed().frontier)]
+
+    def candidates(self):
+        """
+        The unshot coordinates next to an open hit, above, below, left or right of it,
+        where the rest of a ship that has been found must lie. In row-major order.
+        """
+        coord = self.geometry.coord
+        return [coord(cell) for cell in self._indexed().candidates()]
+
+    def row_count(self, row, result=None):
+        """
+        The number of strikes in a row
+
+        :param row: The row number, from 1
+        :type row: int
+        :param result: Count only 'hit' or 'miss' strikes, or every strike if None
+        :type result: str or None
+        """
+        if row not in self.geometry.rows:
+            raise BoardError('Row {} is not on the board'.format(row))
+        index = self._indexed()
+        return self._count(index.row_shots[row - 1], index.row_hits[row - 1], result)
+
+    def col_count(self, col, result=None):
+        """
+        The number of strikes in a column, see `row_count`
+
+        :param col: The column label e.g. 'c'
+        :type col: str
+        """
+        if col not in self.geometry.colset:
+            raise BoardError('Column {} is not on the board'.format(col))
+        index = self._indexed()
+        position = self.geometry.column_index(col)
+        return self._count(index.col_shots[position], index.col_hits[position], result)
+
+    @staticmethod
+    def _count(shots, hits, result):
+        if result is None:
+            return shots
+        if result == 'hit':
+            return hits
+        if result == 'miss':
+            return shots - hits
+        raise BoardError("result must be 'hit', 'miss' or None")
+
+
+
+class BitBoard(Board):
+    """
+    A compact Board backend with the same get_coord/mark_strike API.
+
+    Hits and misses are stored as two integer bitmasks, one bit per coordinate
+    in row-major order (see Geometry.index), instead of a dictionary.
+    A snapshot of the board is the pair of ints and checking if a coordinate
+    has already been shot is a single bitwise and.
+    Bitmasks are as wide as the board so this suits the classic sized boards,
+    very large boards are better served by the sparse Board.
+
+    :param geometry: The dimensions of the board, defaults to the 10x10 grid
+    :type geometry: battlestern.geometry.Geometry
+    """
+
+    def __init__(self, geometry: Geometry = None):
+        self.geometry = geometry or DEFAULT_GEOMETRY
+        self.hits = 0
+        self.misses = 0
+        self.sunk = []
+        self._index = None
+
+    @property
+    def coords(self):
+        """
+        The board materialised in the same dictionary format as Board.coords,
+        built on demand so it is a copy and not the live state.
+        """
+        coords = self.new_coords()
+        for mask, result in ((self.hits, 'hit'), (self.misses, 'miss')):
+            while mask:
+                bit = mask & -mask
+                coords[self.geometry.coord(bit.bit_length() - 1)] = result
+                mask ^= bit
+        return coords
+
+    def get_coord(self, coord):
+        if not self.geometry.contains(coord):
+            raise BoardError('{} is not on the board'.format(coord))
+        bit = 1 << self.geometry.index(coord)
+        if self.hits & bit:
+            return 'hit'
+        if self.misses & bit:
+            return 'miss'
+        return None
+
+    def mark_strike(self, coord, result):
+        if not self.geometry.contains(coord):
+            raise BoardError('{} is not on the board'.format(coord))
+        bit = 1 << self.geometry.index(coord)
+        if (self.hits | self.misses) & bit:
+            return 'Dejavu' # Hey if you waste a shot on the same coords too bad
+        if result == 'hit':
+            self.hits |= bit
+        else:
+            self.misses |= bit
+        if self._index is not None:
+            self._index.mark(bit.bit_length() - 1, result)
+        return None
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+        self.sunk.clear()
+        self._index = None
+
+    def snapshot(self):
+        """
+        The state of the board as a (hits, misses) tuple of ints
+        """
+        return self.hits, self.misses
+
+    def restore(self, snapshot):
+        """
+        Resets the board to a state returned by `snapshot`.
+        Ships marked sunk stay sunk only if all their coordinates are still hits.
+        """
+        self.hits, self.misses = snapshot
+        index = self.geometry.index
+        self.sunk = [wreck for wreck in self.sunk
+                     if all(self.hits >> index(coord) & 1 for coord in wreck)]
+        self._index = None
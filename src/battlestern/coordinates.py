@@ -1,60 +1,111 @@
-#!/usr/bin/env python3
-
-
-import sys
-from os import path
-from collections.abc import Mapping
-from typing import List
-sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
-
-from battlestern.exceptions import CoordinateError
-
-class Coordinate(Mapping):
-    """
-    The coordinates of a ship or on a board.
-
-    :param col: A valid column reference on the board
-    :type col: string, one of the letters from a to j
-    :param row: A valid row reference on the board
-    :type row: int, between 1 and 10
-    """
-
-    allowedkeys: List[str] = ['col', 'row']
-    allowedcols: List[str] = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j']
-    allowedrows: List[int] = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
-
-    def __init__(self, *args, **kwargs: str) -> None:
-        """
-
-        """
-        keyset = set(self.allowedkeys)
-        colset = set(self.allowedcols)
-        rowset = set(self.allowedrows)
-        if kwargs.keys() & keyset != keyset:
-            raise CoordinateError(
-                'Coordinates can only have a `col` and a `row` not these: {}'
-                .format(', '.join(kwargs.keys()))
-                )
-        if kwargs.get('col') not in colset:
-            raise CoordinateError(
-                'col must be one of {}'
-                .format(','.join(colset))
-                )
-        if kwargs.get('row') not in rowset:
-            raise CoordinateError(
-                'row must be one of {}'
-                .format(','.join(rowset))
-                )
-        self._storage = dict(*args, **kwargs)
-
-    def __getitem__(self, key):
-        if key not in ['col', 'row']:
-            raise CoordinateError(
-                'Coordinates only have a `col` and a `row`')
-        return self._storage[key]
-
-    def __iter__(self):
-        return iter(self._storage)
-
-    def __len__(self):
-        return len(self._storage)
\ No newline at end of file
+#!/usr/bin/env python3
+
+
+from itertools import product
+from typing import Dict, FrozenSet, List, Tuple
+
+from .exceptions import CoordinateError
+from .geometry import Geometry, DEFAULT_GEOMETRY
+
+class Coordinate(tuple):
+    """
+    The coordinates of a ship or on a board.
+
+    An immutable (col, row) tuple, so it is interchangeable with the plain tuples
+    used as keys by Board and Game.strike, they are equal and hash the same.
+    `coord['col']` and `coord['row']` still work as they did when a Coordinate
+    was a Mapping, and dict(coord) gives {'col': col, 'row': row}.
+
+    Each of the coordinates on the 10x10 grid exists exactly once,
+    constructing one is a dictionary lookup that returns the interned instance.
+
+    :param col: A valid column reference on the board
+    :type col: string, one of the letters from a to j
+    :param row: A valid row reference on the board
+    :type row: int, between 1 and 10
+    :param geometry: The board the coordinate is on, defaults to the 10x10 grid
+        in which case col and row are checked against allowedcols & allowedrows
+    :type geometry: battlestern.geometry.Geometry
+    """
+
+    __slots__ = ()
+
+    allowedkeys: List[str] = ['col', 'row']
+    allowedcols: List[str] = DEFAULT_GEOMETRY.cols
+    allowedrows: List[int] = list(DEFAULT_GEOMETRY.rows)
+    _keyset: FrozenSet[str] = frozenset(allowedkeys)
+    _interned: Dict[Tuple[str, int], 'Coordinate'] = {}
+
+    def __new__(cls, *args, geometry: Geometry = None, **kwargs) -> 'Coordinate':
+        if kwargs.keys() == cls._keyset and not args:
+            key = (kwargs['col'], kwargs['row'])
+        elif len(args) == 2 and not kwargs:
+            key = args
+        else:
+            raise CoordinateError(
+                'Coordinates can only have a `col` and a `row` not these: {}'
+                .format(', '.join(kwargs.keys()))
+                )
+        coord = cls._interned.get(key)
+        if coord is not None and \
+                (geometry is None or geometry is DEFAULT_GEOMETRY or geometry.contains(key)):
+            return coord
+        if geometry is None:
+            colset, rowset = cls.allowedcols, cls.allowedrows
+        else:
+            colset, rowset = geometry.colset, geometry.rows
+        col, row = key
+        if col not in colset:
+            raise CoordinateError(
+                'col must be one of {}'
+                .format(','.join(sorted(colset)))
+                )
+        if row not in rowset:
+            raise CoordinateError(
+                'row must be between {} and {}'
+                .format(min(rowset), max(rowset))
+                )
+        return tuple.__new__(cls, key)
+
+    @classmethod
+    def intern(cls, coord: Tuple[str, int]) -> 'Coordinate':
+        """
+        Converts a plain (col, row) tuple on the 10x10 grid to its Coordinate,
+        or validates it against the default grid if it isn't one of those.
+        """
+        interned = cls._interned.get(coord)
+        if interned is not None:
+            return interned
+        return cls(*coord)
+
+    def __getitem__(self, key):
+        if key == 'col':
+            return tuple.__getitem__(self, 0)
+        if key == 'row':
+            return tuple.__getitem__(self, 1)
+        if isinstance(key, (int, slice)):
+            return tuple.__getitem__(self, key)
+        raise CoordinateError(
+            'Coordinates only have a `col` and a `row`')
+
+    def __getnewargs__(self):
+        return tuple(self)
+
+    def keys(self):
+        return self.allowedkeys
+
+    @property
+    def col(self) -> str:
+        return tuple.__getitem__(self, 0)
+
+    @property
+    def row(self) -> int:
+        return tuple.__getitem__(self, 1)
+
+    def __repr__(self) -> str:
+        return 'Coordinate(col={!r}, row={!r})'.format(*self)
+
+
+Coordinate._interned.update(
+    (key, tuple.__new__(Coordinate, key))
+    for key in product(Coordinate.allowedcols, Coordinate.allowedrows))
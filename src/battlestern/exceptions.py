@@ -11,4 +11,25 @@ class PlayerSetupError(BattlesternError):
     pass
 
 class BoardError(BattlesternError):
-    pass
\ No newline at end of file
+    pass
+
+class PlacementError(BattlesternError):
+    pass
+
+class SerializationError(BattlesternError):
+    pass
+
+class TurnError(BattlesternError):
+    pass
+
+class SessionError(BattlesternError):
+    pass
+
+class SolverError(BattlesternError):
+    pass
+
+class ArenaError(BattlesternError):
+    pass
+
+class TournamentError(BattlesternError):
+    pass
@@ -19,24 +19,92 @@ You can change player names:
 game.player1.name = 'Eddy'
 
 You can assign a player fleet game.player1.fleet = 'thing'
+
+geometry
+    The board dimensions shared by both players' boards and fleets,
+    defaults to the classic 10x10 grid, e.g. Game(geometry=Geometry(100, 100))
+
+seed
+    Seeds the random fleets of players without a fleetroster, for reproducible games
+
+compact
+    Pass compact=True to store boards and fleets as integer bitmasks
+    (BitBoard & BitFleet), useful when holding thousands of games in one process.
+
+A finished game can be reset for a new match rather than building a new one,
+reusing its players, boards and fleets, and a GamePool hands out recycled games
+game.reset(player1fleet=None, player2fleet=None)
+
+A game can be parked as bytes and picked up again later, see battlestern.serialization
+data = game.to_bytes()
+game = Game.from_bytes(data)
+
+log
+    Every strike is journaled to game.log, see battlestern.journal.
+    Pass a file-backed MoveLog to keep it on disk, or log=False for no journal.
+    The log's starting checkpoint is taken on the first strike, or when game.log is read,
+    so games that are never played don't encode anything.
+    A game can be rebuilt from its log with Game.replay(game.log)
+
+concurrent
+    Pass concurrent=True to share the game between threads, e.g. a thread pool serving
+    many games, including on free-threaded builds of CPython.
+    strike, strike_many, iter_strikes, apply_moves, reset and subscribe then take the game's
+    own lock, there is no global lock, and a strike out of turn or after the game is over
+    raises a TurnError. iter_strikes takes the lock for each strike and raises a TurnError
+    if another strike came in between.
+    Each fleet and board also has a lock so every strike on it is atomic, even when used directly.
+    Board queries, open_hits, candidates, row_count and so on, take the board's lock.
+    Plain reads, the turn, board coordinates or whether a ship is sunk, don't lock.
+    A game that isn't concurrent has no locks at all.
+
+spectators
+    game.subscribe() streams the game's strikes to a spectator as compact delta frames,
+    with keyframes for late joiners, see battlestern.spectators.
+    Games nobody watches don't encode anything.
+
+instrumentation
+    Pass a battlestern.instrumentation.Instrumentation to count and time the game's
+    strikes and call hooks on strikes, sinks and the end of the game
 """
 
-import sys
-from os import path
-sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
+import random
+import threading
+from array import array
+from collections import namedtuple
+from contextlib import contextmanager
 
+from .exceptions import BoardError, TurnError
 from .players import Player
-from .boards import Board
-from battlestern.ships import Fleet
+from .boards import Board, BitBoard
+from .ships import Fleet, BitFleet
+from .geometry import DEFAULT_GEOMETRY
+from .journal import MoveLog, MISS, HIT, DEJAVU, SUNK
 
+StrikeResults = namedtuple('StrikeResults', ['results', 'dejavu', 'sinks'])
+StrikeResults.__doc__ = """
+The outcome of Game.strike_many
+
+results: array of MISS (0) or HIT (1), one per coordinate
+dejavu: array of 1 where the coordinate had already been struck, otherwise 0
+sinks: list of (position in coords, ship name) for each strike that sank a ship
+"""
 
 class Game(object):
     def __init__(self,
                  player1name=None,
                  player2name=None,
                  player1fleet=None,
-                 player2fleet=None):
+                 player2fleet=None,
+                 compact=False,
+                 geometry=None,
+                 seed=None,
+                 log=None,
+                 instrumentation=None,
+                 concurrent=False):
  
+        self._compact = compact
+        self.geometry = geometry or DEFAULT_GEOMETRY
         self._player1name = player1name
         if player1name is None:
             self._player1name = 'Bob'
@@ -48,21 +116,62 @@ class Game(object):
         if self._player1name == self._player2name:
             self._player2name = self._player2name + '_1'
 
-        self._player1 = Player(name=player1name,number=1)
-        self._player2 = Player(name=player2name,number=2)
+        self._player1 = Player(name=self._player1name,number=1)
+        self._player2 = Player(name=self._player2name,number=2)
+
+        if instrumentation is not None:
+            instrumentation.instrument_fleet_creation(self)
 
         # dynamic attributes - Poor man's dependency injection
         # Compose players with boards
-        self._player1.board = Board()
-        self._player2.board = Board()
+        board = BitBoard if compact else Board
+        self._player1.board = board(geometry=self.geometry)
+        self._player2.board = board(geometry=self.geometry)
         # Compose players with fleets
-        self._player1.fleet = self.create_fleet(fleetroster=player1fleet)
-        self._player2.fleet = self.create_fleet(fleetroster=player2fleet)
+        if seed is not None and not isinstance(seed, random.Random):
+            seed = random.Random(seed)
+        self._player1.fleet = self.create_fleet(fleetroster=player1fleet, seed=seed)
+        self._player2.fleet = self.create_fleet(fleetroster=player2fleet, seed=seed)
 
         # Compose player with opponent
         self._player1.opponent = self._player2
         self._player2.opponent = self._player1
 
+        # Player 1 goes first
+        self._turn = 1
+
+        # wrapped once here, uninstrumented games have nothing to check on each strike
+        if instrumentation is not None:
+            instrumentation.instrument(self)
+        # after instrumenting, so the metrics of a strike are taken under its lock
+        if concurrent:
+            self._make_concurrent()
+
+        self._feed = None
+        if log is None:
+            log = MoveLog(geometry=self.geometry)
+        self._log = None if log is False else log
+
+
+    @property
+    def log(self):
+        """
+        The game's journal, a battlestern.journal.MoveLog, or None
+        """
+        self._start_log()
+        return self._log
+
+    @log.setter
+    def log(self, log):
+        self._log = log
+
+    def _start_log(self):
+        """
+        Takes the starting checkpoint of the log if it hasn't one,
+        called before the first strike is journaled
+        """
+        if self._log is not None and not self._log.checkpoints:
+            self._log.checkpoint(self.to_bytes())
 
     @property
     def player1(self):
@@ -72,8 +181,16 @@ class Game(object):
     def player2(self):
         return self._player2
 
+    @property
+    def turn(self):
+        """
+        The number of the player to strike next,
+        i.e. the opponent of whoever struck last
+        """
+        return self._turn
+
 
-    def create_fleet(self, fleetroster):
+    def create_fleet(self, fleetroster, seed=None):
         """
         Created from a specified ship layout, or if None will be generated.
 
@@ -86,14 +203,372 @@ class Game(object):
             col must a letter a through f
             row must be an integer 1 through 10
             orientation must be one of horizontal|vertical
+        :param seed: Seeds the random placement when fleetroster is None
+        :type seed: int, random.Random or None
         
-        Returns a new battlestern.ships.Fleet instance
+        Returns a new battlestern.ships.Fleet instance,
+        or a battlestern.ships.BitFleet for a compact game
+        """
+        fleet = BitFleet if self._compact else Fleet
+        return fleet(fleetroster=fleetroster, geometry=self.geometry, seed=seed)
+
+
+    def _make_concurrent(self):
+        """
+        Swaps in locked versions of the strike methods of the game and of its
+        players' fleets and boards, as instance attributes.
+        Locks are always taken game, then fleet, then board so they can't deadlock.
+        """
+        # reentrant as a strike checkpoints the game, which may take it again
+        lock = self._lock = threading.RLock()
+        for player in (self._player1, self._player2):
+            player.fleet._resolve_strike = _locked(threading.Lock(), player.fleet._resolve_strike)
+            # the board's queries build its index from its strikes on first use
+            board = player.board
+            # reentrant as the queries build the index under it
+            board_lock = threading.RLock()
+            for name in ('mark_strike', 'mark_sunk', '_indexed', 'unshot_count', 'random_unshot',
+                         'open_hits', 'candidates', 'row_count', 'col_count'):
+                setattr(board, name, _locked(board_lock, getattr(board, name)))
+        strike, strike_many, reset = self.strike, self.strike_many, self.reset
+        iter_strikes, subscribe = self.iter_strikes, self.subscribe
+
+        def locked_strike(player, coord):
+            with lock:
+                self._check_turn(player)
+                return strike(player, coord)
+
+        def locked_strike_many(player, coords):
+            with lock:
+                self._check_turn(player)
+                return strike_many(player, coords)
+
+        def locked_iter_strikes(player, coords):
+            turn = None
+            for coord in coords:
+                with lock:
+                    if turn is None:
+                        self._check_turn(player)
+                    elif self._turn != turn:
+                        raise TurnError('The game moved on during the strikes')
+                    struck = next(iter_strikes(player, (coord,)))
+                    turn = self._turn
+                yield struck
+
+        def locked_reset(*args, **kwargs):
+            with lock:
+                return reset(*args, **kwargs)
+
+        self.strike = locked_strike
+        self.strike_many = locked_strike_many
+        self.iter_strikes = locked_iter_strikes
+        self.apply_moves = _locked(lock, self.apply_moves)
+        self.reset = locked_reset
+        self.subscribe = _locked(lock, subscribe)
+        # reading game.log may take the first checkpoint
+        self._start_log = _locked(lock, self._start_log)
+
+    def _check_turn(self, player):
+        """
+        Raises a TurnError unless it is the player's turn in a game still being played
+        """
+        if self._player1.fleet.all_sunk or self._player2.fleet.all_sunk:
+            raise TurnError('The game is over')
+        if player.number != self._turn:
+            raise TurnError("It is player {}'s turn".format(self._turn))
+
+    def reset(self, player1fleet=None, player2fleet=None, seed=None, log=None):
+        """
+        Readies the game for a new match in place, clearing both boards,
+        moving the fleets and giving player 1 the first turn.
+        Player names are kept.
+
+        :param player1fleet: A fleetroster as for Game, or None for a random one
+        :param player2fleet: A fleetroster as for Game, or None for a random one
+        :param seed: Seeds the random fleets, as for Game
+        :type seed: int, random.Random or None
+        :param log: The journal of the new match, defaults to a new in-memory MoveLog
+            if the game was journaled, False for no journal.
+        :type log: battlestern.journal.MoveLog, None or False
+        """
+        if seed is not None and not isinstance(seed, random.Random):
+            seed = random.Random(seed)
+        for player, fleetroster in ((self._player1, player1fleet),
+                                    (self._player2, player2fleet)):
+            player.board.reset()
+            fleet = player.fleet
+            fleet.reset(fleetroster or fleet._random_fleetroster(seed))
+        self._turn = 1
+        if log is None and self._log is not None:
+            log = MoveLog(geometry=self.geometry)
+        self._log = None if log is None or log is False else log
+        if self._feed is not None:
+            self._feed.reset()
+
+    def subscribe(self, callback=None, keyframe_interval=64):
         """
-        return Fleet(fleetroster=fleetroster)
+        Subscribes a spectator to the game's strikes, see battlestern.spectators
 
+        :param callback: Called with each frame as it's published,
+            or None to pull them with Subscription.frames()
+        :type callback: Callable[[bytes], None] or None
+        :param keyframe_interval: Strikes between keyframes,
+            only used by the first subscription which starts the game's feed
+        :type keyframe_interval: int
+
+        Returns a battlestern.spectators.Subscription
+        """
+        if self._feed is None:
+            from .spectators import Feed
+            self._feed = Feed(self, keyframe_interval)
+        return self._feed.subscribe(callback)
 
     def strike(self, player, coord):
-        result, message = player.opponent.fleet._strike(coord)
-        player.board.mark_strike(coord=coord, result=result)
+        if not self.geometry.contains(coord):
+            raise BoardError('{} is not on the board'.format(coord))
+        self._start_log()
+        fleet = player.opponent.fleet
+        result, message = fleet._strike(coord)
+        dejavu = player.board.mark_strike(coord=coord, result=result)
+        self._turn = player.opponent.number
+        sunk = False
+        if result == 'hit' and dejavu is None:
+            ship = fleet.ship_at(coord)
+            sunk = fleet.is_sunk(ship)
+            if sunk:
+                player.board.mark_sunk(fleet.ship_coordinates(ship))
+        if self._log is not None or self._feed is not None:
+            self._record(player, coord, MISS if result == 'miss' else HIT,
+                         dejavu is not None, ship if sunk else None)
+
+        return result, message
+
+    def _record(self, player, coord, result, dejavu, sunk=None):
+        """
+        Journals a strike to the move log, checkpointing the game when one is due,
+        and publishes it to spectators.
+        A repeated strike on a sunk ship is flagged DEJAVU but not SUNK.
+
+        :param sunk: The name of the ship the strike sank, or None
+        """
+        if dejavu:
+            result |= DEJAVU
+        elif sunk:
+            result |= SUNK
+        cell = self.geometry.index(coord)
+        log = self._log
+        if log is not None:
+            log.append(player.number, cell, result)
+            if log.checkpoint_due():
+                log.checkpoint(self.to_bytes())
+        if self._feed is not None:
+            self._feed.publish(player.number, cell, result, sunk if result & SUNK else None)
+
+    def strike_many(self, player, coords):
+        """
+        Strikes a sequence of coordinates in one pass, for bulk and replay workloads.
+        The game ends up in the same state as calling `strike` for each in turn,
+        without building a message for every strike.
+
+        :param player: The player taking the shots
+        :type player: battlestern.players.Player
+        :param coords: Coordinates to strike on the opponent's fleet
+        :type coords: Iterable of Tuple[str, int]
+
+        Returns a StrikeResults of compact arrays.
+        As with `strike` a repeated coordinate is still resolved against the fleet
+        and reported as a hit or miss, the dejavu array flags the wasted shots.
+        Raises a BoardError before striking any if a coordinate is off the board.
+        """
+        coords = list(coords)
+        contains = self.geometry.contains
+        for coord in coords:
+            if not contains(coord):
+                raise BoardError('{} is not on the board'.format(coord))
+        fleet = player.opponent.fleet
+        resolve = fleet._resolve_strike
+        mark_strike = player.board.mark_strike
+        results = array('B')
+        dejavu = array('B')
+        sinks = []
+        record = self._log is not None or self._feed is not None
+        self._start_log()
+        for position, coord in enumerate(coords):
+            ship, sunk = resolve(coord)
+            if ship is None:
+                results.append(MISS)
+                dejavu.append(mark_strike(coord, 'miss') is not None)
+            else:
+                results.append(HIT)
+                dejavu.append(mark_strike(coord, 'hit') is not None)
+                if sunk:
+                    sinks.append((position, ship))
+                    player.board.mark_sunk(fleet.ship_coordinates(ship))
+            if record:
+                # a checkpoint taken by the record has the turn of the game after the strike
+                self._turn = player.opponent.number
+                self._record(player, coord, results[-1], dejavu[-1], ship if sunk else None)
+        if results:
+            self._turn = player.opponent.number
+        return StrikeResults(results, dejavu, sinks)
+
+    def iter_strikes(self, player, coords):
+        """
+        The streaming variant of `strike_many`, coordinates are consumed lazily
+        and a (result, dejavu, sunk) tuple is yielded for each.
+
+        result is 'hit' or 'miss', dejavu is True for a repeated coordinate
+        and sunk is the name of the ship the strike sank, otherwise None.
+        A coordinate off the board raises a BoardError before it's struck.
+        """
+        self._start_log()
+        fleet = player.opponent.fleet
+        resolve = fleet._resolve_strike
+        mark_strike = player.board.mark_strike
+        contains = self.geometry.contains
+        for coord in coords:
+            if not contains(coord):
+                raise BoardError('{} is not on the board'.format(coord))
+            ship, sunk = resolve(coord)
+            result = 'miss' if ship is None else 'hit'
+            dejavu = mark_strike(coord, result) is not None
+            if sunk:
+                player.board.mark_sunk(fleet.ship_coordinates(ship))
+            self._turn = player.opponent.number
+            if self._log is not None or self._feed is not None:
+                self._record(player, coord, MISS if ship is None else HIT, dejavu,
+                             ship if sunk else None)
+            yield result, dejavu, ship if sunk else None
+
+    def to_bytes(self):
+        """
+        The full state of the game in a compact binary encoding,
+        see battlestern.serialization
+        """
+        # imported on first use, games that are never encoded don't load the codec
+        from .serialization import encode_game
+        return encode_game(self)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Rebuilds a game from `to_bytes`
+
+        :param data: An encoded game
+        :type data: bytes, bytearray or memoryview
+        """
+        from .serialization import decode_game
+        return decode_game(cls, data)
+
+    def apply_moves(self, records):
+        """
+        Applies journaled moves in bulk, without messages or per-strike checkpoints.
+
+        :param records: (player number, cell, result) records, see battlestern.journal
+        :type records: Iterable of Tuple[int, int, int]
+        """
+        players = {1: self._player1, 2: self._player2}
+        coord_of = self.geometry.coord
+        log = self.log
+        feed = self._feed
+        player = None
+        for number, cell, result in records:
+            player = players[number]
+            coord = coord_of(cell)
+            fleet = player.opponent.fleet
+            ship, sunk = fleet._resolve_strike(coord)
+            player.board.mark_strike(coord, 'miss' if ship is None else 'hit')
+            if sunk:
+                player.board.mark_sunk(fleet.ship_coordinates(ship))
+            if log is not None:
+                log.append(number, cell, result)
+            if feed is not None:
+                feed.publish(number, cell, result, ship if result & SUNK else None)
+        if player is not None:
+            self._turn = player.opponent.number
+
+    @classmethod
+    def replay(cls, log, move=None):
+        """
+        Rebuilds a game from its move log, starting at the last checkpoint
+        and applying the moves after it in bulk.
+
+        :param log: A game's journal
+        :type log: battlestern.journal.MoveLog
+        :param move: Replay the first this many moves, defaults to all of them
+        :type move: int
+
+        The replayed game has a new in-memory log, starting from the checkpoint.
+        """
+        start, data = log.latest_checkpoint(move)
+        game = cls.from_bytes(data)
+        game.apply_moves(log.records(start, move))
+        return game
+
+
+class GamePool(object):
+    """
+    A bounded pool of finished games to recycle, so starting a match resets a game
+    in place rather than building players, boards, fleets and ships from scratch.
+
+    :param maxsize: The most idle games kept, released games beyond this are dropped
+    :type maxsize: int
+    :param game_options: Keyword arguments for new Games, e.g. compact=True.
+        Fleets are given per match to `acquire`.
+
+    e.g.
+    pool = GamePool(log=False)
+    with pool.game(seed=1) as game:
+        game.strike(game.player1, ('a', 1))
+    """
+
+    def __init__(self, maxsize=64, **game_options):
+        self.maxsize = maxsize
+        self.game_options = game_options
+        self._idle = []
+
+    def __len__(self):
+        """
+        The number of idle games ready to be handed out
+        """
+        return len(self._idle)
+
+    def acquire(self, player1fleet=None, player2fleet=None, seed=None):
+        """
+        A game ready for a new match, recycled if there's one idle.
+        Fleets and seed are as for Game.
+        """
+        if self._idle:
+            game = self._idle.pop()
+            game.reset(player1fleet, player2fleet, seed=seed)
+            return game
+        return Game(player1fleet=player1fleet, player2fleet=player2fleet, seed=seed,
+                    **self.game_options)
+
+    def release(self, game):
+        """
+        Returns a finished game to the pool. The game mustn't be used after it's released.
+        """
+        if len(self._idle) < self.maxsize:
+            self._idle.append(game)
+
+    @contextmanager
+    def game(self, player1fleet=None, player2fleet=None, seed=None):
+        """
+        Acquires a game for the duration of a with block
+        """
+        game = self.acquire(player1fleet, player2fleet, seed)
+        try:
+            yield game
+        finally:
+            self.release(game)
+
 
-        return result, message
\ No newline at end of file
+def _locked(lock, method):
+    """
+    Wraps a bound method to hold a lock while it runs
+    """
+    def locked(*args, **kwargs):
+        with lock:
+            return method(*args, **kwargs)
+    return locked
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+A geometry is the shape of the grid shared by a Board, its Coordinates and a Fleet.
+
+Columns are labelled with letters like a spreadsheet, a through z then aa, ab ...
+Rows are numbered from 1.
+The classic game is played on the default 10x10 grid, columns a-j and rows 1-10.
+"""
+
+from typing import Tuple
+
+from .exceptions import BoardError, CoordinateError
+
+
+class Geometry(object):
+    """
+    The dimensions of a board.
+
+    Nothing here is proportional to the area of the board,
+    columns labels are generated once per column and rows are a range.
+
+    :param width: Number of columns
+    :type width: int greater than 0
+    :param height: Number of rows
+    :type height: int greater than 0
+    """
+
+    def __init__(self, width: int = 10, height: int = 10) -> None:
+        if not isinstance(width, int) or not isinstance(height, int) \
+                or width < 1 or height < 1:
+            raise BoardError('Board width and height must be positive integers')
+        self._width = width
+        self._height = height
+        self.cols = [self.column_label(i) for i in range(width)]
+        self.rows = range(1, height + 1)
+        self._colindex = {col: i for i, col in enumerate(self.cols)}
+
+    @property
+    def width(self) -> int:
+        return self._width
+
+    @property
+    def height(self) -> int:
+        return self._height
+
+    @property
+    def colset(self):
+        """
+        The column labels as a set-like view, for constant time membership tests
+        """
+        return self._colindex.keys()
+
+    @property
+    def area(self) -> int:
+        return self._width * self._height
+
+    @staticmethod
+    def column_label(index: int) -> str:
+        """
+        The letters labelling a zero based column index, a, b ... z, aa, ab ...
+        """
+        label = ''
+        index += 1
+        while index:
+            index, remainder = divmod(index - 1, 26)
+            label = chr(ord('a') + remainder) + label
+        return label
+
+    def column_index(self, label: str) -> int:
+        """
+        The zero based index of a column label, the inverse of `column_label`.
+        Labels past the edge of the board are still converted, so ships can be
+        expanded off the grid and reported by validation.
+        """
+        index = self._colindex.get(label)
+        if index is not None:
+            return index
+        index = 0
+        for letter in label:
+            index = index * 26 + ord(letter) - ord('a') + 1
+        return index - 1
+
+    def contains(self, coord: Tuple[str, int]) -> bool:
+        col, row = coord
+        return col in self._colindex and row in self.rows
+
+    def index(self, coord: Tuple[str, int]) -> int:
+        """
+        The position of a (col, row) tuple in row-major order,
+        used as the bit position by the compact board and fleet backends.
+        """
+        col, row = coord
+        colindex = self._colindex.get(col)
+        if colindex is None or row not in self.rows:
+            raise CoordinateError('{} is not on the grid'.format(coord))
+        return (row - 1) * self._width + colindex
+
+    def coord(self, index: int) -> Tuple[str, int]:
+        """
+        The (col, row) tuple at a row-major position, the inverse of `index`
+        """
+        row, col = divmod(index, self._width)
+        return self.cols[col], row + 1
+
+    def offset(self,
+               coord: Tuple[str, int],
+               cols: int = 0,
+               rows: int = 0) -> Tuple[str, int]:
+        """
+        The coordinate a number of columns to the right and rows down.
+        The result may be off the grid.
+        """
+        col, row = coord
+        return self.column_label(self.column_index(col) + cols), row + rows
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Geometry):
+            return NotImplemented
+        return (self._width, self._height) == (other._width, other._height)
+
+    def __hash__(self) -> int:
+        return hash((self._width, self._height))
+
+    def __repr__(self) -> str:
+        return 'Geometry(width={}, height={})'.format(self._width, self._height)
+
+
+DEFAULT_GEOMETRY = Geometry()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Opt-in instrumentation of games, counters, latency histograms and hooks.
+
+An Instrumentation is passed to the games it should measure, one can be shared
+by every game in a process
+metrics = Instrumentation(on_sink=lambda game, player, ship: ...)
+game = Game(instrumentation=metrics)
+
+Instrumenting a game wraps its strike, its fleets' _strike & _resolve_strike
+and its boards' mark_strike with timed versions, as instance attributes set once
+at construction. Games without an Instrumentation are never wrapped, so when it's
+off there's nothing to check on each call and no overhead at all.
+
+counters     strikes, hits, misses, dejavu (repeat shots), sinks, games_over and fleets,
+             counted as strikes resolve against a fleet so every Game method is counted
+histograms   seconds taken by Game.strike, Fleet._strike, Board.mark_strike
+             and fleet creation, in cumulative buckets as Prometheus expects
+hooks        on_strike(game, player, coord, result) after every Game.strike
+             on_sink(game, player, ship) when a player sinks a ship
+             on_game_over(game, player) when a player sinks the last ship
+
+Metrics are exported with `snapshot` as a dict, `to_prometheus` in the Prometheus
+text format, or written to a local file periodically by an Exporter.
+Updates aren't locked, concurrent games in threads may lose the odd count.
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, List, Tuple, Union
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4,
+                                      2.5e-4, 5e-4, 1e-3, 1e-2, 1e-1, float('inf'))
+COUNTERS: Tuple[str, ...] = ('strikes', 'hits', 'misses', 'dejavu', 'sinks',
+                             'games_over', 'fleets')
+HISTOGRAMS: Tuple[str, ...] = ('game_strike', 'fleet_strike', 'board_mark_strike',
+                               'fleet_create')
+HOOKS: Tuple[str, ...] = ('on_strike', 'on_sink', 'on_game_over')
+
+
+class Histogram(object):
+    """
+    Observations counted into fixed buckets
+
+    :param buckets: Ascending upper bounds, the last should be infinity
+    :type buckets: Tuple[float, ...]
+    """
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """
+        (upper bound, observations at or below it) for every bucket
+        """
+        total = 0
+        cumulative = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            cumulative.append((bound, total))
+        return cumulative
+
+
+class Instrumentation(object):
+    """
+    Counters, histograms and hooks for the games it instruments.
+
+    :param on_strike: Called as on_strike(game, player, coord, result) after every strike
+    :param on_sink: Called as on_sink(game, player, ship) when a player sinks a ship
+    :param on_game_over: Called as on_game_over(game, player) with the winner
+    :param buckets: Histogram bucket upper bounds in seconds
+    :type buckets: Tuple[float, ...]
+    :param prefix: Prepended to metric names in the Prometheus export
+    :type prefix: str
+    """
+
+    def __init__(self,
+                 on_strike: Union[Callable, None] = None,
+                 on_sink: Union[Callable, None] = None,
+                 on_game_over: Union[Callable, None] = None,
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+                 prefix: str = 'battlestern') -> None:
+        self.prefix = prefix
+        self.counters: Dict[str, int] = dict.fromkeys(COUNTERS, 0)
+        self.histograms: Dict[str, Histogram] = {name: Histogram(buckets)
+                                                 for name in HISTOGRAMS}
+        self.hooks: Dict[str, List[Callable]] = {name: [] for name in HOOKS}
+        for name, callback in zip(HOOKS, (on_strike, on_sink, on_game_over)):
+            if callback is not None:
+                self.hooks[name].append(callback)
+
+    def add_hook(self, name: str, callback: Callable) -> None:
+        """
+        Adds a callback to one of on_strike, on_sink or on_game_over
+        """
+        if name not in self.hooks:
+            raise ValueError('Hooks are one of {}'.format(', '.join(HOOKS)))
+        self.hooks[name].append(callback)
+
+    def timed(self, name: str, method: Callable) -> Callable:
+        """
+        Wraps a bound method to observe its duration in a histogram
+        """
+        observe = self.histograms[name].observe
+        clock = time.perf_counter
+
+        @wraps(method)
+        def timed(*args, **kwargs):
+            started = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                observe(clock() - started)
+        return timed
+
+    def instrument_fleet_creation(self, game) -> None:
+        """
+        Times and counts the fleets a game creates, called before it creates any
+        """
+        create_fleet = self.timed('fleet_create', game.create_fleet)
+        counters = self.counters
+
+        @wraps(create_fleet)
+        def counted(*args, **kwargs):
+            counters['fleets'] += 1
+            return create_fleet(*args, **kwargs)
+        game.create_fleet = counted
+
+    def instrument(self, game) -> None:
+        """
+        Wraps the strikes of a game and of its players' fleets and boards
+        """
+        counters = self.counters
+        hooks = self.hooks
+        strike = self.timed('game_strike', game.strike)
+
+        @wraps(strike)
+        def hooked_strike(player, coord):
+            result, message = strike(player, coord)
+            for callback in hooks['on_strike']:
+                callback(game, player, coord, result)
+            return result, message
+        game.strike = hooked_strike
+
+        for player in (game.player1, game.player2):
+            board = player.board
+            board.mark_strike = self._counted_mark_strike(board)
+            fleet = player.opponent.fleet
+            fleet._strike = self.timed('fleet_strike', fleet._strike)
+            fleet._resolve_strike = self._counted_resolve_strike(game, player, fleet)
+
+    def _counted_mark_strike(self, board) -> Callable:
+        mark_strike = self.timed('board_mark_strike', board.mark_strike)
+        counters = self.counters
+
+        @wraps(mark_strike)
+        def counted(coord, result):
+            dejavu = mark_strike(coord, result)
+            if dejavu is not None:
+                counters['dejavu'] += 1
+            return dejavu
+        return counted
+
+    def _counted_resolve_strike(self, game, player, fleet) -> Callable:
+        """
+        Counts strikes, hits, misses, sinks and the end of the game as the striking
+        player's strikes resolve, whichever Game method they come through
+        """
+        resolve = fleet._resolve_strike
+        counters = self.counters
+        hooks = self.hooks
+
+        @wraps(resolve)
+        def counted(coordinates):
+            ship, sunk = resolve(coordinates)
+            counters['strikes'] += 1
+            counters['misses' if ship is None else 'hits'] += 1
+            if sunk:
+                counters['sinks'] += 1
+                for callback in hooks['on_sink']:
+                    callback(game, player, ship)
+                if fleet.all_sunk:
+                    counters['games_over'] += 1
+                    for callback in hooks['on_game_over']:
+                        callback(game, player)
+            return ship, sunk
+        return counted
+
+    def snapshot(self) -> Dict:
+        """
+        The current metrics as a JSON serialisable dict
+        """
+        return {'counters': dict(self.counters),
+                'histograms': {name: {'buckets': [[bound, count] for bound, count
+                                                  in histogram.cumulative()],
+                                      'sum': histogram.sum,
+                                      'count': histogram.count}
+                               for name, histogram in self.histograms.items()}}
+
+    def to_prometheus(self) -> str:
+        """
+        The current metrics in the Prometheus text exposition format
+        """
+        lines = []
+        for name, value in self.counters.items():
+            metric = '{}_{}_total'.format(self.prefix, name)
+            lines.append('# TYPE {} counter'.format(metric))
+            lines.append('{} {}'.format(metric, value))
+        for name, histogram in self.histograms.items():
+            metric = '{}_{}_seconds'.format(self.prefix, name)
+            lines.append('# TYPE {} histogram'.format(metric))
+            for bound, count in histogram.cumulative():
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append('{}_bucket{{le="{}"}} {}'.format(metric, le, count))
+            lines.append('{}_sum {!r}'.format(metric, histogram.sum))
+            lines.append('{}_count {}'.format(metric, histogram.count))
+        return '\n'.join(lines) + '\n'
+
+    def write(self, filename: str, format: str = 'prometheus') -> None:
+        """
+        Writes the current metrics to a local file, replacing it atomically
+        so a scraper never reads a partial file.
+
+        :param format: 'prometheus' or 'json'
+        :type format: str
+        """
+        if format == 'prometheus':
+            text = self.to_prometheus()
+        elif format == 'json':
+            text = json.dumps(self.snapshot())
+        else:
+            raise ValueError('format must be prometheus or json')
+        temporary = '{}.{}.tmp'.format(filename, os.getpid())
+        with open(temporary, 'w') as output:
+            output.write(text)
+        os.replace(temporary, filename)
+
+
+class Exporter(object):
+    """
+    Writes an Instrumentation's metrics to a file every interval seconds
+    from a daemon thread, e.g. for a node exporter's textfile collector.
+
+    :param instrumentation: The metrics to export
+    :type instrumentation: Instrumentation
+    :param filename: The file to write
+    :type filename: str
+    :param interval: Seconds between writes
+    :type interval: float
+    :param format: 'prometheus' or 'json'
+    :type format: str
+    """
+
+    def __init__(self,
+                 instrumentation: Instrumentation,
+                 filename: str,
+                 interval: float = 15.0,
+                 format: str = 'prometheus') -> None:
+        self.instrumentation = instrumentation
+        self.filename = filename
+        self.interval = interval
+        self.format = format
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the thread, writing the metrics one last time
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.instrumentation.write(self.filename, self.format)
+        self.instrumentation.write(self.filename, self.format)
+
+    def __enter__(self) -> 'Exporter':
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
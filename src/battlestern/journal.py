@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+An append-only journal of the moves in a game, for audits and fast replay.
+
+Every strike is a fixed width record, little-endian:
+the player number (B), the row-major cell index of the coordinate (I)
+and the result (B), MISS or HIT with the DEJAVU and SUNK flags.
+
+Records are appended to an in-memory bytearray, or to a memory-mapped file
+if the log is given a path. Checkpoints of the full game state
+(see battlestern.serialization) are taken every checkpoint_interval moves
+and kept alongside, in a `.checkpoints` file next to a file-backed log,
+so a long log can be resumed from the nearest checkpoint rather than move 0.
+
+e.g.
+game = Game()
+game.strike(game.player1, ('a', 1))
+...
+replayed = Game.replay(game.log)
+"""
+
+import mmap
+import os
+import struct
+from typing import Iterator, List, Tuple, Union
+
+from .exceptions import SerializationError
+from .geometry import Geometry, DEFAULT_GEOMETRY
+
+MISS = 0
+HIT = 1
+DEJAVU = 2
+SUNK = 4
+
+MAGIC = b'BSLG'
+VERSION = 1
+
+Move = Tuple[int, int, int]
+
+
+class MoveLog(object):
+    """
+    A journal of fixed width move records with periodic checkpoints.
+
+    :param path: A file to memory-map the log to, opened and appended to if it exists.
+        Defaults to None, an in-memory log.
+    :type path: str or None
+    :param geometry: The dimensions of the board, used to convert coordinates to cells
+    :type geometry: battlestern.geometry.Geometry
+    :param checkpoint_interval: Moves between checkpoints, 0 for only the initial one
+    :type checkpoint_interval: int
+    """
+
+    record = struct.Struct('<BIB')
+    # magic, version, record size, width, height, number of records
+    header = struct.Struct('<4sBBHHQ')
+    _checkpoint = struct.Struct('<QI')
+
+    def __init__(self,
+                 path: Union[str, None] = None,
+                 geometry: Geometry = None,
+                 checkpoint_interval: int = 1000) -> None:
+        self.geometry = geometry or DEFAULT_GEOMETRY
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoints: List[Tuple[int, bytes]] = []
+        self.path = path
+        self._count = 0
+        self._file = None
+        self._checkpointfile = None
+        if path is None:
+            self._buffer = bytearray()
+        else:
+            self._open(path)
+
+    def _open(self, filename: str) -> None:
+        exists = os.path.exists(filename) and os.path.getsize(filename) > 0
+        self._file = open(filename, 'r+b' if exists else 'w+b')
+        if not exists:
+            self._file.write(self.header.pack(MAGIC, VERSION, self.record.size,
+                                              self.geometry.width, self.geometry.height, 0))
+            self._file.write(bytes(self.record.size * 1024))
+            self._file.flush()
+        self._buffer = mmap.mmap(self._file.fileno(), 0)
+        magic, version, size, width, height, count = self.header.unpack_from(self._buffer, 0)
+        if magic != MAGIC or version != VERSION or size != self.record.size:
+            raise SerializationError('{} is not a version {} move log'.format(filename, VERSION))
+        if (width, height) != (self.geometry.width, self.geometry.height):
+            raise SerializationError('{} is a log of a {}x{} board'.format(filename, width, height))
+        self._count = count
+        checkpoints = filename + '.checkpoints'
+        if os.path.exists(checkpoints):
+            with open(checkpoints, 'rb') as stored:
+                data = stored.read()
+            offset = 0
+            while offset < len(data):
+                move, size = self._checkpoint.unpack_from(data, offset)
+                offset += self._checkpoint.size
+                self.checkpoints.append((move, data[offset:offset + size]))
+                offset += size
+        self._checkpointfile = open(checkpoints, 'ab')
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, player: int, cell: int, result: int) -> None:
+        """
+        Records a strike by player 1 or 2 at a cell, the row-major index of the coordinate
+        (see Geometry.index). See the module docstring for result.
+        """
+        if self._file is None:
+            self._buffer += self.record.pack(player, cell, result)
+            self._count += 1
+            return
+        offset = self.header.size + self._count * self.record.size
+        if offset + self.record.size > len(self._buffer):
+            # double the file so appends are amortised constant time
+            self._buffer.resize(2 * len(self._buffer))
+        self.record.pack_into(self._buffer, offset, player, cell, result)
+        self._count += 1
+        struct.pack_into('<Q', self._buffer, self.header.size - 8, self._count)
+
+    def records(self, start: int = 0, stop: Union[int, None] = None) -> Iterator[Move]:
+        """
+        The (player, cell, result) records of moves start up to but not including stop,
+        unpacked straight from the buffer.
+        The log can't be appended to while the iterator is still referenced.
+        """
+        stop = self._count if stop is None else min(stop, self._count)
+        if start >= stop:
+            return iter(())
+        base = 0 if self._file is None else self.header.size
+        view = memoryview(self._buffer)[base + start * self.record.size:
+                                        base + stop * self.record.size]
+        return self.record.iter_unpack(view)
+
+    def __iter__(self) -> Iterator[Move]:
+        return self.records()
+
+    def checkpoint_due(self) -> bool:
+        return bool(self.checkpoint_interval) and \
+            self._count % self.checkpoint_interval == 0 and \
+            (not self.checkpoints or self.checkpoints[-1][0] != self._count)
+
+    def checkpoint(self, data: bytes) -> None:
+        """
+        Stores an encoded game as the state after the moves logged so far
+        """
+        self.checkpoints.append((self._count, data))
+        if self._checkpointfile is not None:
+            self._checkpointfile.write(self._checkpoint.pack(self._count, len(data)))
+            self._checkpointfile.write(data)
+
+    def latest_checkpoint(self, move: Union[int, None] = None) -> Tuple[int, bytes]:
+        """
+        The last checkpoint at or before a move, defaults to the end of the log
+        """
+        move = self._count if move is None else move
+        for checkpoint in reversed(self.checkpoints):
+            if checkpoint[0] <= move:
+                return checkpoint
+        raise SerializationError('The log has no checkpoint at or before move {}'.format(move))
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._buffer.flush()
+            self._checkpointfile.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self.flush()
+            self._buffer.close()
+            self._file.close()
+            self._checkpointfile.close()
+            self._file = None
+
+    def __enter__(self) -> 'MoveLog':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Streaming fleetroster loading, for ingesting roster archives too big for memory.
+
+Rosters are read from NDJSON, one fleetroster object per line, e.g.
+{"carrier": {"col": "a", "row": 1, "orientation": "horizontal"}, ...}
+Blank lines are skipped.
+
+Lines are read in chunks which are parsed and validated together
+(see Fleet.validate_many) then yielded one roster at a time, either as Fleets
+or as compact encodings (see battlestern.serialization.encode_roster).
+With processes > 1 chunks are parsed and validated in a process pool while the
+file is still being read. At most `window` chunks are in flight at once,
+so memory stays bounded however big the file is, and rosters are yielded
+in the order of the file.
+
+e.g.
+for fleet in load_fleets('rosters.ndjson', processes=4):
+    ...
+
+Invalid rosters, unparseable lines, unknown ships or coordinates,
+overlapping or out of bounds ships, raise an error naming the line,
+or are skipped with invalid='skip'.
+"""
+
+import json
+from collections import deque
+from multiprocessing import Pool
+from typing import IO, Iterator, List, Tuple, Union
+
+from .exceptions import PlacementError, SerializationError
+from .geometry import Geometry, DEFAULT_GEOMETRY
+from .serialization import encode_roster, decode_roster
+from .ships import Fleet, BitFleet
+
+Source = Union[str, IO[bytes]]
+# (line number, encoded roster) for valid rosters, (line number, error) for invalid
+Chunk = Tuple[List[Tuple[int, bytes]], List[Tuple[int, Exception]]]
+
+
+def _read_chunks(source: Source, chunksize: int) -> Iterator[Tuple[int, List[bytes]]]:
+    """
+    The lines of a file in chunks, with the line number of the first line of each
+    """
+    if isinstance(source, str):
+        with open(source, 'rb') as lines:
+            yield from _read_chunks(lines, chunksize)
+        return
+    chunk = []
+    first = 1
+    for number, line in enumerate(source, 1):
+        if not chunk:
+            first = number
+        chunk.append(line)
+        if len(chunk) == chunksize:
+            yield first, chunk
+            chunk = []
+    if chunk:
+        yield first, chunk
+
+
+def _load_chunk(first: int, lines: List[bytes], geometry: Geometry) -> Chunk:
+    """
+    Parses, validates and encodes the rosters of a chunk of lines
+    """
+    numbers = []
+    rosters = []
+    errors = []
+    for number, line in enumerate(lines, first):
+        if not line.strip():
+            continue
+        try:
+            roster = json.loads(line)
+        except ValueError as error:
+            errors.append((number, SerializationError(
+                'line {} is not JSON, {}'.format(number, error))))
+            continue
+        if not (isinstance(roster, dict) and roster
+                and all(isinstance(specs, dict) for specs in roster.values())):
+            errors.append((number, SerializationError(
+                'line {} is not a fleetroster object'.format(number))))
+            continue
+        numbers.append(number)
+        rosters.append(roster)
+    try:
+        results = Fleet.validate_many(rosters, geometry)
+    except Exception:
+        # one roster can't be validated at all, find out which
+        results = []
+        for number, roster in zip(numbers, rosters):
+            try:
+                results.append(Fleet.validate_many([roster], geometry)[0])
+            except Exception as error:
+                results.append(error)
+    loaded = []
+    for number, roster, result in zip(numbers, rosters, results):
+        if isinstance(result, Exception):
+            errors.append((number, _invalid(number, '{}: {}'.format(
+                type(result).__name__, result))))
+            continue
+        duplicates, out_of_bounds = result
+        if duplicates or out_of_bounds:
+            errors.append((number, _invalid(number, 'overlapping {} out of bounds {}'.format(
+                sorted(duplicates), sorted(out_of_bounds)))))
+            continue
+        loaded.append((number, encode_roster(roster, geometry)))
+    errors.sort(key=lambda error: error[0])
+    return loaded, errors
+
+
+def _invalid(number: int, reason: str) -> PlacementError:
+    return PlacementError('line {} is an invalid fleetroster, {}'.format(number, reason))
+
+
+def _load_chunk_task(args: Tuple[int, List[bytes], Geometry]) -> Chunk:
+    return _load_chunk(*args)
+
+
+def load_encoded(source: Source,
+                 geometry: Geometry = None,
+                 processes: int = 1,
+                 chunksize: int = 1000,
+                 window: Union[int, None] = None,
+                 invalid: str = 'raise') -> Iterator[bytes]:
+    """
+    Streams the valid rosters of an NDJSON file as `encode_roster` encodings.
+
+    :param source: The path of an NDJSON file or a binary file object
+    :type source: str or a binary file
+    :param geometry: The dimensions of the board, defaults to the 10x10 grid
+    :type geometry: battlestern.geometry.Geometry
+    :param processes: Worker processes parsing and validating, 1 loads in this process
+    :type processes: int
+    :param chunksize: Lines parsed and validated together
+    :type chunksize: int
+    :param window: Chunks in flight at once, defaults to twice the processes
+    :type window: int or None
+    :param invalid: 'raise' to stop at the first invalid roster or 'skip' it
+    :type invalid: str
+
+    Raises SerializationError for a line that isn't a JSON object
+    and PlacementError for an invalid roster, when invalid='raise'.
+    """
+    for _, encoded in _load(source, geometry, processes, chunksize, window, invalid):
+        yield encoded
+
+
+def load_fleets(source: Source,
+                geometry: Geometry = None,
+                compact: bool = False,
+                processes: int = 1,
+                chunksize: int = 1000,
+                window: Union[int, None] = None,
+                invalid: str = 'raise') -> Iterator[Fleet]:
+    """
+    Streams the valid rosters of an NDJSON file as Fleets,
+    or BitFleets if compact, see `load_encoded` for the other parameters.
+    Fleets are built in this process from the encodings, only bytes are sent
+    back from the workers.
+    """
+    geometry = geometry or DEFAULT_GEOMETRY
+    fleet = BitFleet if compact else Fleet
+    for _, encoded in _load(source, geometry, processes, chunksize, window, invalid):
+        yield fleet(fleetroster=decode_roster(encoded, geometry), geometry=geometry)
+
+
+def _load(source: Source,
+          geometry: Union[Geometry, None],
+          processes: int,
+          chunksize: int,
+          window: Union[int, None],
+          invalid: str) -> Iterator[Tuple[int, bytes]]:
+    """
+    The (line number, encoded roster) of the valid rosters in a file, in order
+    """
+    if invalid not in ('raise', 'skip'):
+        raise ValueError("invalid must be 'raise' or 'skip'")
+    geometry = geometry or DEFAULT_GEOMETRY
+    chunks = ((first, lines, geometry) for first, lines in _read_chunks(source, chunksize))
+    if processes == 1:
+        results = map(_load_chunk_task, chunks)
+        for loaded, errors in results:
+            yield from _checked(loaded, errors, invalid)
+        return
+    window = window or 2 * processes
+    with Pool(processes) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(_load_chunk_task, (chunk,)))
+            if len(pending) >= window:
+                yield from _checked(*pending.popleft().get(), invalid)
+        while pending:
+            yield from _checked(*pending.popleft().get(), invalid)
+
+
+def _checked(loaded: List[Tuple[int, bytes]],
+             errors: List[Tuple[int, Exception]],
+             invalid: str) -> Iterator[Tuple[int, bytes]]:
+    """
+    The loaded rosters of a chunk, raising at the first error if invalid='raise'
+    after yielding the rosters on the lines before it
+    """
+    if invalid == 'skip' or not errors:
+        yield from loaded
+        return
+    number, error = errors[0]
+    for roster in loaded:
+        if roster[0] > number:
+            break
+        yield roster
+    raise error
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Random ship placement that only ever produces legal fleetrosters.
+
+Every placement of a ship is a slot, a bow coordinate and an orientation
+that keeps the whole ship on the grid. Slots are numbered so one can be
+sampled uniformly without listing them, then checked against the coordinates
+already occupied by the ships placed before it.
+On a crowded board where sampling keeps colliding, the legal slots are listed
+and one is chosen from those, so a placement is never rejected after the fact.
+
+The slots of a ship length on a board never change, so they are listed once
+in a PlacementTable with the cells, coordinates and bitmask of each.
+Tables are built on first use and cached by (geometry, length), fleet expansion,
+random placement, validation and the density strategy all read from them.
+"""
+
+import random
+from functools import lru_cache
+from typing import Dict, Iterator, List, Mapping, Set, Tuple, Union
+
+from .exceptions import PlacementError
+from .geometry import Geometry, DEFAULT_GEOMETRY
+
+Slot = Tuple[int, str]
+
+#: Boards larger than this have too many slots to list, placements are computed as needed.
+#: A table holds about 2 * area slots, each with an area-bit mask and cell and coordinate
+#: tuples, around 1.3 MiB for one ship length on a 32x32 board and growing with the square
+#: of the area, so this bounds a table to a few MiB and a build to around a tenth of a second.
+MAX_TABLE_AREA: int = 1024
+
+#: Tables kept by `placement_table`, enough for every ship length on a few geometries,
+#: so at most a few tens of MiB even when every table is at MAX_TABLE_AREA
+TABLE_CACHE_SIZE: int = 20
+
+
+class PlacementTable(object):
+    """
+    Every slot of a ship of one length on one board, numbered as PlacementEngine numbers
+    them, horizontal first then vertical, both in row-major order.
+    Use `placement_table` rather than building one, so tables are shared.
+
+    slots    (bow index, orientation) of each slot
+    cells    the row-major indexes a ship covers in each slot
+    coords   the (col, row) coordinates a ship covers in each slot
+    masks    the cells of each slot as an int bitmask
+    numbers  the slot number of each (bow index, orientation)
+
+    :param geometry: The dimensions of the board
+    :type geometry: battlestern.geometry.Geometry
+    :param length: The length of the ship
+    :type length: int
+    """
+
+    __slots__ = ('geometry', 'length', 'horizontal', 'vertical',
+                 'slots', 'cells', 'coords', 'masks', 'numbers')
+
+    def __init__(self, geometry: Geometry, length: int) -> None:
+        self.geometry = geometry
+        self.length = length
+        width, height = geometry.width, geometry.height
+        self.horizontal = max(0, width - length + 1) * height
+        self.vertical = width * max(0, height - length + 1)
+        self.slots: List[Slot] = []
+        self.cells: List[Tuple[int, ...]] = []
+        for row in range(height):
+            for col in range(width - length + 1):
+                bow = row * width + col
+                self.slots.append((bow, 'horizontal'))
+                self.cells.append(tuple(range(bow, bow + length)))
+        for bow in range(self.vertical):
+            self.slots.append((bow, 'vertical'))
+            self.cells.append(tuple(range(bow, bow + width * length, width)))
+        coord = geometry.coord
+        self.coords: List[Tuple[Tuple[str, int], ...]] = [
+            tuple(coord(cell) for cell in cells) for cells in self.cells]
+        self.masks: List[int] = [sum(1 << cell for cell in cells) for cells in self.cells]
+        self.numbers: Dict[Slot, int] = {slot: number for number, slot in enumerate(self.slots)}
+
+
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def placement_table(geometry: Geometry, length: int) -> Union[PlacementTable, None]:
+    """
+    The cached PlacementTable of a ship length on a board,
+    or None for boards over MAX_TABLE_AREA cells
+    """
+    if geometry.area > MAX_TABLE_AREA:
+        return None
+    return PlacementTable(geometry, length)
+
+
+class PlacementEngine(object):
+    """
+    Generates random fleetrosters with no overlapping or out of bounds ships.
+
+    :param geometry: The dimensions of the board, defaults to the 10x10 grid
+    :type geometry: battlestern.geometry.Geometry
+    :param seed: A seed for reproducible placements, or a random.Random instance to share
+    :type seed: int, random.Random or None
+    """
+
+    orientations = ['horizontal', 'vertical']
+    #: Collisions tolerated when sampling a slot before listing the legal ones
+    attempts: int = 16
+    #: Times a whole fleetroster is restarted when a ship has no legal slot left
+    restarts: int = 100
+
+    def __init__(self,
+                 geometry: Geometry = None,
+                 seed: Union[int, random.Random, None] = None) -> None:
+        self.geometry = geometry or DEFAULT_GEOMETRY
+        if isinstance(seed, random.Random):
+            self.random = seed
+        else:
+            self.random = random.Random(seed)
+        self._tables: Dict[int, Union[PlacementTable, None]] = {}
+
+    def _table(self, length: int) -> Union[PlacementTable, None]:
+        table = self._tables.get(length, False)
+        if table is False:
+            table = self._tables[length] = placement_table(self.geometry, length)
+        return table
+
+    def _slot_counts(self, length: int) -> Tuple[int, int]:
+        """
+        The number of horizontal and vertical slots for a ship of this length
+        """
+        width, height = self.geometry.width, self.geometry.height
+        horizontal = max(0, width - length + 1) * height
+        vertical = width * max(0, height - length + 1)
+        return horizontal, vertical
+
+    def _slot(self, length: int, number: int) -> Slot:
+        """
+        The bow index and orientation of a numbered slot,
+        horizontal slots are numbered first then vertical, both in row-major order.
+        """
+        width = self.geometry.width
+        horizontal, _ = self._slot_counts(length)
+        if number < horizontal:
+            row, col = divmod(number, width - length + 1)
+            return row * width + col, 'horizontal'
+        return number - horizontal, 'vertical'
+
+    def cells(self, length: int, slot: Slot) -> range:
+        """
+        The row-major indexes of the coordinates a ship covers in a slot
+        """
+        bow, orientation = slot
+        step = 1 if orientation == 'horizontal' else self.geometry.width
+        return range(bow, bow + step * length, step)
+
+    def slots(self, length: int) -> Iterator[Slot]:
+        """
+        Every slot for a ship of this length, horizontal first then vertical
+        """
+        horizontal, vertical = self._slot_counts(length)
+        for number in range(horizontal + vertical):
+            yield self._slot(length, number)
+
+    def _legal(self, length: int, occupied: Set[int]) -> List[Slot]:
+        """
+        Lists every slot for a ship that is clear of the occupied coordinates
+        """
+        table = self._table(length)
+        if table is None:
+            return [slot for slot in self.slots(length)
+                    if occupied.isdisjoint(self.cells(length, slot))]
+        mask = sum(1 << cell for cell in occupied)
+        return [slot for slot, cells in zip(table.slots, table.masks) if not mask & cells]
+
+    def _place(self, length: int, occupied: Set[int]) -> Union[Slot, None]:
+        """
+        Picks a random slot clear of the occupied coordinates,
+        or None if the ship doesn't fit anywhere.
+        """
+        table = self._table(length)
+        if table is None:
+            horizontal, vertical = self._slot_counts(length)
+        else:
+            horizontal, vertical = table.horizontal, table.vertical
+        total = horizontal + vertical
+        if not total:
+            return None
+        for _ in range(self.attempts):
+            number = self.random.randrange(total)
+            if table is None:
+                slot = self._slot(length, number)
+                cells = self.cells(length, slot)
+            else:
+                slot, cells = table.slots[number], table.cells[number]
+            if occupied.isdisjoint(cells):
+                return slot
+        legal = self._legal(length, occupied)
+        if not legal:
+            return None
+        return self.random.choice(legal)
+
+    def roster(self, ships: Mapping[str, int]) -> Dict[str, Dict[str, Union[str, int]]]:
+        """
+        A random legal fleetroster.
+
+        :param ships: Ship names mapped to their lengths
+        :type ships: dict e.g. {'carrier': 5, 'patrol': 1}
+
+        Returns a fleetroster in the same format accepted by Fleet, with ships
+        in the order given. The longest ships are placed first as they have the fewest slots.
+        Raises PlacementError if the ships can't all fit on the board.
+        """
+        order = sorted(ships, key=ships.get, reverse=True)
+        for _ in range(self.restarts):
+            occupied: Set[int] = set()
+            slots: Dict[str, Slot] = {}
+            for name in order:
+                slot = self._place(ships[name], occupied)
+                if slot is None:
+                    break
+                slots[name] = slot
+                table = self._table(ships[name])
+                if table is None:
+                    occupied.update(self.cells(ships[name], slot))
+                else:
+                    occupied.update(table.cells[table.numbers[slot]])
+            else:
+                fleetroster = {}
+                for name in ships:
+                    bow, orientation = slots[name]
+                    col, row = self.geometry.coord(bow)
+                    fleetroster[name] = {'col': col, 'row': row,
+                                         'orientation': orientation}
+                return fleetroster
+        raise PlacementError(
+            'Could not place {} on {}'.format(', '.join(ships), self.geometry))
+
+    def rosters(self,
+                ships: Mapping[str, int],
+                n: int) -> Iterator[Dict[str, Dict[str, Union[str, int]]]]:
+        """
+        Generates n random legal fleetrosters, see `roster`
+        """
+        for _ in range(n):
+            yield self.roster(ships)
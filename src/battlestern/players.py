@@ -1,10 +1,6 @@
 #!/usr/bin/env python3
 
-import sys
-from os import path
-sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
-
-from battlestern.exceptions import PlayerSetupError
+from .exceptions import PlayerSetupError
 
 class Player(object):
     """
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+A compact, versioned binary encoding of a Game, so idle games can be parked
+out of memory and picked up again on any node.
+
+All integers are little-endian. A version 1 game is laid out as:
+
+header    b'BS', version (B), flags (B) bit 0 set for a compact game,
+          width (H), height (H), the number of the player to move next (B)
+names     for each player, the utf-8 length (B) then the name
+fleets    for each player, the number of ships (B) then for each ship
+          its position in Fleet.shipyard with bit 7 set if vertical (B),
+          the row-major index of its bow (H, or I on boards over 65536 cells)
+          and a bitmask of its damaged coordinates, bow first, one byte per 8 cells
+boards    for each player, an encoding byte then either
+          0: the hits and misses as two bitmasks of the whole board, one bit per cell
+          1: the number of hits (I), their cells, the number of misses (I), their cells
+          whichever is smaller
+
+A classic game with default names is around 100 bytes, and less early on
+while the boards are sparse. Decoding reads straight out of the buffer
+through a memoryview, nothing is copied but the names.
+"""
+
+import struct
+from typing import Dict, List, Mapping, Tuple, Union
+
+from .exceptions import (BoardError, CoordinateError, OrientationError,
+                         PlayerSetupError, SerializationError)
+from .geometry import Geometry, DEFAULT_GEOMETRY
+from .journal import MoveLog
+from .ships import Fleet
+
+MAGIC = b'BS'
+VERSION = 1
+COMPACT = 0x01
+VERTICAL = 0x80
+BITMASKS = 0
+CELLS = 1
+
+_header = struct.Struct('<2sBBHHB')
+_count = struct.Struct('<I')
+_shipyard: List[str] = list(Fleet.shipyard)
+# what reading past the end or a corrupt field raises, reported as a SerializationError
+_corrupt = (IndexError, KeyError, ValueError, struct.error,
+            BoardError, CoordinateError, OrientationError, PlayerSetupError)
+
+
+def _cell_format(geometry: Geometry) -> struct.Struct:
+    return struct.Struct('<H' if geometry.area <= 0x10000 else '<I')
+
+
+def encode_roster(fleetroster: Mapping[str, Mapping[str, Union[str, int]]],
+                  geometry: Geometry = None) -> bytes:
+    """
+    Encodes a fleetroster as in the fleets section, without damage
+
+    :param fleetroster: A set of ships and positional properties, as accepted by Fleet
+    :type fleetroster: A dictionary (JSON-like)
+    :param geometry: The dimensions of the board, defaults to the 10x10 grid
+    :type geometry: battlestern.geometry.Geometry
+    """
+    geometry = geometry or DEFAULT_GEOMETRY
+    cell = _cell_format(geometry)
+    parts = [bytes([len(fleetroster)])]
+    for name, specs in fleetroster.items():
+        kind = _shipyard.index(name.lower())
+        if specs['orientation'] == 'vertical':
+            kind |= VERTICAL
+        parts.append(bytes([kind]))
+        parts.append(cell.pack(geometry.index((specs['col'], specs['row']))))
+    return b''.join(parts)
+
+
+def _decode_ships(buffer: memoryview,
+                  offset: int,
+                  geometry: Geometry,
+                  damage: bool) -> Tuple[Dict, Dict[str, int], int]:
+    """
+    Reads a fleet section, returning the fleetroster, each ship's damage bitmask
+    and the offset following the fleet.
+    """
+    cell = _cell_format(geometry)
+    fleetroster = {}
+    damaged = {}
+    count = buffer[offset]
+    offset += 1
+    for _ in range(count):
+        kind = buffer[offset]
+        name = _shipyard[kind & ~VERTICAL]
+        (bow,) = cell.unpack_from(buffer, offset + 1)
+        offset += 1 + cell.size
+        col, row = geometry.coord(bow)
+        fleetroster[name] = {'col': col, 'row': row,
+                             'orientation': 'vertical' if kind & VERTICAL else 'horizontal'}
+        if damage:
+            width = (Fleet.shipyard[name].length + 7) // 8
+            damaged[name] = int.from_bytes(buffer[offset:offset + width], 'little')
+            offset += width
+    return fleetroster, damaged, offset
+
+
+def decode_roster(data: Union[bytes, bytearray, memoryview],
+                  geometry: Geometry = None) -> Dict[str, Dict[str, Union[str, int]]]:
+    """
+    Decodes a fleetroster written by `encode_roster`
+    """
+    fleetroster, _, _ = _decode_ships(memoryview(data), 0, geometry or DEFAULT_GEOMETRY, False)
+    return fleetroster
+
+
+def _encode_fleet(fleet: Fleet) -> bytes:
+    cell = _cell_format(fleet.geometry)
+    armada = fleet.armada
+    parts = [bytes([len(fleet._fleet)])]
+    for ship in fleet._fleet:
+        kind = _shipyard.index(ship.name)
+        if ship.orientation == 'vertical':
+            kind |= VERTICAL
+        parts.append(bytes([kind]))
+        parts.append(cell.pack(fleet.geometry.index(ship.bow_coordinate)))
+        damaged = 0
+        for position, status in enumerate(armada[ship.name].values()):
+            if status == 'damaged':
+                damaged |= 1 << position
+        parts.append(damaged.to_bytes((ship.length + 7) // 8, 'little'))
+    return b''.join(parts)
+
+
+def _encode_board(board) -> bytes:
+    geometry = board.geometry
+    if hasattr(board, 'snapshot'):
+        hits, misses = board.snapshot()
+        hitcells = misscells = None
+    else:
+        hitcells = [geometry.index(coord) for coord, result in board.coords.items()
+                    if result == 'hit']
+        misscells = [geometry.index(coord) for coord, result in board.coords.items()
+                     if result == 'miss']
+        hits = misses = None
+    cell = _cell_format(geometry)
+    masksize = (geometry.area + 7) // 8
+    if hitcells is None:
+        shots = bin(hits).count('1') + bin(misses).count('1')
+    else:
+        shots = len(hitcells) + len(misscells)
+    if 2 * masksize <= 2 * _count.size + shots * cell.size:
+        if hits is None:
+            hits = sum(1 << index for index in hitcells)
+            misses = sum(1 << index for index in misscells)
+        return (bytes([BITMASKS])
+                + hits.to_bytes(masksize, 'little')
+                + misses.to_bytes(masksize, 'little'))
+    if hitcells is None:
+        hitcells = [index for index in range(geometry.area) if hits >> index & 1]
+        misscells = [index for index in range(geometry.area) if misses >> index & 1]
+    parts = [bytes([CELLS])]
+    for cells in (hitcells, misscells):
+        parts.append(_count.pack(len(cells)))
+        parts.extend(cell.pack(index) for index in cells)
+    return b''.join(parts)
+
+
+def _decode_board(board, buffer: memoryview, offset: int) -> int:
+    """
+    Marks a board from a boards section, returning the offset following it
+    """
+    geometry = board.geometry
+    encoding = buffer[offset]
+    offset += 1
+    if encoding == BITMASKS:
+        masksize = (geometry.area + 7) // 8
+        hits = int.from_bytes(buffer[offset:offset + masksize], 'little')
+        misses = int.from_bytes(buffer[offset + masksize:offset + 2 * masksize], 'little')
+        offset += 2 * masksize
+        if hasattr(board, 'restore'):
+            board.restore((hits, misses))
+            return offset
+        for mask, result in ((hits, 'hit'), (misses, 'miss')):
+            while mask:
+                bit = mask & -mask
+                board.mark_strike(geometry.coord(bit.bit_length() - 1), result)
+                mask ^= bit
+        return offset
+    if encoding != CELLS:
+        raise SerializationError('Unknown board encoding {}'.format(encoding))
+    cell = _cell_format(geometry)
+    for result in ('hit', 'miss'):
+        (count,) = _count.unpack_from(buffer, offset)
+        offset += _count.size
+        for (index,) in cell.iter_unpack(buffer[offset:offset + count * cell.size]):
+            board.mark_strike(geometry.coord(index), result)
+        offset += count * cell.size
+    return offset
+
+
+def encode_game(game) -> bytes:
+    """
+    Encodes the full state of a game, see the module docstring for the layout.
+
+    :param game: The game to encode
+    :type game: battlestern.games.Game
+    """
+    geometry = game.geometry
+    if geometry.width > 0xffff or geometry.height > 0xffff:
+        raise SerializationError('Boards over 65535 cells wide or high can not be encoded')
+    players = (game.player1, game.player2)
+    parts = [_header.pack(MAGIC, VERSION, COMPACT if game._compact else 0,
+                          geometry.width, geometry.height, game.turn)]
+    for player in players:
+        name = player.name.encode('utf-8')
+        if len(name) > 0xff:
+            raise SerializationError('Player names are limited to 255 bytes')
+        parts.append(bytes([len(name)]))
+        parts.append(name)
+    for player in players:
+        parts.append(_encode_fleet(player.fleet))
+    for player in players:
+        parts.append(_encode_board(player.board))
+    return b''.join(parts)
+
+
+def _decode_header(buffer: memoryview) -> Tuple[int, Geometry, int, List[str], int]:
+    """
+    Reads the header and names of an encoded game, returning the flags, geometry,
+    turn, names and the offset of the fleets
+    """
+    try:
+        magic, version, flags, width, height, turn = _header.unpack_from(buffer, 0)
+    except struct.error:
+        raise SerializationError('Not an encoded game, too short')
+    if magic != MAGIC:
+        raise SerializationError('Not an encoded game')
+    if version != VERSION:
+        raise SerializationError('Unsupported encoding version {}'.format(version))
+    if (width, height) == (DEFAULT_GEOMETRY.width, DEFAULT_GEOMETRY.height):
+        geometry = DEFAULT_GEOMETRY
+    else:
+        try:
+            geometry = Geometry(width, height)
+        except BoardError as e:
+            raise SerializationError('Not an encoded game: {}'.format(e))
+    offset = _header.size
+    names = []
+    try:
+        for _ in range(2):
+            size = buffer[offset]
+            if offset + 1 + size > len(buffer):
+                raise IndexError('name runs past the end')
+            names.append(str(buffer[offset + 1:offset + 1 + size], 'utf-8'))
+            offset += 1 + size
+    except _corrupt as e:
+        raise SerializationError('Truncated or corrupt encoded game: {}'.format(e))
+    return flags, geometry, turn, names, offset
+
+
+def decode_rosters(data: Union[bytes, bytearray, memoryview]) -> \
+        Tuple[Geometry, Tuple[Dict, Dict]]:
+    """
+    The geometry and the fleetrosters of player 1 and 2 of an encoded game,
+    without building the game, e.g. to analyse the starting checkpoints of move logs
+    """
+    buffer = memoryview(data)
+    _, geometry, _, _, offset = _decode_header(buffer)
+    rosters = []
+    try:
+        for _ in range(2):
+            fleetroster, _, offset = _decode_ships(buffer, offset, geometry, True)
+            rosters.append(fleetroster)
+    except _corrupt as e:
+        raise SerializationError('Truncated or corrupt encoded game: {}'.format(e))
+    return geometry, tuple(rosters)
+
+
+def decode_game(cls, data: Union[bytes, bytearray, memoryview]):
+    """
+    Rebuilds a game encoded by `encode_game`
+
+    :param cls: The class of game to build
+    :type cls: battlestern.games.Game or a subclass
+    :param data: An encoded game
+    :type data: bytes-like
+    """
+    buffer = memoryview(data)
+    flags, geometry, turn, names, offset = _decode_header(buffer)
+    try:
+        game, offset = _decode_state(cls, buffer, offset, flags, geometry, turn, names)
+    except _corrupt as e:
+        raise SerializationError('Truncated or corrupt encoded game: {}'.format(e))
+    if offset > len(buffer):
+        raise SerializationError('Truncated encoded game')
+    # the decoded game's journal starts from the state it was decoded in
+    game.log = MoveLog(geometry=geometry)
+    game.log.checkpoint(bytes(buffer[:offset]))
+    return game
+
+
+def _decode_state(cls, buffer, offset, flags, geometry, turn, names):
+    """
+    Builds the game from the fleets and boards sections, returning it and the offset
+    following the boards
+    """
+    rosters = []
+    damage = []
+    for _ in range(2):
+        fleetroster, damaged, offset = _decode_ships(buffer, offset, geometry, True)
+        rosters.append(fleetroster)
+        damage.append(damaged)
+
+    game = cls(player1name=names[0], player2name=names[1],
+               player1fleet=rosters[0], player2fleet=rosters[1],
+               compact=bool(flags & COMPACT), geometry=geometry, log=False)
+    game.player1.name, game.player2.name = names
+    game._turn = turn
+    for player, damaged in zip((game.player1, game.player2), damage):
+        fleet = player.fleet
+        for ship in fleet._fleet:
+            mask = damaged.get(ship.name, 0)
+            if not mask:
+                continue
+            for position, coord in enumerate(fleet._expand_fleet([ship])[ship.name]):
+                if mask >> position & 1:
+                    fleet._resolve_strike(coord)
+    for player in (game.player1, game.player2):
+        offset = _decode_board(player.board, buffer, offset)
+        fleet = player.opponent.fleet
+        for ship in fleet._fleet:
+            if fleet.is_sunk(ship.name):
+                player.board.mark_sunk(fleet.ship_coordinates(ship.name))
+    return game, offset
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+An asyncio game server hosting many concurrent Games in one event loop.
+
+Each game is a session with its own asyncio.Lock, so the two players' strikes
+can't interleave and a strike out of turn is rejected with a TurnError.
+Strikes are plain function calls on the Game, well under a millisecond,
+so they run on the event loop without an executor.
+
+Backpressure: at most max_pending strikes are admitted at once, callers beyond
+that wait for a slot rather than queueing without bound.
+Idle games are evicted by a background task. With park=True an evicted game is
+kept as its compact encoding (see battlestern.serialization), around 100 bytes,
+and rehydrated transparently on its next request.
+
+LocalClient is an in-process client for tests and embedding, no network involved.
+
+e.g.
+async with GameServer() as server:
+    game_id = server.create_game()
+    bob, alice = LocalClient(server, game_id, 1), LocalClient(server, game_id, 2)
+    result, message = await bob.strike(('a', 1))
+"""
+
+import asyncio
+import time
+import uuid
+from typing import Dict, Tuple, Union
+
+from .exceptions import SessionError, TurnError
+from .games import Game
+
+
+class Session(object):
+    """
+    A hosted game, its lock and when it was last used (time.monotonic)
+    """
+    __slots__ = ('game', 'lock', 'last_used')
+
+    def __init__(self, game: Game) -> None:
+        self.game = game
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+
+class GameServer(object):
+    """
+    Hosts Games by id.
+
+    :param idle_timeout: Seconds without a request before a game is evicted, None to never evict
+    :type idle_timeout: float or None
+    :param park: Keep evicted games as bytes so they can be resumed, otherwise they are dropped
+    :type park: bool
+    :param max_pending: Strikes admitted at once before callers have to wait
+    :type max_pending: int
+    :param game_options: Default keyword arguments for new Games, e.g. compact=True
+    """
+
+    def __init__(self,
+                 idle_timeout: Union[float, None] = 300.0,
+                 park: bool = True,
+                 max_pending: int = 10000,
+                 **game_options) -> None:
+        self.idle_timeout = idle_timeout
+        self.park = park
+        self.max_pending = max_pending
+        self.game_options = game_options
+        self._sessions: Dict[str, Session] = {}
+        self._parked: Dict[str, bytes] = {}
+        self._pending = asyncio.Semaphore(max_pending)
+        self._evictor = None
+
+    async def start(self) -> None:
+        if self.idle_timeout is not None:
+            self._evictor = asyncio.ensure_future(self._evict_forever())
+
+    async def stop(self) -> None:
+        if self._evictor is not None:
+            self._evictor.cancel()
+            try:
+                await self._evictor
+            except asyncio.CancelledError:
+                pass
+            self._evictor = None
+
+    async def __aenter__(self) -> 'GameServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    def __len__(self) -> int:
+        """
+        The number of games in memory, not counting parked games
+        """
+        return len(self._sessions)
+
+    @property
+    def parked(self) -> int:
+        return len(self._parked)
+
+    def create_game(self, **options) -> str:
+        """
+        Starts a new game, options are passed to Game over the server's defaults.
+        Returns the game id.
+        """
+        game_id = uuid.uuid4().hex
+        self._sessions[game_id] = Session(Game(**dict(self.game_options, **options)))
+        return game_id
+
+    def end_game(self, game_id: str) -> None:
+        self._sessions.pop(game_id, None)
+        self._parked.pop(game_id, None)
+
+    def _session(self, game_id: str) -> Session:
+        session = self._sessions.get(game_id)
+        if session is None:
+            data = self._parked.pop(game_id, None)
+            if data is None:
+                raise SessionError('No game {}'.format(game_id))
+            session = self._sessions[game_id] = Session(Game.from_bytes(data))
+        session.last_used = time.monotonic()
+        return session
+
+    def game(self, game_id: str) -> Game:
+        """
+        The Game of a session, rehydrated if it was parked.
+        For reading, strikes should go through `strike`.
+        """
+        return self._session(game_id).game
+
+    async def strike(self,
+                     game_id: str,
+                     player: int,
+                     coord: Tuple[str, int]) -> Tuple[str, str]:
+        """
+        A strike by player 1 or 2 in a game, as Game.strike.
+
+        Raises TurnError if it isn't the player's turn or the game is over,
+        SessionError if there's no such game.
+        """
+        async with self._pending:
+            session = self._session(game_id)
+            async with session.lock:
+                game = session.game
+                striker = game.player1 if player == 1 else game.player2
+                game._check_turn(striker)
+                return game.strike(striker, coord)
+
+    async def winner(self, game_id: str) -> Union[int, None]:
+        """
+        The number of the player who sank the other's fleet, or None while it's in play
+        """
+        game = self._session(game_id).game
+        if game.player2.fleet.all_sunk:
+            return 1
+        if game.player1.fleet.all_sunk:
+            return 2
+        return None
+
+    def evict_idle(self, now: Union[float, None] = None) -> int:
+        """
+        Evicts games idle for longer than idle_timeout, parking them if park is set.
+        Games with a strike in progress are left alone. Returns the number evicted.
+        """
+        if self.idle_timeout is None:
+            return 0
+        deadline = (time.monotonic() if now is None else now) - self.idle_timeout
+        idle = [game_id for game_id, session in self._sessions.items()
+                if session.last_used < deadline and not session.lock.locked()]
+        for game_id in idle:
+            session = self._sessions.pop(game_id)
+            if self.park:
+                self._parked[game_id] = session.game.to_bytes()
+        return len(idle)
+
+    async def _evict_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.idle_timeout / 2)
+            self.evict_idle()
+
+
+class LocalClient(object):
+    """
+    An in-process client playing one side of a game on a GameServer
+
+    :param server: The server hosting the game
+    :type server: GameServer
+    :param game_id: The game's id from GameServer.create_game
+    :type game_id: str
+    :param player: The player number, 1 or 2
+    :type player: int
+    """
+
+    def __init__(self, server: GameServer, game_id: str, player: int) -> None:
+        self.server = server
+        self.game_id = game_id
+        self.player = player
+
+    async def strike(self, coord: Tuple[str, int]) -> Tuple[str, str]:
+        return await self.server.strike(self.game_id, self.player, coord)
+
+    async def board(self) -> Dict[Tuple[str, int], str]:
+        """
+        A copy of this player's tracking board
+        """
+        game = self.server.game(self.game_id)
+        player = game.player1 if self.player == 1 else game.player2
+        return dict(player.board.coords)
+
+    async def winner(self) -> Union[int, None]:
+        return await self.server.winner(self.game_id)
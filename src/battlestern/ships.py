@@ -1,17 +1,12 @@
 #!/usr/bin/env python3
 
-from typing import Set, Tuple, Dict, List, Union, Mapping
-from pprint import pprint
+from typing import Set, Tuple, Dict, Iterable, Iterator, List, Union, Mapping
 import random
-import sys
-from os import path
-sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
 
-from battlestern.coordinates import Coordinate
-from battlestern.exceptions import OrientationError, CoordinateError
-
-    This, along with the orientation and the length of a ship
-    uniquely define its placement on the board
+from .coordinates import Coordinate
+from .exceptions import OrientationError, CoordinateError
+from .geometry import Geometry, DEFAULT_GEOMETRY
+from .placement import PlacementEngine, placement_table
 
 
 class Ship(object):
@@ -35,6 +30,14 @@ class Ship(object):
                  bow_coordinate: Mapping[str, Union[str, int]] ,
                  **kwargs) -> None:
         self.length = length
+        self.place(orientation, bow_coordinate)
+
+    def place(self,
+              orientation: str,
+              bow_coordinate: Coordinate) -> None:
+        """
+        Positions the ship, when it is built or moved for a new game
+        """
         if orientation in self.orientations:
             self.orientation = orientation
         else:
@@ -62,9 +65,11 @@ class Carrier(Ship):
     :type bow_coordinate: An instance of battlestern.coordinates.Coordinate
         or a Mapping/dict-like object with `col` and `row` keys.
     """
+    length = 5
+
     def __init__(self, **kwargs):
-        super().__init__(length=5, **kwargs)
-        self.name = 'carrienr'
+        super().__init__(length=self.length, **kwargs)
+        self.name = 'carrier'
 
 class Battleship(Ship):
     """
@@ -77,8 +82,10 @@ class Battleship(Ship):
     :type bow_coordinate: An instance of battlestern.coordinates.Coordinate
         or a Mapping/dict-like object with `col` and `row` keys.
     """
+    length = 4
+
     def __init__(self, **kwargs):
-        super().__init__(length = 4, **kwargs)
+        super().__init__(length=self.length, **kwargs)
         self.name = 'battleship'
 
 class Submarine(Ship):
@@ -92,8 +99,10 @@ class Submarine(Ship):
     :type bow_coordinate: An instance of battlestern.coordinates.Coordinate
         or a Mapping/dict-like object with `col` and `row` keys.    
     """
+    length = 3
+
     def __init__(self, **kwargs):
-        super().__init__(length = 3, **kwargs)
+        super().__init__(length=self.length, **kwargs)
         self.name = 'submarine'
 
 class Cruiser(Ship):
@@ -107,8 +116,10 @@ class Cruiser(Ship):
     :type bow_coordinate: An instance of battlestern.coordinates.Coordinate
         or a Mapping/dict-like object with `col` and `row` keys.    
     """
+    length = 2
+
     def __init__(self, **kwargs):
-        super().__init__(length = 2, **kwargs)
+        super().__init__(length=self.length, **kwargs)
         self.name = 'cruiser'
 
 class Patrol(Ship):
@@ -124,8 +135,10 @@ class Patrol(Ship):
     :type bow_coordinate: An instance of battlestern.coordinates.Coordinate
         or a Mapping/dict-like object with `col` and `row` keys.    
     """
+    length = 1
+
     def __init__(self, **kwargs):
-        super().__init__(length = 1, **kwargs)
+        super().__init__(length=self.length, **kwargs)
         self.name = 'patrol'
 
 class Fleet(object):
@@ -143,6 +156,11 @@ class Fleet(object):
         col must a letter a through f
         row must be an integer 1 through 10
         orientation must be one of horizontal|vertical
+    :param geometry: The dimensions of the board the fleet is placed on,
+        defaults to the 10x10 grid
+    :type geometry: battlestern.geometry.Geometry
+    :param seed: Seeds the random fleetroster when none is given, for reproducible fleets
+    :type seed: int, random.Random or None
     """
 
     shipyard: Dict[str, Ship] = {
@@ -152,20 +170,36 @@ class Fleet(object):
                 "cruiser": Cruiser, 
                 "patrol": Patrol }
 
+    hitmessages: List[str] = [
+                "It's just a flesh wound!",
+                "'tis but a scratch",
+                "had worse",
+                "Right, I’ll do you for that",
+                "I'm invincible!",
+                "All right, we'll call it a draw.",
+                "Come back here and take what's coming to ya!",
+                "I'll bite your legs off!"
+                ]
+
     def __init__(self,
-                 fleetroster: Mapping[str, Mapping[str, Union[str, int]]]) -> None:
+                 fleetroster: Mapping[str, Mapping[str, Union[str, int]]],
+                 geometry: Geometry = None,
+                 seed: Union[int, random.Random, None] = None) -> None:
         """
         Take a fleetroster or generate a random one, then create an armada.
         A fleetroster is effectively a JSON recipe for constructing an armada of ship objects,
         which have all their coordinates listed in full, and a way to track hits.
         """
+        self.geometry = geometry or DEFAULT_GEOMETRY
         if fleetroster:
             self._fleetroster = fleetroster
         else:
-            self._fleetroster = self._random_fleetroster()
+            self._fleetroster = self._random_fleetroster(seed)
         self._fleet = self._load_fleet(self._fleetroster)        
         self.armada = self._expand_fleet(self._fleet)
-        self.duplicates, self.out_of_bounds = self.validate_coords(self.armada)
+        self.duplicates, self.out_of_bounds = self._validate_fleet(self.armada)
+        self._index, self._intact = self._index_fleet(self.armada)
+        self._afloat = sum(1 for intact in self._intact.values() if intact)
 
     def _load_fleet(self,
             fleetroster: Mapping[str, Mapping[str, Union[str, int]]] ) -> List[Ship]:
@@ -185,40 +219,100 @@ class Fleet(object):
         Returns a list of battlestern.ships.Ship subclasses, one of each
         """
         loaded_fleet = []
-        for ship, specs in fleetroster:
+        for ship, specs in fleetroster.items():
             ship = self.shipyard[ship.lower()]
             loaded_fleet.append(ship(orientation=specs['orientation'],
                  bow_coordinate=Coordinate(col=specs['col'],
-                                              row=specs['row'])))
+                                           row=specs['row'],
+                                           geometry=self.geometry)))
         return loaded_fleet
 
-    def _random_fleetroster(self):
+    def _refit(self,
+               fleetroster: Mapping[str, Mapping[str, Union[str, int]]]) -> None:
+        """
+        Moves the loaded ships to a new fleetroster's positions,
+        only building ships that aren't already in the fleet.
+        """
+        ships = {ship.name: ship for ship in self._fleet}
+        self._fleetroster = fleetroster
+        self._fleet.clear()
+        for name, specs in fleetroster.items():
+            ship = ships.get(name.lower())
+            if ship is None:
+                self._fleet.extend(self._load_fleet({name: specs}))
+                continue
+            ship.place(specs['orientation'],
+                       Coordinate(col=specs['col'], row=specs['row'], geometry=self.geometry))
+            self._fleet.append(ship)
+
+    def reset(self,
+              fleetroster: Union[Mapping[str, Mapping[str, Union[str, int]]], None] = None) -> None:
+        """
+        Readies the fleet for a new game in place, reusing its ships and dictionaries
+        rather than building a new Fleet.
+
+        :param fleetroster: New positions for the ships, as accepted by Fleet.
+            Defaults to None, the ships are repaired where they lie.
+        :type fleetroster: A dictionary (JSON-like) or None
+        """
+        if fleetroster:
+            self._refit(fleetroster)
+            self._expand_fleet(self._fleet, self.armada)
+            self.duplicates, self.out_of_bounds = self._validate_fleet(self.armada)
+            self._index.clear()
+            self._intact.clear()
+        index = self._index
+        for ship, coords in self.armada.items():
+            for coord in coords:
+                coords[coord] = 'intact'
+                if fleetroster:
+                    index.setdefault(coord, ship)
+            self._intact[ship] = len(coords)
+        self._afloat = sum(1 for intact in self._intact.values() if intact)
+
+    @classmethod
+    def shiplengths(cls) -> Dict[str, int]:
         """
+        The shipyard's ship names mapped to their lengths
+        """
+        return {name: ship.length for name, ship in cls.shipyard.items()}
 
+    def _random_fleetroster(self,
+            seed: Union[int, random.Random, None] = None) -> Dict[str, Dict[str, Union[str, int]]]:
         """
-        fleetroster = {}
-        for shipname, shiptype in Fleet.shipyard:
-            orientation = random.choice(Ship.orientations)
-            if orientation == 'horizontal':
-                ringfence = len(Coordinate.allowedcols) - shiptype.length
-                col = random.choice(Coordinate.allowedcols[0:ringfence])
-                row = random.choice(Coordinate.allowedrows)
-            else:
-                ringfence = len(Coordinate.allowedrows) - shiptype.length
-                col = random.choice(Coordinate.allowedcols)
-                row = random.choice(Coordinate.allowedrows[0:ringfence])
-            nose_coord = Coordinate(col=col, row=row)
-            fleetroster.setdefault(shipname, 
-                    {'col':nose_coord['col'], 'row':nose_coord['row'], 'orientation': orientation})
-        return fleetroster
+        Generates a fleetroster of one of each ship in the shipyard
+        with no overlapping or out of bounds ships, see battlestern.placement
+        """
+        return PlacementEngine(self.geometry, seed).roster(self.shiplengths())
+
+    @classmethod
+    def random_rosters(cls,
+                       n: int,
+                       geometry: Geometry = None,
+                       seed: Union[int, random.Random, None] = None) -> \
+                           Iterator[Dict[str, Dict[str, Union[str, int]]]]:
+        """
+        Generates n random legal fleetrosters in bulk, for spinning up many games.
+
+        :param n: Number of fleetrosters
+        :type n: int
+        :param geometry: The dimensions of the board, defaults to the 10x10 grid
+        :type geometry: battlestern.geometry.Geometry
+        :param seed: A seed for a reproducible sequence of fleetrosters
+        :type seed: int, random.Random or None
+        """
+        return PlacementEngine(geometry, seed).rosters(cls.shiplengths(), n)
 
-    def _expand_fleet(self, loaded_fleet: List[Ship]):
+    def _expand_fleet(self, loaded_fleet: List[Ship], armada=None):
         """
         Takes bow_coordinates, orientation and length and expands
         to the full set of ship coordinate tuples.
 
         :param fleet: A loaded fleetroster, instances of all the ships.
         :type fleet: a List of battlestern.ships.Ship subclasses, one of each.
+        :param armada: An armada to refill in place, reusing its dictionaries,
+            defaults to a new one
+        :type armada: dict of ship.name : dict of Coord : Status
 
         Returns a battle-ready armada with all armour intact at all coordinates.
         A nested dictionary of ship subclass names for keys, pointing to values
@@ -227,22 +321,37 @@ class Fleet(object):
 
         The data structure is indexed by ship.name and coordinate, useful for checking 
         what coordinates a ship occupies it's O(1)
-        It's not optimised for the other operation, checking if any ship 
-        occupies a coordinate (i.e. seeing if a missle strike is a hit or miss) 
-        and would suffer for very large fleets. 
-        Luckily this game has 5 ships so the O(n) is trivial.
+        The other operation, checking if any ship occupies a coordinate
+        (i.e. seeing if a missle strike is a hit or miss), is served by the
+        reverse index built in `_index_fleet`.
         """
-        armada = {}
+        if armada is None:
+            armada = {}
+        elif len(armada) > len(loaded_fleet):
+            names = {ship.name for ship in loaded_fleet}
+            for name in [name for name in armada if name not in names]:
+                del armada[name]
+        offset = self.geometry.offset
         for ship in loaded_fleet:
-            if ship.orientation == 'horizontal':
-                coords = ( (chr(ord(ship.bow_coordinate['col']) + i),
-                            ship.bow_coordinate['row']) 
-                            for i in range(ship.length) )
+            bow = ship.bow_coordinate
+            table = placement_table(self.geometry, ship.length)
+            number = None
+            if table is not None:
+                number = table.numbers.get((self.geometry.index(bow), ship.orientation))
+            if number is not None:
+                coords = table.coords[number]
+            # not in the table if the ship runs off the grid, or the board is too big for one
+            elif ship.orientation == 'horizontal':
+                coords = ( offset(bow, cols=i) for i in range(ship.length) )
             else:
-                coords = ( (ship.bow_coordinate['col'], 
-                            ship.bow_coordinate['row'] + i) 
-                            for i in range(ship.length) )
-            armada[ship.name] = {(col, row): 'intact' for col, row in coords}
+                coords = ( offset(bow, rows=i) for i in range(ship.length) )
+            current = armada.get(ship.name)
+            if current is None:
+                armada[ship.name] = {(col, row): 'intact' for col, row in coords}
+            else:
+                current.clear()
+                for coord in coords:
+                    current[coord] = 'intact'
         return armada
 
     def validate_coords(self, 
@@ -273,10 +382,179 @@ class Fleet(object):
                       if len(ships) > 1}
         out_of_bounds = {coord: ships 
                       for coord, ships in coord_to_ships.items() 
-                      if coord[0] not in Coordinate.allowedcols
-                      or coord[1] not in Coordinate.allowedrows}
+                      if not self.geometry.contains(coord)}
         return duplicates, out_of_bounds
 
+    def _validate_fleet(self,
+                        armada: Mapping[str, Mapping[Tuple[str, int], str]]) -> \
+                            Tuple[Dict[Tuple[str, int], List[str]],
+                                  Dict[Tuple[str, int], List[str]]]:
+        """
+        `validate_coords` for the loaded fleet, with the placement tables to hand.
+        A fleet whose ships all have slots in the tables and whose masks don't
+        overlap is valid without looking at its coordinates.
+        """
+        occupied = 0
+        for ship in self._fleet:
+            table = placement_table(self.geometry, ship.length)
+            if table is None:
+                return self.validate_coords(armada)
+            number = table.numbers.get((self.geometry.index(ship.bow_coordinate),
+                                        ship.orientation))
+            if number is None or occupied & table.masks[number]:
+                return self.validate_coords(armada)
+            occupied |= table.masks[number]
+        return {}, {}
+
+    @classmethod
+    def validate_many(cls,
+                      rosters: Iterable[Mapping[str, Mapping[str, Union[str, int]]]],
+                      geometry: Geometry = None,
+                      vectorise: Union[bool, None] = None) -> \
+                          List[Tuple[Dict[Tuple[str, int], List[str]],
+                                     Dict[Tuple[str, int], List[str]]]]:
+        """
+        Validates a batch of fleetrosters without building their fleets,
+        for bulk ingestion of submitted rosters.
+
+        Every roster is encoded as an occupancy bitmask, one bit per cell, so finding
+        overlaps is a bitwise and per ship, with each ship's mask read from its
+        placement table. A ship with no slot in the table runs off the grid.
+        With NumPy installed the whole batch is checked in a few array passes instead.
+        Only the rosters that fail are expanded to work out which coordinates and ships
+        are at fault, which is rare for submitted rosters.
+
+        :param rosters: Fleetrosters as accepted by Fleet
+        :type rosters: Iterable of dictionaries (JSON-like)
+        :param geometry: The dimensions of the board, defaults to the 10x10 grid
+        :type geometry: battlestern.geometry.Geometry
+        :param vectorise: Use NumPy, defaults to using it when it's installed
+        :type vectorise: bool or None
+
+        Returns a (duplicates, out_of_bounds) tuple per roster, as `validate_coords`.
+        Raises the same errors as Fleet for an unknown ship, orientation or bow coordinate.
+        """
+        geometry = geometry or DEFAULT_GEOMETRY
+        rosters = list(rosters)
+        ships = cls._encode_rosters(rosters, geometry)
+        numpy = _numpy() if vectorise is not False else None
+        if vectorise and numpy is None:
+            raise ImportError('vectorised validation needs numpy')
+        if numpy is not None:
+            failed = _failed_rosters_numpy(numpy, ships, len(rosters), geometry)
+        else:
+            failed = _failed_rosters(ships, len(rosters), geometry)
+        valid: Tuple[Dict, Dict] = ({}, {})
+        results = [valid] * len(rosters)
+        for number in failed:
+            fleet = cls.__new__(cls)
+            fleet.geometry = geometry
+            armada = Fleet._expand_fleet(fleet, fleet._load_fleet(rosters[number]))
+            results[number] = Fleet.validate_coords(fleet, armada)
+        # each valid roster gets its own empty dicts, as validate_coords would return
+        return [({}, {}) if result is valid else result for result in results]
+
+    @classmethod
+    def _encode_rosters(cls,
+                        rosters: List[Mapping[str, Mapping[str, Union[str, int]]]],
+                        geometry: Geometry) -> List[Tuple[int, int, int, bool, int]]:
+        """
+        The (roster number, zero based col, zero based row, vertical, length)
+        of every ship in a batch of rosters, checked as Fleet checks them.
+        """
+        colindex = geometry._colindex
+        rows = geometry.rows
+        ships = []
+        for number, roster in enumerate(rosters):
+            for name, specs in roster.items():
+                length = cls.shipyard[name.lower()].length
+                orientation = specs['orientation']
+                if orientation not in Ship.orientations:
+                    raise OrientationError(
+                        'orientation must be one of {}'
+                        .format(', '.join(Ship.orientations)))
+                col = colindex.get(specs['col'])
+                row = specs['row']
+                if col is None or row not in rows:
+                    # the same error Fleet raises
+                    Coordinate(specs['col'], row, geometry=geometry)
+                ships.append((number, col, row - 1, orientation == 'vertical', length))
+        return ships
+
+
+    def _index_fleet(self,
+                armada: Mapping[str, Mapping[Tuple[str, int], str]]) -> \
+                    Tuple[Dict[Tuple[str, int], str], Dict[str, int]]:
+        """
+        Builds the reverse index of the armada, coordinate to ship name,
+        and a live count of the intact coordinates of every ship.
+
+        :param armada: An expanded fleet of ships & their coordinates
+        :type armada: dict of ship.name : dict of Coord : Status
+
+        Returns the coordinate index and the intact counts.
+        If ships overlap the first ship in the armada owns the coordinate,
+        overlaps are reported by `validate_coords` and left to the client.
+        """
+        index = {}
+        intact = {}
+        for ship, coords in armada.items():
+            intact[ship] = 0
+            for coord, status in coords.items():
+                index.setdefault(coord, ship)
+                if status == 'intact':
+                    intact[ship] += 1
+        return index, intact
+
+    def ship_at(self, coordinates: Tuple[str, int]) -> Union[str, None]:
+        """
+        The name of the ship occupying the coordinates, or None
+        """
+        return self._index.get(coordinates)
+
+    def ship_coordinates(self, shipname: str) -> Tuple[Tuple[str, int], ...]:
+        """
+        The coordinates a ship covers, bow to stern
+        """
+        return tuple(self.armada[shipname])
+
+    def is_sunk(self, shipname: str) -> bool:
+        """
+        True if every coordinate of the ship has been damaged
+        """
+        return not self._intact[shipname]
+
+    @property
+    def all_sunk(self) -> bool:
+        """
+        True once every ship in the armada has been sunk
+        """
+        return not self._afloat
+
+    def _resolve_strike(self,
+                        coordinates: Tuple[str, int]) -> Tuple[Union[str, None], bool]:
+        """
+        Applies a missile strike to the armada without building any messages.
+
+        :param coordinates: Coordinates to land a missile strike on the fleet
+        :type coordinates: Tuple[str, int]
+
+        Returns the name of the ship that was hit (None for a miss)
+        and True only for the strike that sank it.
+        Striking an already damaged coordinate is still a hit but does no more damage.
+        """
+        ship = self._index.get(coordinates)
+        if ship is None:
+            return None, False
+        damage = self.armada[ship]
+        if damage[coordinates] != 'intact':
+            return ship, False
+        damage[coordinates] = 'damaged'
+        self._intact[ship] -= 1
+        if self._intact[ship]:
+            return ship, False
+        self._afloat -= 1
+        return ship, True
 
     def _strike(self, coordinates):
         """
@@ -286,32 +564,219 @@ class Fleet(object):
         in the grand (Python) tradition of random Monty Python references.
 
         If a hit is the last coordinate of a ship to take damage it will return
-        the special message 'You sunk my {shipname}!' e.g. if it was the battleship
-        'You sunk my battleship!'
+        the special message 'You sank my {shipname} !' e.g. if it was the battleship
+        'You sank my battleship !'
         
         This method should be called by the opponent's board, not directly.
 
         :param coordinates: Coordinates to land a missile strike on the opponent's fleet
         :type coordinates: Tuple[str, int]
         """
-        hitmessages = ["It's just a flesh wound!",
-                        "'tis but a scratch",
-                        "had worse",
-                        "Right, I’ll do you for that",
-                        "I'm invincible!",
-                        "All right, we'll call it a draw.",
-                        "Come back here and take what's coming to ya!",
-                        "I'll bite your legs off!"
-                        ]
-
-        msg = 'You missed'
-        for ship, coords in self.armada.items():
-            for coord in coords.keys():
-                if coordinates == coord:
-                    self.armada[ship][coord] = 'damaged'
-                    msg = f'You sank my {ship.name} !'
-                    for damagereport in self.armada[ship].values():
-                        if damagereport = 'intact'
-                            msg = random.choice(hitmessages)
-                    return 'hit', msg
-        return 'miss' , msg
+        ship, _ = self._resolve_strike(coordinates)
+        if ship is None:
+            return 'miss', 'You missed'
+        if not self.is_sunk(ship):
+            return 'hit', random.choice(self.hitmessages)
+        return 'hit', f'You sank my {ship} !'
+
+
+def _numpy():
+    """
+    numpy if it's installed, imported on first use so it's optional and
+    doesn't slow down importing battlestern
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _failed_rosters(ships: List[Tuple[int, int, int, bool, int]],
+                    count: int,
+                    geometry: Geometry) -> List[int]:
+    """
+    The numbers of the rosters with overlapping ships or ships off the grid,
+    from their ships encoded by Fleet._encode_rosters, using int bitmasks
+    """
+    width, height = geometry.width, geometry.height
+    tables = {}
+    occupied = [0] * count
+    failed = set()
+    for number, col, row, is_vertical, length in ships:
+        table = tables.get(length, False)
+        if table is False:
+            table = tables[length] = placement_table(geometry, length)
+        if table is not None:
+            slot = table.numbers.get((row * width + col,
+                                      'vertical' if is_vertical else 'horizontal'))
+            if slot is None:
+                failed.add(number)
+                continue
+            mask = table.masks[slot]
+        elif is_vertical:
+            if row + length > height:
+                failed.add(number)
+                continue
+            mask = sum(1 << ((row + i) * width + col) for i in range(length))
+        else:
+            if col + length > width:
+                failed.add(number)
+                continue
+            mask = ((1 << length) - 1) << (row * width + col)
+        if occupied[number] & mask:
+            failed.add(number)
+        occupied[number] |= mask
+    return sorted(failed)
+
+
+def _failed_rosters_numpy(numpy,
+                          ships: List[Tuple[int, int, int, bool, int]],
+                          count: int,
+                          geometry: Geometry) -> List[int]:
+    """
+    As _failed_rosters, with every ship of the batch expanded to its cells at once.
+    Overlaps are repeated (roster, cell) keys once the cells are sorted.
+    """
+    if not ships:
+        return []
+    number, col, row, vertical, length = (numpy.array(column) for column in zip(*ships))
+    vertical = vertical.astype(bool)
+    width, height = geometry.width, geometry.height
+    off_grid = numpy.where(vertical, row + length > height, col + length > width)
+    steps = numpy.arange(length.max())
+    cells = (row[:, None] + numpy.where(vertical[:, None], steps, 0)) * width \
+        + col[:, None] + numpy.where(vertical[:, None], 0, steps)
+    keep = (steps < length[:, None]) & ~off_grid[:, None]
+    keys = numpy.sort((number[:, None].astype(numpy.int64) * geometry.area + cells)[keep])
+    overlapping = keys[1:][keys[1:] == keys[:-1]] // geometry.area
+    failed = numpy.union1d(number[off_grid], overlapping)
+    return [int(roster) for roster in failed]
+
+
+class BitFleet(Fleet):
+    """
+    A compact Fleet backend with the same _strike API.
+
+    Each ship's coordinates are stored as an integer bitmask (see Geometry.index)
+    along with a single damage bitmask for the whole fleet,
+    instead of nested dictionaries of 'intact' / 'damaged' strings.
+    A snapshot of the fleet is the damage int, checking a hit is a single bitwise and
+    and "all ships sunk" is a comparison of the damage and occupancy masks.
+
+    :param fleetroster: A set of ships and positional properties, as for Fleet
+    :type fleetroster: A dictionary (JSON-like) or None
+    :param geometry: The dimensions of the board the fleet is placed on
+    :type geometry: battlestern.geometry.Geometry
+    """
+
+    def __init__(self,
+                 fleetroster: Mapping[str, Mapping[str, Union[str, int]]],
+                 geometry: Geometry = None,
+                 seed: Union[int, random.Random, None] = None) -> None:
+        self.geometry = geometry or DEFAULT_GEOMETRY
+        if fleetroster:
+            self._fleetroster = fleetroster
+        else:
+            self._fleetroster = self._random_fleetroster(seed)
+        self._fleet = self._load_fleet(self._fleetroster)
+        armada = self._expand_fleet(self._fleet)
+        self.duplicates, self.out_of_bounds = self._validate_fleet(armada)
+        self._masks, self._stranded = self._mask_fleet(armada)
+        self.occupied = 0
+        for mask in self._masks.values():
+            self.occupied |= mask
+        self.damage = 0
+
+    def _mask_fleet(self,
+                    armada: Mapping[str, Mapping[Tuple[str, int], str]]) -> \
+                        Tuple[Dict[str, int], Set[str]]:
+        """
+        Converts an expanded armada to a bitmask per ship.
+
+        Returns the masks and the set of ships with coordinates off the grid.
+        Those coordinates can never be struck so, as with Fleet, the ship can't be sunk.
+        """
+        masks = {}
+        stranded = set()
+        for ship, coords in armada.items():
+            masks[ship] = 0
+            for coord in coords:
+                if self.geometry.contains(coord):
+                    masks[ship] |= 1 << self.geometry.index(coord)
+                else:
+                    stranded.add(ship)
+        return masks, stranded
+
+    @property
+    def armada(self):
+        """
+        The armada materialised in the same nested dictionary format as Fleet.armada,
+        built on demand so it is a copy and not the live state.
+        """
+        armada = self._expand_fleet(self._fleet)
+        for ship, coords in armada.items():
+            for coord in coords:
+                if coord in self.out_of_bounds:
+                    continue
+                if self.damage & (1 << self.geometry.index(coord)):
+                    coords[coord] = 'damaged'
+        return armada
+
+    def ship_at(self, coordinates: Tuple[str, int]) -> Union[str, None]:
+        bit = 1 << self.geometry.index(coordinates)
+        if not self.occupied & bit:
+            return None
+        for ship, mask in self._masks.items():
+            if mask & bit:
+                return ship
+
+    def ship_coordinates(self, shipname: str) -> Tuple[Tuple[str, int], ...]:
+        return tuple(self._expand_fleet(
+            [ship for ship in self._fleet if ship.name == shipname])[shipname])
+
+    def is_sunk(self, shipname: str) -> bool:
+        mask = self._masks[shipname]
+        return self.damage & mask == mask and shipname not in self._stranded
+
+    @property
+    def all_sunk(self) -> bool:
+        return self.damage == self.occupied and not self._stranded
+
+    def _resolve_strike(self,
+                        coordinates: Tuple[str, int]) -> Tuple[Union[str, None], bool]:
+        bit = 1 << self.geometry.index(coordinates)
+        if not self.occupied & bit:
+            return None, False
+        ship = self.ship_at(coordinates)
+        if self.damage & bit:
+            return ship, False
+        self.damage |= bit
+        return ship, self.is_sunk(ship)
+
+    def reset(self,
+              fleetroster: Union[Mapping[str, Mapping[str, Union[str, int]]], None] = None) -> None:
+        """
+        Readies the fleet for a new game in place, see Fleet.reset
+        """
+        if fleetroster:
+            self._refit(fleetroster)
+            armada = self._expand_fleet(self._fleet)
+            self.duplicates, self.out_of_bounds = self._validate_fleet(armada)
+            self._masks, self._stranded = self._mask_fleet(armada)
+            self.occupied = 0
+            for mask in self._masks.values():
+                self.occupied |= mask
+        self.damage = 0
+
+    def snapshot(self) -> int:
+        """
+        The damage to the fleet as an int bitmask
+        """
+        return self.damage
+
+    def restore(self, snapshot: int) -> None:
+        """
+        Resets the fleet's damage to a state returned by `snapshot`
+        """
+        self.damage = snapshot
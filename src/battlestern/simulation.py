@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Headless self-play, complete games between two strategies with no driver.
+
+play_game plays one Game until a fleet is sunk.
+simulate plays many games across a process pool and folds the results into
+a SimulationStats as they arrive, so memory doesn't grow with the number of games.
+Every game has its own seed derived from the simulation seed and the game's number,
+so a simulation is reproducible however many processes run it.
+
+e.g.
+from battlestern.strategies import random_strategy
+stats = simulate(random_strategy, random_strategy, games=100000, seed=1)
+stats.win_rate(1), stats.shots, stats.games_per_second
+"""
+
+import random
+import time
+from collections import Counter, namedtuple
+from multiprocessing import Pool
+from os import cpu_count
+from typing import Callable, Dict, Iterator, Tuple, Union
+
+from .games import Game
+from .geometry import Geometry, DEFAULT_GEOMETRY
+
+GameResult = namedtuple('GameResult', ['winner', 'shots'])
+GameResult.__doc__ = """
+The outcome of a simulated game
+
+winner: 1 or 2 for the strategy that sank the other fleet, 0 if nobody did within max_shots
+shots: the number of shots the winner took
+"""
+
+
+def game_seed(seed: int, number: int) -> int:
+    """
+    The seed of a game in a simulation, independent of which process plays it
+    """
+    return (seed << 32) | number
+
+
+def play_game(strategy1: Callable,
+              strategy2: Callable,
+              seed: Union[int, None] = None,
+              geometry: Geometry = None,
+              max_shots: Union[int, None] = None,
+              game: Union[Game, None] = None,
+              player1fleet=None,
+              player2fleet=None) -> GameResult:
+    """
+    Plays one game between two strategies, with random fleets unless given.
+    Strategy 1 is player 1 and shoots first.
+
+    :param strategy1: Strategy factory for player 1, see battlestern.strategies
+    :param strategy2: Strategy factory for player 2
+    :param seed: Seeds the fleets and both strategies
+    :type seed: int or None
+    :param geometry: The dimensions of the board, defaults to the 10x10 grid
+    :type geometry: battlestern.geometry.Geometry
+    :param max_shots: Shots per player before the game is abandoned as a draw,
+        defaults to twice the area of the board
+    :type max_shots: int
+    :param game: A finished game on the same geometry to reset and play again,
+        defaults to a new Game. Its journal is switched off.
+    :type game: battlestern.games.Game
+    :param player1fleet: A fleetroster as for Game, defaults to a random one
+    :param player2fleet: A fleetroster as for Game, defaults to a random one
+
+    Returns a GameResult
+    """
+    geometry = geometry or DEFAULT_GEOMETRY
+    if max_shots is None:
+        max_shots = 2 * geometry.area
+    rng = random.Random(seed)
+    if game is None:
+        game = Game(player1fleet=player1fleet, player2fleet=player2fleet,
+                    geometry=geometry, seed=rng, log=False)
+    else:
+        game.reset(player1fleet, player2fleet, seed=rng, log=False)
+    sides = []
+    for strategy, player in ((strategy1, game.player1), (strategy2, game.player2)):
+        choose = strategy(geometry, random.Random(rng.getrandbits(64)))
+        sides.append((player,
+                      choose,
+                      getattr(choose, 'observe', None),
+                      player.opponent.fleet))
+
+    # strikes go through the game, without building messages,
+    # so its turn, spectators, instrumentation and locks follow the play
+    iter_strikes = game.iter_strikes
+    for shots in range(1, max_shots + 1):
+        for winner, (player, choose, observe, fleet) in enumerate(sides, 1):
+            coord = choose(player.board)
+            result, _, sunk = next(iter_strikes(player, (coord,)))
+            if observe is not None:
+                observe(coord, result, sunk,
+                        None if sunk is None else fleet.ship_coordinates(sunk))
+            if sunk is not None and fleet.all_sunk:
+                return GameResult(winner, shots)
+    return GameResult(0, max_shots)
+
+
+class SimulationStats(object):
+    """
+    Streaming aggregate of simulated games.
+    Partial stats from each worker are merged, nothing is kept per game.
+
+    wins: games won by strategy 1 & 2, index 0 counts draws
+    shots: histogram of the winner's shots, a Counter of shots to number of games
+    """
+
+    def __init__(self) -> None:
+        self.games: int = 0
+        self.wins = [0, 0, 0]
+        self.shots: Counter = Counter()
+        self.elapsed: float = 0.0
+        self.processes: int = 1
+
+    def add(self, result: GameResult) -> None:
+        self.games += 1
+        self.wins[result.winner] += 1
+        if result.winner:
+            self.shots[result.shots] += 1
+
+    def merge(self, other: 'SimulationStats') -> None:
+        self.games += other.games
+        for winner, wins in enumerate(other.wins):
+            self.wins[winner] += wins
+        self.shots.update(other.shots)
+
+    def win_rate(self, strategy: int) -> float:
+        """
+        The share of games won by strategy 1 or 2
+        """
+        return self.wins[strategy] / self.games if self.games else 0.0
+
+    @property
+    def mean_shots(self) -> float:
+        won = sum(self.shots.values())
+        if not won:
+            return 0.0
+        return sum(shots * games for shots, games in self.shots.items()) / won
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def games_per_second_per_core(self) -> float:
+        return self.games_per_second / self.processes
+
+    def as_dict(self) -> Dict:
+        return {'games': self.games,
+                'wins': {'draw': self.wins[0],
+                         'strategy1': self.wins[1],
+                         'strategy2': self.wins[2]},
+                'shots': dict(sorted(self.shots.items())),
+                'mean_shots': self.mean_shots,
+                'elapsed': self.elapsed,
+                'processes': self.processes,
+                'games_per_second_per_core': self.games_per_second_per_core}
+
+
+def _play_chunk(args: Tuple) -> SimulationStats:
+    """
+    Plays a contiguous range of game numbers in a worker, returning partial stats
+    """
+    strategy1, strategy2, seed, start, stop, geometry, max_shots = args
+    stats = SimulationStats()
+    game = Game(geometry=geometry, log=False)
+    for number in range(start, stop):
+        stats.add(play_game(strategy1, strategy2,
+                            seed=game_seed(seed, number),
+                            geometry=geometry,
+                            max_shots=max_shots,
+                            game=game))
+    return stats
+
+
+def _chunks(games: int, chunksize: int) -> Iterator[Tuple[int, int]]:
+    for start in range(0, games, chunksize):
+        yield start, min(start + chunksize, games)
+
+
+def simulate(strategy1: Callable,
+             strategy2: Callable,
+             games: int,
+             seed: int = 0,
+             processes: Union[int, None] = None,
+             geometry: Geometry = None,
+             max_shots: Union[int, None] = None,
+             chunksize: int = 1000) -> SimulationStats:
+    """
+    Plays many games between two strategies, in parallel across a process pool.
+
+    :param strategy1: Strategy factory for player 1, see battlestern.strategies
+    :param strategy2: Strategy factory for player 2
+    :param games: Number of games to play
+    :type games: int
+    :param seed: The simulation seed, each game is seeded from this and its number
+    :type seed: int
+    :param processes: Worker processes, defaults to one per CPU. 1 plays in this process.
+    :type processes: int or None
+    :param geometry: The dimensions of the board, defaults to the 10x10 grid
+    :type geometry: battlestern.geometry.Geometry
+    :param max_shots: Shots per player before a game is a draw, see play_game
+    :type max_shots: int
+    :param chunksize: Games played by a worker per task
+    :type chunksize: int
+
+    Returns the SimulationStats of all games
+    """
+    processes = processes or cpu_count() or 1
+    tasks = ((strategy1, strategy2, seed, start, stop, geometry, max_shots)
+             for start, stop in _chunks(games, chunksize))
+    stats = SimulationStats()
+    stats.processes = processes
+    started = time.perf_counter()
+    if processes == 1:
+        for task in tasks:
+            stats.merge(_play_chunk(task))
+    else:
+        with Pool(processes) as pool:
+            for partial in pool.imap_unordered(_play_chunk, tasks):
+                stats.merge(partial)
+    stats.elapsed = time.perf_counter() - started
+    return stats
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+An exact endgame solver, the fewest shots expected to sink the rest of a fleet
+given what a player's Board knows, for bot evaluation and reviewing games.
+
+The hidden fleet is taken to be uniformly random among the fleets consistent
+with the board, i.e. placements of the ships not yet sunk (see Fleet.shipyard)
+that cover every open hit, avoid every miss and sunk ship, and don't overlap.
+A ship is sunk once all its coordinates are hit, and as in Game the board
+then learns where it lay (see Board.mark_sunk).
+The expected number of shots left is the value of the best strategy,
+    E(state) = min over shots of 1 + sum of P(outcome) * E(state after the outcome)
+with miss, hit or sinking a ship as the outcomes, and 0 once every ship is sunk.
+
+The state after any sequence of shots is the open hits, the ships afloat and
+the coordinates ruled out, those no consistent fleet covers, which includes every
+miss and sunk ship. The same state is reached by many orders of shots,
+so values are kept in a transposition table keyed by a Zobrist hash of it,
+a random 64 bit key per (coordinate, ruled out or open hit) and per ship afloat
+XORed together and updated one shot at a time.
+Tables evict the least recently used values once full, and are kept
+between solves so consecutive moves of a game share their work.
+
+Pruning, none of which changes the answer
+symmetry   a state and its reflections (and rotations on square boards) share
+           a table entry, hashed by the smallest of their Zobrist keys.
+           With one ship afloat a state is also keyed by the shapes of the regions
+           the ship could be in, up to translation, reflection and rotation,
+           and only one shot is tried of those at the same place in regions of the same shape
+dominance  a coordinate no consistent fleet covers is never worth a shot, and
+           when some coordinate is covered by every consistent fleet it is shot
+           first, as it must be shot anyway and knowing it sooner can't hurt
+bounds     every unhit coordinate of the ships afloat takes a shot, so a shot
+           costs at least 1 + that many less its chance of a hit, shots are tried
+           most likely hit first and those that can't beat the best are skipped
+
+Solving is exponential in the fleets left to tell apart, it is meant for the late game.
+So a solve takes milliseconds or fails fast, positions with more than max_configs
+consistent fleets, or needing more than max_nodes states solved, raise a SolverError.
+
+e.g.
+solver = EndgameSolver()
+solution = solver.solve(game.player1.board)
+solution.expected, solution.coord
+"""
+
+import random
+from collections import Counter, OrderedDict, namedtuple
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+from .exceptions import SolverError
+from .geometry import Geometry, DEFAULT_GEOMETRY
+from .placement import PlacementEngine, placement_table
+from .ships import Fleet
+
+Solution = namedtuple('Solution', ['expected', 'coord', 'configs'])
+Solution.__doc__ = '''
+expected: the fewest shots expected to sink the ships afloat, playing perfectly
+coord: the (col, row) of a best next shot, None once every ship is sunk
+configs: the number of fleets consistent with the board
+'''
+
+# a consistent fleet, the cells of the ships afloat as (union mask, ship masks)
+Config = Tuple[int, Tuple[int, ...]]
+
+
+class EndgameSolver(object):
+    """
+    Solves endgames on one board geometry with one shipyard.
+    Keep a solver for as long as positions are being solved to reuse its table.
+
+    :param geometry: The dimensions of the board, defaults to the 10x10 grid
+    :type geometry: battlestern.geometry.Geometry
+    :param ships: Ship names mapped to their lengths, defaults to Fleet's shipyard
+    :type ships: dict e.g. {'carrier': 5, 'patrol': 2}
+    :param table_size: The most values kept in the transposition table
+    :type table_size: int
+    :param max_configs: The most consistent fleets a position may have
+    :type max_configs: int
+    :param max_nodes: The most states a solve may evaluate, not counting those in the table
+    :type max_nodes: int
+    """
+
+    def __init__(self,
+                 geometry: Geometry = None,
+                 ships: Mapping[str, int] = None,
+                 table_size: int = 1 << 20,
+                 max_configs: int = 2000,
+                 max_nodes: int = 1000) -> None:
+        self.geometry = geometry or DEFAULT_GEOMETRY
+        self.ships = dict(ships or Fleet.shiplengths())
+        self.table_size = table_size
+        self.max_configs = max_configs
+        self.max_nodes = max_nodes
+        self._nodes = 0
+        self.table: 'OrderedDict[int, float]' = OrderedDict()
+        self.table_hits = 0
+        self.table_misses = 0
+        # canonical shapes of the regions seen with one ship afloat
+        self._shapes: Dict[Tuple[int, int], Tuple] = {}
+        self._symmetries = self._cell_symmetries()
+        # a key per symmetry for each cell ruled out and each cell an open hit,
+        # and for the number of ships of each length afloat
+        rng = random.Random(0x5eed)
+        area = self.geometry.area
+        dead = [rng.getrandbits(64) for _ in range(area)]
+        open_hit = [rng.getrandbits(64) for _ in range(area)]
+        # the keys of every symmetry are packed into one int, 64 bits each,
+        # so a shot updates them all with one XOR
+        self._dead_keys = [_pack(dead[image[cell]] for image in self._symmetries)
+                           for cell in range(area)]
+        self._open_keys = [_pack(open_hit[image[cell]] for image in self._symmetries)
+                           for cell in range(area)]
+        self._afloat_keys = {(length, count): _pack([rng.getrandbits(64)] * len(self._symmetries))
+                             for length in set(self.ships.values())
+                             for count in range(len(self.ships) + 1)}
+        self._placements = {length: self._slot_masks(length)
+                            for length in set(self.ships.values())}
+
+    def _cell_symmetries(self) -> List[Tuple[int, ...]]:
+        """
+        The image of every cell under each reflection and rotation of the board
+        """
+        width, height = self.geometry.width, self.geometry.height
+        maps = [lambda col, row: (col, row),
+                lambda col, row: (width - 1 - col, row),
+                lambda col, row: (col, height - 1 - row),
+                lambda col, row: (width - 1 - col, height - 1 - row)]
+        if width == height:
+            maps += [lambda col, row: (row, col),
+                     lambda col, row: (height - 1 - row, col),
+                     lambda col, row: (row, width - 1 - col),
+                     lambda col, row: (height - 1 - row, width - 1 - col)]
+        symmetries = []
+        for transform in maps:
+            image = []
+            for cell in range(self.geometry.area):
+                row, col = divmod(cell, width)
+                col, row = transform(col, row)
+                image.append(row * width + col)
+            symmetries.append(tuple(image))
+        return symmetries
+
+    def _slot_masks(self, length: int) -> List[int]:
+        table = placement_table(self.geometry, length)
+        if table is not None:
+            return list(dict.fromkeys(table.masks))
+        engine = PlacementEngine(self.geometry)
+        return list(dict.fromkeys(sum(1 << cell for cell in engine.cells(length, slot))
+                                  for slot in engine.slots(length)))
+
+    def solve(self, board) -> Solution:
+        """
+        The fewest shots expected to sink the ships afloat and a shot that achieves it.
+
+        :param board: A player's tracking board, with the ships it sank marked
+        :type board: battlestern.boards.Board
+
+        Raises SolverError if no fleet is consistent with the board,
+        more than max_configs are, or the solve needs more than max_nodes states.
+        """
+        self._nodes = 0
+        index = self.geometry.index
+        hits = misses = wrecks = 0
+        for coord, result in board.coords.items():
+            if result == 'hit':
+                hits |= 1 << index(coord)
+            else:
+                misses |= 1 << index(coord)
+        afloat = Counter(self.ships.values())
+        for wreck in board.sunk:
+            length = len(wreck)
+            if not afloat[length]:
+                raise SolverError('No ship of length {} is left to have sunk'.format(length))
+            afloat[length] -= 1
+            for coord in wreck:
+                wrecks |= 1 << index(coord)
+        if wrecks & ~hits:
+            raise SolverError('A sunk ship covers coordinates that were not hit')
+        lengths = tuple(sorted(afloat.elements(), reverse=True))
+        shot = hits | misses
+        open_hits = hits & ~wrecks
+        if not lengths:
+            return Solution(0.0, None, 1)
+        configs = self._configs(lengths, shot & ~open_hits, open_hits)
+        if not configs:
+            raise SolverError('No fleet is consistent with the board')
+
+        live = 0
+        for union, _ in configs:
+            live |= union
+        keys = 0
+        for cell in _cells(((1 << self.geometry.area) - 1) & ~live):
+            keys ^= self._dead_keys[cell]
+        for cell in _cells(open_hits):
+            keys ^= self._open_keys[cell]
+        for length, count in afloat.items():
+            keys ^= self._afloat_keys[length, count]
+        expected, cell = self._value(keys, live, open_hits, configs, afloat, root=True)
+        return Solution(expected, self.geometry.coord(cell), len(configs))
+
+    def expected_shots(self, board) -> float:
+        """
+        The fewest shots expected to sink the ships afloat, see `solve`
+        """
+        return self.solve(board).expected
+
+    def _configs(self, lengths: Tuple[int, ...], blocked: int, open_hits: int) -> List[Config]:
+        """
+        Every fleet of ships of these lengths that avoids the blocked cells, covers
+        the open hits, and has no ship already entirely hit, as it would have sunk.
+        The lowest open hit not yet covered is covered first, by each ship left
+        in turn, so fleets leaving an open hit uncovered are never built.
+        """
+        options = {length: [mask for mask in self._placements[length]
+                            if not mask & blocked and mask & ~open_hits]
+                   for length in set(lengths)}
+        configs = []
+        limit = self.max_configs
+
+        def cover(left, union, masks):
+            uncovered = open_hits & ~union
+            if not uncovered:
+                place(left, 0, union, masks, -1)
+                return
+            if sum(left) < bin(uncovered).count('1'):
+                return
+            bit = uncovered & -uncovered
+            for length in sorted(set(left), reverse=True):
+                rest = list(left)
+                rest.remove(length)
+                for mask in options[length]:
+                    if mask & bit and not mask & union:
+                        cover(tuple(rest), union | mask, masks + (mask,))
+
+        def place(left, number, union, masks, previous):
+            if number == len(left):
+                configs.append((union, masks))
+                if len(configs) > limit:
+                    raise SolverError('More than {} fleets are consistent with the board'
+                                      .format(limit))
+                return
+            # ships of the same length are interchangeable, place them in order
+            same = number and left[number] == left[number - 1]
+            for position, mask in enumerate(options[left[number]]):
+                if same and position <= previous:
+                    continue
+                if not mask & union:
+                    place(left, number + 1, union | mask, masks + (mask,), position)
+        cover(lengths, 0, ())
+        return configs
+
+    def _value(self, keys, live, open_hits, configs, afloat, root=False):
+        """
+        The expected shots left in a state, with the best shot when root
+        """
+        key = _smallest(keys, len(self._symmetries))
+        # one ship afloat is also looked up by the shapes of its regions,
+        # values are stored under both keys
+        regions = shape = None
+        if not root:
+            value = self._lookup(key)
+            if value is None and len(configs[0][1]) == 1:
+                regions = self._regions(configs, open_hits)
+                shape = self._shape_key(configs, regions)
+                value = self._lookup(shape)
+                if value is not None:
+                    self._store(key, value)
+            if value is not None:
+                self.table_hits += 1
+                return value
+            self.table_misses += 1
+            self._nodes += 1
+            if self._nodes > self.max_nodes:
+                raise SolverError('The position needs more than {} states to solve'
+                                  .format(self.max_nodes))
+        elif len(configs[0][1]) == 1:
+            regions = self._regions(configs, open_hits)
+
+        # the shots left, ignoring which coordinates they are on
+        remaining = sum(length * count for length, count in afloat.items()) \
+            - bin(open_hits).count('1')
+        total = len(configs)
+        covered = Counter()
+        for union, _ in configs:
+            covered.update(_cells(union & ~open_hits))
+        forced = [cell for cell, count in covered.items() if count == total]
+        if forced:
+            candidates = [min(forced)]
+        else:
+            candidates = sorted(covered, key=lambda cell: (-covered[cell], cell))
+            if regions is not None:
+                # a shot and its image in a region of the same shape are worth the same
+                classes = {}
+                for region, region_shape, positions in regions:
+                    for cell in _cells(region & ~open_hits):
+                        classes.setdefault((region_shape, positions[cell]), cell)
+                first = set(classes.values())
+                candidates = [cell for cell in candidates if cell in first]
+
+        best = float('inf')
+        best_cell = None
+        for cell in candidates:
+            if 1 + remaining - covered[cell] / total >= best:
+                break
+            value = 1 + self._shoot(keys, live, open_hits, configs, afloat, cell) / total
+            if value < best:
+                best, best_cell = value, cell
+
+        if root:
+            return best, best_cell
+        self._store(key, best)
+        if shape is not None:
+            self._store(shape, best)
+        return best
+
+    def _lookup(self, key):
+        value = self.table.get(key)
+        if value is not None:
+            self.table.move_to_end(key)
+        return value
+
+    def _store(self, key, value):
+        self.table[key] = value
+        if len(self.table) > self.table_size:
+            self.table.popitem(last=False)
+
+    def _regions(self, configs: List[Config], open_hits: int) -> List[Tuple[int, Tuple, Dict]]:
+        """
+        The connected regions of the cells one ship afloat could be in,
+        each with its canonical shape and the position of each cell in that shape
+        """
+        regions = []
+        for union, _ in configs:
+            for region in [region for region in regions if region & union]:
+                regions.remove(region)
+                union |= region
+            regions.append(union)
+        shaped = []
+        for region in regions:
+            shape = self._shapes.get((region, region & open_hits))
+            if shape is None:
+                shape = self._shape(region, open_hits)
+            shaped.append((region,) + shape)
+        return shaped
+
+    def _shape_key(self, configs: List[Config], regions: List[Tuple[int, Tuple, Dict]]) -> Tuple:
+        """
+        The key of a state with one ship afloat.
+        Its placements are every straight run of its length through the open hits
+        in the cells it could be in, so the state is the shapes of the connected regions
+        of those cells, which are compared up to translation, reflection and rotation
+        """
+        return (bin(configs[0][1][0]).count('1'),
+                tuple(sorted(shape for _, shape, _ in regions)))
+
+    def _shape(self, region: int, open_hits: int) -> Tuple[Tuple, Dict[int, Tuple[int, int]]]:
+        """
+        The cells of a region, flagged if open hits, in a canonical orientation,
+        and the canonical position of each cell, the smallest it takes in any
+        orientation giving that shape. Remembered for the next time the region is seen.
+        """
+        width = self.geometry.width
+        cells = [(cell,) + divmod(cell, width) + (open_hits >> cell & 1,)
+                 for cell in _cells(region)]
+        images = []
+        for transform in _TRANSFORMS:
+            image = [(cell,) + transform(row, col) + (hit,) for cell, row, col, hit in cells]
+            top = min(row for _, row, _, _ in image)
+            left = min(col for _, _, col, _ in image)
+            images.append([(cell, row - top, col - left, hit)
+                           for cell, row, col, hit in image])
+        forms = [tuple(sorted((row, col, hit) for _, row, col, hit in image))
+                 for image in images]
+        shape = min(forms)
+        positions = {}
+        for image, form in zip(images, forms):
+            if form == shape:
+                for cell, row, col, _ in image:
+                    positions[cell] = min(positions.get(cell, (row, col)), (row, col))
+        if len(self._shapes) >= self.table_size:
+            self._shapes.clear()
+        self._shapes[region, region & open_hits] = shape, positions
+        return shape, positions
+
+    def _shoot(self, keys, live, open_hits, configs, afloat, cell):
+        """
+        The expected shots left after a shot, weighted by the configs, summed over its outcomes
+        """
+        bit = 1 << cell
+        missed = []
+        hit = []
+        sinks: Dict[int, List[Config]] = {}
+        for config in configs:
+            union, masks = config
+            if not union & bit:
+                missed.append(config)
+                continue
+            for mask in masks:
+                if mask & bit:
+                    break
+            if mask & ~(open_hits | bit):
+                hit.append(config)
+            else:
+                sinks.setdefault(mask, []).append(config)
+
+        total = 0.0
+        if missed:
+            total += len(missed) * self._outcome(keys, live, open_hits, missed, afloat)
+        if hit:
+            total += len(hit) * self._outcome(keys ^ self._open_keys[cell], live,
+                                              open_hits | bit, hit, afloat)
+        for wreck, sunk in sinks.items():
+            length = bin(wreck).count('1')
+            count = afloat[length]
+            after = Counter(afloat)
+            after[length] -= 1
+            if not +after:
+                continue
+            # the wreck's cells stop being open hits, its ship is no longer afloat
+            wreck_keys = keys ^ self._afloat_keys[length, count] \
+                ^ self._afloat_keys[length, count - 1]
+            for wreck_cell in _cells(wreck & open_hits):
+                wreck_keys ^= self._open_keys[wreck_cell]
+            rest = [(union & ~wreck, tuple(mask for mask in masks if mask != wreck))
+                    for union, masks in sunk]
+            total += len(sunk) * self._outcome(wreck_keys, live, open_hits & ~wreck, rest, after)
+        return total
+
+    def _outcome(self, keys, live, open_hits, configs, afloat):
+        """
+        The expected shots left in the state after an outcome, keyed as before it,
+        updating the keys for the cells the outcome ruled out
+        """
+        after = 0
+        for union, _ in configs:
+            after |= union
+        for cell in _cells(live & ~after):
+            keys ^= self._dead_keys[cell]
+        return self._value(keys, after, open_hits, configs, afloat)
+
+
+_TRANSFORMS = (lambda row, col: (row, col),
+               lambda row, col: (row, -col),
+               lambda row, col: (-row, col),
+               lambda row, col: (-row, -col),
+               lambda row, col: (col, row),
+               lambda row, col: (col, -row),
+               lambda row, col: (-col, row),
+               lambda row, col: (-col, -row))
+
+
+def _cells(mask: int):
+    """
+    The cells set in a bitmask, lowest first
+    """
+    while mask:
+        bit = mask & -mask
+        yield bit.bit_length() - 1
+        mask ^= bit
+
+
+def _pack(keys: Iterable[int]) -> int:
+    """
+    64 bit keys packed into one int, the first in the lowest bits
+    """
+    packed = 0
+    for position, key in enumerate(keys):
+        packed |= key << (64 * position)
+    return packed
+
+
+def _smallest(packed: int, count: int) -> int:
+    """
+    The smallest of count 64 bit keys packed by `_pack`
+    """
+    return min(packed >> (64 * position) & 0xffffffffffffffff for position in range(count))
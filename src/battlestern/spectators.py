@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Live feeds of a game for spectators.
+
+Each strike is encoded once as a compact delta frame and the same bytes object
+is handed to every spectator, no matter how many are watching.
+Keyframes of the full game state (see battlestern.serialization) are taken
+every keyframe_interval deltas, so a spectator joining late, or one that fell
+behind, starts from the latest keyframe and the deltas after it.
+
+Frames are little-endian, starting with the kind and the sequence number (Q):
+a delta (DELTA) is followed by the player number (B), the row-major cell index
+of the coordinate (I), the result (B) as in battlestern.journal,
+MISS or HIT with the DEJAVU and SUNK flags, and for a sink the length (B)
+and name of the ship.
+A keyframe (KEYFRAME) is followed by the encoded game.
+The sequence number of a keyframe is that of the last delta it includes.
+
+e.g.
+game = Game()
+spectator = game.subscribe()
+game.strike(game.player1, ('a', 1))
+mirror = Mirror()
+for frame in spectator.frames():
+    mirror.apply(frame)
+
+Spectators either pull frames with Subscription.frames(), which costs the game
+nothing when it strikes, or are pushed each frame through a callback.
+"""
+
+import struct
+from collections import namedtuple
+
+from .exceptions import SerializationError
+from .journal import SUNK
+
+KEYFRAME = 0
+DELTA = 1
+
+_head = struct.Struct('<BQ')
+_delta = struct.Struct('<BQBIB')
+
+Delta = namedtuple('Delta', ['sequence', 'player', 'cell', 'result', 'ship'])
+Keyframe = namedtuple('Keyframe', ['sequence', 'data'])
+
+
+def encode_delta(sequence, player, cell, result, ship=None):
+    """
+    A delta frame for a strike, see the module docstring
+
+    :param ship: The name of the ship the strike sank, or None
+    :type ship: str or None
+    """
+    frame = _delta.pack(DELTA, sequence, player, cell, result)
+    if ship is None:
+        return frame
+    name = ship.encode('utf-8')
+    return frame + bytes((len(name),)) + name
+
+
+def encode_keyframe(sequence, data):
+    """
+    A keyframe of an encoded game taken after the delta numbered sequence
+    """
+    return _head.pack(KEYFRAME, sequence) + data
+
+
+def decode_frame(frame):
+    """
+    Decodes a frame to a Delta or a Keyframe.
+    ship is the name of the ship a delta sank, otherwise None.
+    """
+    try:
+        kind, sequence = _head.unpack_from(frame, 0)
+        if kind == KEYFRAME:
+            return Keyframe(sequence, bytes(frame[_head.size:]))
+        if kind != DELTA:
+            raise SerializationError('Unknown frame kind {}'.format(kind))
+        _, sequence, player, cell, result = _delta.unpack_from(frame, 0)
+        ship = None
+        if result & SUNK:
+            size = frame[_delta.size]
+            ship = bytes(frame[_delta.size + 1:_delta.size + 1 + size]).decode('utf-8')
+    except (IndexError, struct.error, UnicodeDecodeError) as e:
+        raise SerializationError('Truncated or corrupt frame: {}'.format(e))
+    return Delta(sequence, player, cell, result, ship)
+
+
+class Subscription(object):
+    """
+    A spectator of a Feed, returned by Game.subscribe
+
+    :param feed: The feed watched
+    :type feed: Feed
+    :param callback: Called with each frame as it's published, or None to pull them
+    :type callback: Callable[[bytes], None] or None
+    """
+
+    def __init__(self, feed, callback=None):
+        self.feed = feed
+        self.callback = callback
+        # the sequence number of the last frame seen
+        self.sequence = -1
+
+    def frames(self):
+        """
+        The frames published since the last call, starting with a keyframe
+        if the spectator is new or has fallen behind the latest keyframe.
+        """
+        frames = self.feed.since(self.sequence)
+        self.sequence = self.feed.sequence
+        return frames
+
+    def unsubscribe(self):
+        """
+        Stops the subscription, a pulling subscription can just be dropped
+        """
+        self.feed.unsubscribe(self)
+
+
+class Feed(object):
+    """
+    The frames of a game for its spectators, see Game.subscribe
+
+    :param game: The game watched
+    :type game: battlestern.games.Game
+    :param keyframe_interval: Deltas between keyframes,
+        which is also the most deltas a feed keeps
+    :type keyframe_interval: int
+    """
+
+    def __init__(self, game, keyframe_interval=64):
+        self.game = game
+        self.keyframe_interval = keyframe_interval
+        self.sequence = 0
+        self._callbacks = []
+        self.keyframe()
+
+    def __len__(self):
+        """
+        The number of spectators being pushed frames
+        """
+        return len(self._callbacks)
+
+    def subscribe(self, callback=None):
+        """
+        A new Subscription, a callback is pushed the latest keyframe straight away
+        and then every delta and keyframe as it's published.
+        """
+        subscription = Subscription(self, callback)
+        if callback is not None:
+            subscription.sequence = self.sequence
+            callback(self._keyframe)
+            self._callbacks.append(callback)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        if subscription.callback in self._callbacks:
+            self._callbacks.remove(subscription.callback)
+
+    def publish(self, player, cell, result, ship=None):
+        """
+        Encodes a strike once and sends the same frame to every callback,
+        taking a keyframe when one is due.
+        See encode_delta.
+        """
+        self.sequence += 1
+        frame = encode_delta(self.sequence, player, cell, result, ship)
+        self._deltas.append(frame)
+        for callback in self._callbacks:
+            callback(frame)
+        if len(self._deltas) >= self.keyframe_interval:
+            self.keyframe()
+
+    def reset(self):
+        """
+        Starts the feed over after the game is reset, with a keyframe numbered
+        after the last delta so every spectator picks it up.
+        """
+        self.sequence += 1
+        self.keyframe()
+
+    def keyframe(self):
+        """
+        Takes a keyframe of the game now and sends it to every callback
+        """
+        self._keyframe = encode_keyframe(self.sequence, self.game.to_bytes())
+        self._keyframe_sequence = self.sequence
+        self._deltas = []
+        for callback in self._callbacks:
+            callback(self._keyframe)
+
+    def since(self, sequence):
+        """
+        The frames after the one numbered sequence, or from the latest keyframe on
+        if that's before the latest keyframe
+        """
+        start = sequence - self._keyframe_sequence
+        if start < 0:
+            return [self._keyframe] + self._deltas
+        return self._deltas[start:]
+
+
+class Mirror(object):
+    """
+    A spectator's copy of a game, kept up to date from its frames
+
+    :param game_class: The class to rebuild the game with from a keyframe
+    :type game_class: type
+    """
+
+    def __init__(self, game_class=None):
+        if game_class is None:
+            from .games import Game as game_class
+        self.game_class = game_class
+        self.game = None
+        self.sequence = -1
+
+    def apply(self, frame):
+        """
+        Applies a frame, deltas before the first keyframe or already seen are ignored.
+        Returns the decoded Delta or Keyframe.
+        """
+        decoded = decode_frame(frame)
+        if isinstance(decoded, Keyframe):
+            self.game = self.game_class.from_bytes(decoded.data)
+            # the game being watched keeps the journal
+            self.game.log = None
+        elif self.game is not None and decoded.sequence > self.sequence:
+            if decoded.sequence != self.sequence + 1:
+                raise SerializationError('Missed frames {} to {}'.format(
+                    self.sequence + 1, decoded.sequence - 1))
+            self.game.apply_moves(((decoded.player, decoded.cell, decoded.result),))
+        else:
+            return decoded
+        self.sequence = decoded.sequence
+        return decoded
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Strategies choose where a player strikes next, for computer opponents and self-play.
+
+A strategy is a factory, called once per game with the board geometry and a
+random.Random to draw from, returning a callable that takes the player's
+tracking Board and returns the (col, row) to strike next.
+
+The callable may also have an `observe(coord, result, sunk, wreck)` method which is
+called after every strike with 'hit' or 'miss', the name of the ship the
+strike sank (or None) and the coordinates of that ship (or None),
+so a strategy can keep its own state up to date.
+
+Factories are passed to worker processes so must be importable,
+i.e. module level functions or classes.
+"""
+
+import random
+from collections import Counter
+from itertools import compress
+from typing import Callable, Dict, List, Tuple, Union
+
+from .geometry import Geometry
+from .placement import PlacementEngine, placement_table
+from .ships import Fleet
+
+
+def random_strategy(geometry: Geometry,
+                    rng: random.Random) -> Callable[..., Tuple[str, int]]:
+    """
+    Strikes every coordinate once in a random order,
+    a baseline that never wastes a shot but takes no notice of hits.
+    """
+    order = list(range(geometry.area))
+    rng.shuffle(order)
+
+    def choose(board):
+        return geometry.coord(order.pop())
+    return choose
+
+
+def hunt_target_strategy(geometry: Geometry,
+                         rng: random.Random) -> Callable[..., Tuple[str, int]]:
+    """
+    Strikes next to an open hit while there is one, to finish off a ship it has found,
+    otherwise a random unshot coordinate.
+    Both come from the board's query indexes, so a turn costs the same
+    however big the board is.
+    """
+    def choose(board):
+        candidates = board.candidates()
+        if candidates:
+            return rng.choice(candidates)
+        return board.random_unshot(rng)
+    return choose
+
+
+class DensityStrategy(object):
+    """
+    Strikes the coordinate covered by the most remaining legal placements
+    of the ships still afloat, a strong reference opponent.
+
+    For every ship length still afloat it keeps the placements that don't cover
+    a miss or a sunk ship, and a density map counting the placements covering
+    each coordinate. Placements covering open hits (hits on ships not yet sunk)
+    are weighted by hit_weight per hit, so it finishes off a ship once it finds one.
+    The map is updated incrementally by `observe`, only placements through the
+    struck coordinate, i.e. in its row and column, are touched. A sink also
+    drops one ship of that length from the whole map.
+
+    All placements of every ship are listed up front, so this suits the classic
+    sized boards rather than very large ones.
+
+    :param geometry: The dimensions of the board
+    :type geometry: battlestern.geometry.Geometry
+    :param rng: Unused, the strategy is deterministic given the strikes it observes
+    :type rng: random.Random
+    """
+
+    hit_weight: int = 20
+
+    def __init__(self, geometry: Geometry, rng: random.Random = None) -> None:
+        self.geometry = geometry
+        self._shiplengths = Fleet.shiplengths()
+        self._afloat = Counter(self._shiplengths.values())
+        self._unshot = bytearray(b'\x01') * geometry.area
+        self._open = set()
+        self.density = [0] * geometry.area
+        # per ship length, placements as tuples of cell indexes, the placements
+        # covering each cell, whether a placement is live, its open hits
+        # and the density map of that length alone
+        self._placements: Dict[int, List[Tuple[int, ...]]] = {}
+        self._covering: Dict[int, List[List[int]]] = {}
+        self._live: Dict[int, bytearray] = {}
+        self._hits: Dict[int, List[int]] = {}
+        self._partial: Dict[int, List[int]] = {}
+        engine = PlacementEngine(geometry)
+        for length, ships in self._afloat.items():
+            table = placement_table(geometry, length)
+            if table is None:
+                cells = (tuple(engine.cells(length, slot)) for slot in engine.slots(length))
+            else:
+                cells = table.cells
+            # a ship of length 1 is the same placement either way round
+            placements = list(dict.fromkeys(cells))
+            covering = [[] for _ in range(geometry.area)]
+            for number, cells in enumerate(placements):
+                for cell in cells:
+                    covering[cell].append(number)
+            partial = [len(numbers) for numbers in covering]
+            self._placements[length] = placements
+            self._covering[length] = covering
+            self._live[length] = bytearray(b'\x01') * len(placements)
+            self._hits[length] = [0] * len(placements)
+            self._partial[length] = partial
+            for cell, count in enumerate(partial):
+                self.density[cell] += ships * count
+
+    def __call__(self, board) -> Tuple[str, int]:
+        density = self.density
+        cell = max(compress(range(len(density)), self._unshot),
+                   key=density.__getitem__)
+        return self.geometry.coord(cell)
+
+    def observe(self,
+                coord: Tuple[str, int],
+                result: str,
+                sunk: Union[str, None],
+                wreck: Union[List[Tuple[str, int]], None] = None) -> None:
+        cell = self.geometry.index(coord)
+        if not self._unshot[cell]:
+            return
+        self._unshot[cell] = 0
+        if result == 'miss':
+            self._block(cell)
+            return
+        self._open.add(cell)
+        for length, covering in self._covering.items():
+            live = self._live[length]
+            hits = self._hits[length]
+            for number in covering[cell]:
+                if live[number]:
+                    before = self.hit_weight ** hits[number]
+                    hits[number] += 1
+                    self._adjust(length, number, self.hit_weight ** hits[number] - before)
+        if sunk is not None:
+            self._sink(cell, self._shiplengths[sunk], wreck)
+
+    def _adjust(self, length: int, number: int, delta: int) -> None:
+        """
+        Changes the weight of a placement by delta in the density maps
+        """
+        partial = self._partial[length]
+        density = self.density
+        ships = self._afloat[length]
+        for cell in self._placements[length][number]:
+            partial[cell] += delta
+            density[cell] += ships * delta
+
+    def _block(self, cell: int) -> None:
+        """
+        Removes every placement covering a coordinate no ship afloat can occupy
+        """
+        for length, covering in self._covering.items():
+            live = self._live[length]
+            hits = self._hits[length]
+            for number in covering[cell]:
+                if live[number]:
+                    live[number] = 0
+                    self._adjust(length, number, -self.hit_weight ** hits[number])
+
+    def _sink(self, cell: int, length: int, wreck: Union[List[Tuple[str, int]], None]) -> None:
+        """
+        Takes a sunk ship out of the density map and blocks the coordinates of its wreck.
+        Without the wreck, it is taken to be the first live placement of its length
+        through the sinking strike that is entirely open hits, which may be wrong
+        when other ships' open hits are alongside.
+        """
+        if wreck is not None:
+            wreck = [self.geometry.index(coord) for coord in wreck]
+        else:
+            placements = self._placements[length]
+            wreck = (cell,)
+            for number in self._covering[length][cell]:
+                if self._live[length][number] and self._open.issuperset(placements[number]):
+                    wreck = placements[number]
+                    break
+        partial = self._partial[length]
+        density = self.density
+        for index, count in enumerate(partial):
+            density[index] -= count
+        self._afloat[length] -= 1
+        if not self._afloat[length]:
+            for table in (self._placements, self._covering, self._live,
+                          self._hits, self._partial):
+                del table[length]
+        for index in wreck:
+            self._open.discard(index)
+            self._block(index)
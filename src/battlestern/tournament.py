@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Round-robin and Swiss tournaments between strategies.
+
+A match between two strategies is a number of mirrored pairs of games.
+Both games of a pair are played on one random fleetroster, given to both
+fleets, and with the same seed, each strategy going first once,
+so neither side is favoured by its fleet or by the turn order.
+
+Matches are spread across a process pool a match at a time, so a worker that
+finishes a quick match takes the next one rather than waiting on slow bots.
+Every finished match is appended to a checkpoint file, NDJSON with the
+tournament's settings on the first line, and a tournament started again with
+the same file and settings picks up where it stopped.
+
+Standings are kept live as matches finish: match points, 1 for winning more
+games than the opponent, a half for a drawn match and 1 for a bye,
+and Elo ratings updated from the games of each match.
+
+e.g.
+from battlestern.strategies import random_strategy, hunt_target_strategy
+tournament = Tournament({'random': random_strategy, 'hunter': hunt_target_strategy},
+                        pairs=100, checkpoint='tournament.ndjson')
+for result in tournament.play():
+    print(tournament.standings())
+
+Strategies are passed to worker processes so must be importable,
+see battlestern.strategies.
+"""
+
+import json
+import math
+import os
+import random
+from collections import namedtuple
+from multiprocessing import Pool
+from os import cpu_count
+from typing import Callable, Dict, Iterator, List, Mapping, Tuple, Union
+
+from .exceptions import TournamentError
+from .games import Game
+from .geometry import Geometry, DEFAULT_GEOMETRY
+from .ships import Fleet
+from .simulation import play_game
+
+FORMATS = ('round-robin', 'swiss')
+
+MatchResult = namedtuple('MatchResult', ['round', 'player1', 'player2', 'wins', 'draws'])
+MatchResult.__doc__ = """
+The outcome of a match, or of a bye when player2 is None
+
+wins: the games won by player1 and player2
+draws: the games nobody won within max_shots
+"""
+
+Standing = namedtuple('Standing', ['name', 'points', 'rating', 'wins', 'losses', 'draws'])
+Standing.__doc__ = """
+A strategy's place in a tournament
+
+points: match points
+rating: Elo rating
+wins, losses, draws: games
+"""
+
+
+def round_robin(names: List[str]) -> List[List[Tuple[str, str]]]:
+    """
+    The rounds of a round-robin where every name meets every other once,
+    by the circle method. With an odd number of names one sits out each round.
+    """
+    names = list(names)
+    if len(names) % 2:
+        names.append(None)
+    rounds = []
+    for _ in range(len(names) - 1):
+        half = len(names) // 2
+        pairs = [(names[i], names[-1 - i]) for i in range(half)]
+        rounds.append([(a, b) for a, b in pairs if a is not None and b is not None])
+        # the first name stays put and the rest rotate
+        names.insert(1, names.pop())
+    return rounds
+
+
+def swiss_pairings(names: List[str],
+                   points: Mapping[str, float],
+                   ratings: Mapping[str, float],
+                   played: Mapping[str, set],
+                   byes: set) -> Tuple[List[Tuple[str, str]], Union[str, None]]:
+    """
+    Pairs names with the same or the nearest points, avoiding rematches where possible.
+    Names are paired down the standings, the highest placed with the next highest
+    they haven't met, backtracking when that leaves the rest with only rematches.
+
+    :param names: Every name in the tournament
+    :param points: Match points of each name
+    :param ratings: Ratings of each name, to order names on the same points
+    :param played: The names each name has already met
+    :param byes: The names that have already had a bye
+
+    Returns the pairs and the name given a bye, the lowest placed name without one
+    when there's an odd number, otherwise None.
+    """
+    ranked = sorted(names, key=lambda name: (-points[name], -ratings[name], name))
+    bye = None
+    if len(ranked) % 2:
+        bye = next((name for name in reversed(ranked) if name not in byes), ranked[-1])
+        ranked.remove(bye)
+    pairs = _pair(ranked, played, [10000])
+    if pairs is None:
+        # every pairing has a rematch, pair down the standings taking the first new opponent
+        pairs = []
+        while ranked:
+            first = ranked.pop(0)
+            opponent = next((name for name in ranked if name not in played[first]), ranked[0])
+            ranked.remove(opponent)
+            pairs.append((first, opponent))
+    return pairs, bye
+
+
+def _pair(ranked: List[str],
+          played: Mapping[str, set],
+          budget: List[int]) -> Union[List[Tuple[str, str]], None]:
+    """
+    Pairs the ranked names with no rematches, each with the highest placed opponent
+    that leaves the rest pairable, or None if there's no such pairing
+    within the budget of steps
+    """
+    if not ranked:
+        return []
+    first = ranked[0]
+    for position in range(1, len(ranked)):
+        budget[0] -= 1
+        if budget[0] < 0:
+            return None
+        opponent = ranked[position]
+        if opponent in played[first]:
+            continue
+        rest = _pair(ranked[1:position] + ranked[position + 1:], played, budget)
+        if rest is not None:
+            return [(first, opponent)] + rest
+    return None
+
+
+def match_seed(seed: int, number: int, player1: str, player2: str) -> int:
+    """
+    The seed of a match in round number, independent of which process plays it or when
+    """
+    return random.Random('{}:{}:{}:{}'.format(seed, number, player1, player2)).getrandbits(64)
+
+
+def play_match(strategy1: Callable,
+               strategy2: Callable,
+               pairs: int,
+               seed: int,
+               geometry: Geometry = None,
+               max_shots: Union[int, None] = None) -> Tuple[List[int], int]:
+    """
+    Plays mirrored pairs of games between two strategies.
+    One roster is generated per pair and used for both fleets in both games,
+    with strategy 1 going first in one and strategy 2 in the other.
+
+    Returns the games won by strategy 1 and 2 and the number of draws
+    """
+    geometry = geometry or DEFAULT_GEOMETRY
+    rng = random.Random(seed)
+    wins = [0, 0, 0]
+    game = Game(geometry=geometry, log=False)
+    for fleetroster in Fleet.random_rosters(pairs, geometry, rng):
+        seed = rng.getrandbits(64)
+        for first, second, sides in ((strategy1, strategy2, (0, 1, 2)),
+                                     (strategy2, strategy1, (0, 2, 1))):
+            winner, _ = play_game(first, second, seed=seed, geometry=geometry,
+                                  max_shots=max_shots, game=game,
+                                  player1fleet=fleetroster, player2fleet=fleetroster)
+            wins[sides[winner]] += 1
+    return wins[1:], wins[0]
+
+
+def _play_match_task(task: Tuple) -> MatchResult:
+    number, name1, name2, strategy1, strategy2, pairs, seed, geometry, max_shots = task
+    wins, draws = play_match(strategy1, strategy2, pairs, seed, geometry, max_shots)
+    return MatchResult(number, name1, name2, wins, draws)
+
+
+class Tournament(object):
+    """
+    A round-robin or Swiss tournament between strategies.
+
+    :param entrants: Names mapped to strategy factories, see battlestern.strategies
+    :type entrants: Mapping[str, Callable]
+    :param format: 'round-robin' or 'swiss'
+    :type format: str
+    :param rounds: The rounds of a Swiss tournament,
+        defaults to enough to separate the entrants, log2 of their number rounded up
+    :type rounds: int or None
+    :param pairs: Mirrored pairs of games per match
+    :type pairs: int
+    :param seed: The tournament seed, each match is seeded from it, its round and players
+    :type seed: int
+    :param checkpoint: An NDJSON file of the finished matches, resumed from if it exists
+    :type checkpoint: str or None
+    :param processes: Worker processes, defaults to one per CPU. 1 plays in this process.
+    :type processes: int or None
+    :param geometry: The dimensions of the board, defaults to the 10x10 grid
+    :type geometry: battlestern.geometry.Geometry
+    :param max_shots: Shots per player before a game is a draw, see simulation.play_game
+    :type max_shots: int or None
+    :param k: The Elo K-factor, the most a rating moves on one game
+    :type k: float
+    """
+
+    initial_rating = 1500.0
+
+    def __init__(self,
+                 entrants: Mapping[str, Callable],
+                 format: str = 'round-robin',
+                 rounds: Union[int, None] = None,
+                 pairs: int = 50,
+                 seed: int = 0,
+                 checkpoint: Union[str, None] = None,
+                 processes: Union[int, None] = None,
+                 geometry: Geometry = None,
+                 max_shots: Union[int, None] = None,
+                 k: float = 16.0) -> None:
+        if format not in FORMATS:
+            raise TournamentError('format must be one of {}'.format(', '.join(FORMATS)))
+        if len(entrants) < 2:
+            raise TournamentError('A tournament needs at least two entrants')
+        self.entrants = dict(entrants)
+        self.names = sorted(self.entrants)
+        self.format = format
+        if format == 'swiss':
+            self.rounds = rounds or max(1, math.ceil(math.log2(len(self.names))))
+        else:
+            self.rounds = len(round_robin(self.names))
+        self.pairs = pairs
+        self.seed = seed
+        self.checkpoint = checkpoint
+        self.processes = processes or cpu_count() or 1
+        self.geometry = geometry or DEFAULT_GEOMETRY
+        self.max_shots = max_shots
+        self.k = k
+        self.points = {name: 0.0 for name in self.names}
+        self.ratings = {name: self.initial_rating for name in self.names}
+        self.games = {name: [0, 0, 0] for name in self.names}
+        self.played = {name: set() for name in self.names}
+        self.byes = set()
+        self.results: List[MatchResult] = []
+        self._file = None
+
+    @property
+    def settings(self) -> Dict:
+        """
+        What a checkpoint file must match to be resumed
+        """
+        return {'format': self.format, 'entrants': self.names, 'rounds': self.rounds,
+                'pairs': self.pairs, 'seed': self.seed,
+                'geometry': [self.geometry.width, self.geometry.height],
+                'max_shots': self.max_shots}
+
+    def standings(self) -> List[Standing]:
+        """
+        The entrants by match points then rating
+        """
+        standings = [Standing(name, self.points[name], self.ratings[name], *self.games[name])
+                     for name in self.names]
+        standings.sort(key=lambda standing: (-standing.points, -standing.rating, standing.name))
+        return standings
+
+    def record(self, result: MatchResult) -> None:
+        """
+        Updates the standings with a finished match or bye
+        """
+        self.results.append(result)
+        name1, name2 = result.player1, result.player2
+        if name2 is None:
+            self.points[name1] += 1
+            self.byes.add(name1)
+            return
+        wins1, wins2 = result.wins
+        games = wins1 + wins2 + result.draws
+        self.played[name1].add(name2)
+        self.played[name2].add(name1)
+        self.points[name1] += 1 if wins1 > wins2 else 0.5 if wins1 == wins2 else 0
+        self.points[name2] += 1 if wins2 > wins1 else 0.5 if wins1 == wins2 else 0
+        for name, won, lost in ((name1, wins1, wins2), (name2, wins2, wins1)):
+            self.games[name][0] += won
+            self.games[name][1] += lost
+            self.games[name][2] += result.draws
+        if games:
+            expected = 1 / (1 + 10 ** ((self.ratings[name2] - self.ratings[name1]) / 400))
+            change = self.k * (wins1 + 0.5 * result.draws - games * expected)
+            self.ratings[name1] += change
+            self.ratings[name2] -= change
+
+    def _resume(self) -> None:
+        """
+        Records the matches in the checkpoint file and opens it for appending,
+        dropping a last line cut short by a crash
+        """
+        if self.checkpoint is None:
+            return
+        good = 0
+        if os.path.exists(self.checkpoint):
+            with open(self.checkpoint, 'rb') as stored:
+                lines = stored.read().split(b'\n')
+            # the part after the last newline is empty, or a line that wasn't finished
+            for number, line in enumerate(lines[:-1]):
+                try:
+                    data = json.loads(line)
+                except ValueError:
+                    break
+                if number == 0:
+                    if data != self.settings:
+                        raise TournamentError('{} is the checkpoint of another tournament'
+                                              .format(self.checkpoint))
+                else:
+                    self.record(MatchResult(data['round'], data['player1'], data['player2'],
+                                            data['wins'], data['draws']))
+                good += len(line) + 1
+        self._file = open(self.checkpoint, 'ab')
+        self._file.truncate(good)
+        if not good:
+            self._write(self.settings)
+
+    def _write(self, data: Dict) -> None:
+        if self._file is None:
+            return
+        self._file.write(json.dumps(data).encode('utf-8') + b'\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _finished(self, result: MatchResult) -> None:
+        self.record(result)
+        self._write(result._asdict())
+
+    def _schedule(self) -> Iterator[List[Tuple[int, str, str]]]:
+        """
+        Batches of (round, player1, player2) still to play, a batch can be played at once.
+        A round-robin is one batch, a Swiss round depends on the one before so is a batch each.
+        """
+        done = {(result.round, result.player1, result.player2) for result in self.results}
+        if self.format == 'round-robin':
+            yield [(number, a, b) for number, pairs in enumerate(round_robin(self.names), 1)
+                   for a, b in pairs if (number, a, b) not in done]
+            return
+        for number in range(1, self.rounds + 1):
+            finished = [result for result in self.results if result.round == number]
+            if finished:
+                # the round was paired before the crash, play the rest of its pairs
+                matches = [(number, a, b) for a, b in self._paired[number]
+                           if (number, a, b) not in done]
+            else:
+                pairs, bye = swiss_pairings(self.names, self.points, self.ratings,
+                                            self.played, self.byes)
+                if bye is not None:
+                    self._finished(MatchResult(number, bye, None, [0, 0], 0))
+                matches = [(number, a, b) for a, b in pairs]
+            yield matches
+
+    @property
+    def _paired(self) -> Dict[int, List[Tuple[str, str]]]:
+        """
+        The pairs of each Swiss round, recomputed from the results before it
+        """
+        replay = Tournament(self.entrants, 'swiss', self.rounds, self.pairs, self.seed,
+                            geometry=self.geometry, max_shots=self.max_shots, k=self.k)
+        paired = {}
+        for number in range(1, self.rounds + 1):
+            pairs, bye = swiss_pairings(replay.names, replay.points, replay.ratings,
+                                        replay.played, replay.byes)
+            paired[number] = pairs
+            for result in self.results:
+                if result.round == number:
+                    replay.record(result)
+        return paired
+
+    def play(self) -> Iterator[MatchResult]:
+        """
+        Plays the matches not yet in the checkpoint, yielding each result as it finishes,
+        with the standings already updated
+        """
+        self._resume()
+        try:
+            pool = Pool(self.processes) if self.processes > 1 else None
+            try:
+                for batch in self._schedule():
+                    tasks = ((number, a, b, self.entrants[a], self.entrants[b], self.pairs,
+                              match_seed(self.seed, number, a, b), self.geometry,
+                              self.max_shots)
+                             for number, a, b in batch)
+                    if pool is None:
+                        results = map(_play_match_task, tasks)
+                    else:
+                        results = pool.imap_unordered(_play_match_task, tasks, chunksize=1)
+                    for result in results:
+                        self._finished(result)
+                        yield result
+            finally:
+                if pool is not None:
+                    pool.terminate()
+        finally:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def run(self) -> List[Standing]:
+        """
+        Plays the whole tournament, returning the final standings
+        """
+        for _ in self.play():
+            pass
+        return self.standings()
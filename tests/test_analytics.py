@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+tests for battlestern.analytics
+
+Usage
+Run this suite only
+python -m unittest tests/test_analytics.py
+
+Test Discovery
+python -m unittest
+"""
+import os
+import random
+import sys
+from unittest import TestCase, main
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.battlestern.analytics import GameStats, analyse, log_games
+from src.battlestern.exceptions import SerializationError
+from src.battlestern.games import Game
+from src.battlestern.geometry import Geometry
+from src.battlestern.serialization import encode_roster
+from src.battlestern.ships import Fleet
+
+
+def finished_game(seed, geometry=None):
+    game = Game(seed=seed, geometry=geometry)
+    rng = random.Random(seed)
+    cells = [game.geometry.coord(index) for index in range(game.geometry.area)]
+    while not (game.player1.fleet.all_sunk or game.player2.fleet.all_sunk):
+        player = game.player1 if game.turn == 1 else game.player2
+        game.strike(player, rng.choice(cells))
+    return game
+
+
+class GameStatsTestCase(TestCase):
+    def expected(self, games):
+        """
+        The stats worked out the slow way, from the games themselves
+        """
+        shipyard = list(Fleet.shipyard)
+        stats = GameStats(games[0].geometry)
+        area = stats.geometry.area
+        index = stats.geometry.index
+        for game in games:
+            stats.games += 1
+            for player in (game.player1, game.player2):
+                stats.fleets += 1
+                for ship, coords in player.fleet.armada.items():
+                    for coord in coords:
+                        stats.placements[shipyard.index(ship) * area + index(coord)] += 1
+                for coord, result in player.board.coords.items():
+                    stats.shots[index(coord)] += 1
+                    stats.hits[index(coord)] += result == 'hit'
+            replay = Game(player1fleet=game.player1.fleet._fleetroster,
+                          player2fleet=game.player2.fleet._fleetroster,
+                          geometry=game.geometry, log=False)
+            taken = {1: 0, 2: 0}
+            found = {1: {}, 2: {}}
+            for number, cell, _ in game.log:
+                player = replay.player1 if number == 1 else replay.player2
+                taken[number] += 1
+                coord = replay.geometry.coord(cell)
+                dejavu = player.board.get_coord(coord) is not None
+                result, message = replay.strike(player, coord)
+                if result == 'miss' or dejavu:
+                    continue
+                ship = player.opponent.fleet.ship_at(coord)
+                kind = shipyard.index(ship)
+                if not found[number]:
+                    stats.first_hit[min(taken[number], area)] += 1
+                if ship not in found[number]:
+                    found[number][ship] = taken[number]
+                    stats.ship_found[kind * stats.bins + min(taken[number], area)] += 1
+                if message.startswith('You sank'):
+                    shots = taken[number] - found[number][ship] + 1
+                    stats.to_sink[kind * stats.bins + min(shots, area)] += 1
+        return stats
+
+    def assertSameStats(self, stats, expected):
+        self.assertEqual((stats.games, stats.fleets), (expected.games, expected.fleets))
+        for name in GameStats.arrays:
+            self.assertEqual(getattr(stats, name), getattr(expected, name), name)
+
+    def test_logs(self):
+        games = [finished_game(seed) for seed in range(6)]
+        stats = analyse(log_games(game.log for game in games))
+        self.assertSameStats(stats, self.expected(games))
+        self.assertEqual(stats.games, 6)
+        self.assertEqual(sum(stats.first_hit), 12)
+        self.assertEqual(sum(stats.placement('carrier')), 12 * 5)
+        self.assertEqual(sum(stats.found_after('patrol')), sum(stats.sunk_after('patrol')))
+        # a patrol is sunk by the shot that finds it
+        self.assertEqual(stats.sunk_after('patrol')[1], sum(stats.sunk_after('patrol')))
+
+    def test_encoded_rosters(self):
+        games = [finished_game(seed) for seed in range(3)]
+        stored = [(encode_roster(game.player1.fleet._fleetroster),
+                   encode_roster(game.player2.fleet._fleetroster),
+                   list(game.log)) for game in games]
+        self.assertSameStats(analyse(stored), self.expected(games))
+
+    def test_geometry(self):
+        geometry = Geometry(12, 8)
+        games = [finished_game(seed, geometry) for seed in range(3)]
+        stats = analyse(log_games(game.log for game in games), geometry=geometry)
+        self.assertSameStats(stats, self.expected(games))
+        with self.assertRaises(SerializationError):
+            GameStats().merge(stats)
+
+    def test_merge(self):
+        games = [finished_game(seed) for seed in range(5)]
+        stats = analyse(log_games(game.log for game in games[:2]))
+        stats.merge(analyse(log_games(game.log for game in games[2:])))
+        self.assertSameStats(stats, analyse(log_games(game.log for game in games)))
+
+    def test_processes(self):
+        games = [finished_game(seed) for seed in range(7)]
+        stats = analyse(log_games(game.log for game in games), processes=2, chunksize=2)
+        self.assertSameStats(stats, analyse(log_games(game.log for game in games)))
+
+    def test_bytes(self):
+        games = [finished_game(seed) for seed in range(2)]
+        stats = analyse(log_games(game.log for game in games))
+        self.assertSameStats(GameStats.from_bytes(stats.to_bytes()), stats)
+        with self.assertRaises(SerializationError):
+            GameStats.from_bytes(stats.to_bytes(), geometry=Geometry(5, 5))
+
+    def test_rosters(self):
+        stats = GameStats()
+        for fleetroster in Fleet.random_rosters(20, seed=1):
+            stats.add_roster(fleetroster)
+        self.assertEqual(stats.fleets, 20)
+        self.assertEqual(stats.games, 0)
+        self.assertEqual(sum(stats.placements), 20 * 15)
+
+    def test_log_without_start(self):
+        game = finished_game(1)
+        game.log.checkpoints.pop(0)
+        with self.assertRaises(SerializationError):
+            list(log_games([game.log]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+tests for battlestern.arena
+
+Usage
+Run this suite only
+python -m unittest tests/test_arena.py
+
+Test Discovery
+python -m unittest
+"""
+import multiprocessing
+import os
+import pickle
+import random
+import sys
+from unittest import TestCase, main, skipUnless
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.battlestern.arena import Arena, ArenaGame
+from src.battlestern.exceptions import ArenaError, BoardError, TurnError
+from src.battlestern.games import Game
+from src.battlestern.geometry import Geometry
+
+
+def play(game, rng, shots=None):
+    cells = [game.geometry.coord(index) for index in range(game.geometry.area)]
+    while shots != 0 and not (game.player1.fleet.all_sunk or game.player2.fleet.all_sunk):
+        player = game.player1 if game.turn == 1 else game.player2
+        game.strike(player, rng.choice(cells))
+        if shots is not None:
+            shots -= 1
+
+
+def play_slot(arena, slot):
+    """
+    Plays out the game in a slot, in a worker process
+    """
+    game = arena.game(slot)
+    play(game, random.Random(slot))
+    return slot, game.turn
+
+
+class ArenaTestCase(TestCase):
+    def setUp(self):
+        self.arena = Arena(slots=8)
+
+    def tearDown(self):
+        self.arena.close()
+        self.arena.unlink()
+
+    def assertSameGame(self, game, other):
+        self.assertEqual(other.turn, game.turn)
+        for player, viewed in ((game.player1, other.player1),
+                               (game.player2, other.player2)):
+            self.assertEqual(viewed.name, player.name)
+            self.assertEqual(viewed.board.coords, player.board.coords)
+            self.assertEqual(viewed.fleet.armada, player.fleet.armada)
+            self.assertEqual(viewed.fleet.all_sunk, player.fleet.all_sunk)
+
+    def test_store(self):
+        for compact in (False, True):
+            game = Game(player1name='Eddy', seed=1, compact=compact, log=False)
+            play(game, random.Random(2), shots=45)
+            slot = self.arena.store(game)
+            viewed = self.arena.game(slot)
+            self.assertIsInstance(viewed, ArenaGame)
+            self.assertSameGame(game, viewed)
+            self.assertSameGame(game, Game.from_bytes(viewed.to_bytes()))
+
+    def test_in_place(self):
+        slot = self.arena.new_game(seed=3)
+        game = self.arena.game(slot)
+        other = self.arena.game(slot)
+        result, message = game.strike(game.player1, ('a', 1))
+        self.assertEqual(other.turn, 2)
+        self.assertEqual(other.player1.board.get_coord(('a', 1)), result)
+        self.assertEqual(other.player2.fleet.armada, game.player2.fleet.armada)
+        self.assertEqual(game.strike(game.player1, ('a', 1))[0], result)
+        self.assertEqual(game.player1.board.mark_strike(('a', 1), result), 'Dejavu')
+        with self.assertRaises(BoardError):
+            game.strike(game.player2, ('k', 1))
+
+    def test_matches_game(self):
+        game = Game(seed=4, log=False)
+        viewed = self.arena.game(self.arena.store(game))
+        play(game, random.Random(5))
+        play(viewed, random.Random(5))
+        self.assertSameGame(game, viewed)
+        self.assertEqual(viewed.player1.board.sunk, game.player1.board.sunk)
+        self.assertEqual(self.arena.game(viewed.slot).player1.board.open_hits(),
+                         game.player1.board.open_hits())
+
+    def test_reset(self):
+        slot = self.arena.new_game(seed=6, player1name='Eddy')
+        game = self.arena.game(slot)
+        play(game, random.Random(7), shots=30)
+        roster = Game(seed=8).player1.fleet._fleetroster
+        game.reset(player1fleet=roster, seed=9)
+        fresh = Game(player1fleet=roster, seed=9, log=False)
+        self.assertEqual(game.turn, 1)
+        self.assertEqual(game.player1.name, 'Eddy')
+        self.assertEqual(game.player1.board.coords, {})
+        self.assertEqual(self.arena.game(slot).player1.fleet.armada, fresh.player1.fleet.armada)
+        self.assertEqual(self.arena.game(slot).player2.fleet.armada, fresh.player2.fleet.armada)
+
+    def test_allocate(self):
+        slots = [self.arena.new_game(seed=seed) for seed in range(8)]
+        self.assertEqual(slots, list(range(8)))
+        with self.assertRaises(ArenaError):
+            self.arena.new_game()
+        self.arena.release(3)
+        with self.assertRaises(ArenaError):
+            self.arena.game(3)
+        self.assertEqual(self.arena.new_game(seed=10), 3)
+        with self.assertRaises(ArenaError):
+            self.arena.game(8)
+
+    def test_stats(self):
+        for seed in range(5):
+            slot = self.arena.new_game(seed=seed)
+            play(self.arena.game(slot), random.Random(seed), shots=None if seed < 2 else 20)
+        summaries = list(self.arena.scan())
+        self.assertEqual([summary.finished for summary in summaries],
+                         [True, True, False, False, False])
+        # repeated shots aren't counted
+        game = self.arena.game(3)
+        self.assertEqual(summaries[3].shots, (len(game.player1.board.coords),
+                                              len(game.player2.board.coords)))
+        stats = self.arena.stats()
+        self.assertEqual(stats.games, 5)
+        self.assertEqual(stats.finished, 2)
+        self.assertEqual(stats.shots, sum(sum(summary.shots) for summary in summaries))
+        self.arena.release(0)
+        self.assertEqual(self.arena.stats().games, 4)
+
+    def test_attach(self):
+        slot = self.arena.new_game(seed=11)
+        game = self.arena.game(slot)
+        game.strike(game.player1, ('c', 3))
+        attached = pickle.loads(pickle.dumps(self.arena))
+        self.assertEqual(attached.name, self.arena.name)
+        self.assertSameGame(game, attached.game(slot))
+        attached.close()
+
+    def test_geometry(self):
+        geometry = Geometry(12, 7)
+        arena = Arena(slots=2, geometry=geometry)
+        try:
+            game = Game(geometry=geometry, seed=12, log=False)
+            play(game, random.Random(13), shots=25)
+            attached = Arena(name=arena.name)
+            self.assertEqual(attached.geometry, geometry)
+            self.assertSameGame(game, attached.game(arena.store(game)))
+            attached.close()
+            with self.assertRaises(ArenaError):
+                self.arena.store(game)
+        finally:
+            arena.close()
+            arena.unlink()
+
+    def test_names(self):
+        with self.assertRaises(ArenaError):
+            self.arena.new_game(player1name='A name much too long')
+        game = self.arena.game(self.arena.new_game(player1name='Sam', player2name='Sam'))
+        self.assertEqual((game.player1.name, game.player2.name), ('Sam', 'Sam_1'))
+
+    def test_concurrent(self):
+        game = self.arena.game(self.arena.new_game(seed=14), concurrent=True)
+        game.strike(game.player1, ('a', 1))
+        with self.assertRaises(TurnError):
+            game.strike(game.player1, ('a', 2))
+
+    @skipUnless('fork' in multiprocessing.get_all_start_methods(), 'needs fork')
+    def test_workers(self):
+        slots = [self.arena.new_game(seed=seed) for seed in range(8)]
+        with multiprocessing.get_context('fork').Pool(2) as pool:
+            played = sorted(pool.starmap(play_slot, [(self.arena, slot) for slot in slots]))
+        self.assertEqual(self.arena.stats().finished, 8)
+        for slot, turn in played:
+            game = Game.from_bytes(self.arena.game(slot).to_bytes())
+            self.assertEqual(game.turn, turn)
+            self.assertTrue(game.player1.fleet.all_sunk or game.player2.fleet.all_sunk)
+
+
+if __name__ == '__main__':
+    main()
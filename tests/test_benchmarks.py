@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+tests for the benchmark runner in benchmarks/run.py
+
+Usage
+Run this suite only
+python -m unittest tests/test_benchmarks.py
+
+Test Discovery
+python -m unittest
+"""
+import os
+import sys
+from unittest import TestCase, main
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from benchmarks.run import BENCHMARKS, compare, run
+
+
+class BenchmarkTestCase(TestCase):
+    def test_every_benchmark_runs(self):
+        for name, (group, setup) in BENCHMARKS.items():
+            if group != 'startup':
+                setup()()
+
+    def test_run(self):
+        results = run('coordinate', repeat=2, min_time=0.001)
+        self.assertEqual(list(results['benchmarks']), ['coordinate'])
+        self.assertGreater(results['benchmarks']['coordinate']['best'], 0)
+
+    def test_import_time(self):
+        results = run('import_package', repeat=1)
+        self.assertLess(results['benchmarks']['import_package']['best'], 1.0)
+
+    def test_compare_flags_regressions(self):
+        baseline = {'benchmarks': {'a': {'best': 1.0}, 'b': {'best': 1.0}}}
+        current = {'benchmarks': {'a': {'best': 1.05}, 'b': {'best': 1.5}, 'new': {'best': 1.0}}}
+        rows = compare(baseline, current, threshold=0.10)
+        self.assertEqual([(row['name'], row['regression']) for row in rows],
+                         [('a', False), ('b', True)])
+        self.assertAlmostEqual(rows[1]['change'], 0.5)
+
+
+if __name__ == '__main__':
+    main()
@@ -1 +1,160 @@
-#!/usr/bin/env python3
\ No newline at end of file
+#!/usr/bin/env python3
+"""
+tests for battlestern.boards
+
+Usage
+Run this suite only
+python -m unittest tests/test_boards.py
+
+Test Discovery
+python -m unittest
+"""
+import os
+import random
+import sys
+from unittest import TestCase, main
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.battlestern.boards import Board, BitBoard, BoardError
+from src.battlestern.games import Game
+from src.battlestern.geometry import Geometry
+
+
+class BoardTestCase(TestCase):
+    def setUp(self):
+        self.board = Board()
+
+    def test_new_board_is_unknown(self):
+        self.assertIsNone(self.board.get_coord(('a', 1)))
+
+    def test_off_board(self):
+        with self.assertRaises(BoardError):
+            self.board.get_coord(('k', 1))
+        with self.assertRaises(BoardError):
+            self.board.mark_strike(('a', 11), 'miss')
+
+    def test_mark_strike(self):
+        self.assertIsNone(self.board.mark_strike(('c', 3), 'hit'))
+        self.assertEqual(self.board.get_coord(('c', 3)), 'hit')
+
+    def test_dejavu(self):
+        self.board.mark_strike(('c', 3), 'miss')
+        self.assertEqual(self.board.mark_strike(('c', 3), 'hit'), 'Dejavu')
+        self.assertEqual(self.board.get_coord(('c', 3)), 'miss')
+
+    def test_large_board(self):
+        board = type(self.board)(geometry=Geometry(width=1000, height=1000))
+        self.assertIsNone(board.mark_strike(('alk', 999), 'hit'))
+        self.assertEqual(board.get_coord(('alk', 999)), 'hit')
+        self.assertEqual(board.coords, {('alk', 999): 'hit'})
+
+    def test_reset(self):
+        self.board.mark_strike(('c', 3), 'hit')
+        self.board.reset()
+        self.assertIsNone(self.board.get_coord(('c', 3)))
+        self.assertEqual(self.board.coords, {})
+
+    def test_random_unshot(self):
+        geometry = Geometry(width=3, height=2)
+        board = type(self.board)(geometry=geometry)
+        rng = random.Random(1)
+        struck = set()
+        while board.unshot_count():
+            coord = board.random_unshot(rng)
+            self.assertNotIn(coord, struck)
+            board.mark_strike(coord, 'miss')
+            struck.add(coord)
+        self.assertEqual(len(struck), 6)
+        self.assertIsNone(board.random_unshot(rng))
+
+    def test_index_built_after_strikes(self):
+        self.board.mark_strike(('c', 3), 'hit')
+        self.assertEqual(self.board.unshot_count(), 99)
+        self.board.mark_strike(('c', 4), 'miss')
+        self.board.mark_strike(('c', 4), 'hit')
+        self.assertEqual(self.board.unshot_count(), 98)
+
+    def test_open_hits_and_candidates(self):
+        for coord, result in [(('a', 1), 'hit'), (('b', 1), 'miss'),
+                              (('e', 5), 'hit'), (('e', 6), 'hit')]:
+            self.board.mark_strike(coord, result)
+        self.assertEqual(self.board.open_hits(), [('a', 1), ('e', 5), ('e', 6)])
+        self.assertEqual(self.board.candidates(),
+                         [('a', 2), ('e', 4), ('d', 5), ('f', 5), ('d', 6), ('f', 6), ('e', 7)])
+        self.board.mark_sunk([('e', 5), ('e', 6)])
+        self.assertEqual(self.board.open_hits(), [('a', 1)])
+        self.assertEqual(self.board.candidates(), [('a', 2)])
+        self.board.mark_strike(('a', 2), 'hit')
+        self.assertEqual(self.board.candidates(), [('b', 2), ('a', 3)])
+
+    def test_sunk_before_index(self):
+        self.board.mark_strike(('j', 10), 'hit')
+        self.board.mark_sunk([('j', 10)])
+        self.assertEqual(self.board.open_hits(), [])
+        self.board.reset()
+        self.assertEqual(self.board.sunk, [])
+        self.assertEqual(self.board.unshot_count(), 100)
+
+    def test_row_and_col_counts(self):
+        for coord, result in [(('a', 1), 'hit'), (('b', 1), 'miss'), (('a', 2), 'miss')]:
+            self.board.mark_strike(coord, result)
+        self.assertEqual(self.board.row_count(1), 2)
+        self.assertEqual(self.board.row_count(1, 'hit'), 1)
+        self.assertEqual(self.board.col_count('a', 'miss'), 1)
+        self.assertEqual(self.board.col_count('j'), 0)
+        with self.assertRaises(BoardError):
+            self.board.row_count(11)
+        with self.assertRaises(BoardError):
+            self.board.col_count('k')
+
+    def test_indexes_match_scan(self):
+        game = Game(compact=type(self.board) is BitBoard, seed=3, log=False)
+        board = game.player1.board
+        board.unshot_count()
+        rng = random.Random(3)
+        fleet = game.player2.fleet
+        for cell in rng.sample(range(100), 70):
+            game.strike(game.player1, game.geometry.coord(cell))
+            coords = board.coords
+            self.assertEqual(board.unshot_count(), 100 - len(coords))
+            hits = {coord for coord, result in coords.items() if result == 'hit'}
+            open_hits = {coord for coord in hits if not fleet.is_sunk(fleet.ship_at(coord))}
+            self.assertEqual(set(board.open_hits()), open_hits)
+            for row in game.geometry.rows:
+                self.assertEqual(board.row_count(row, 'hit'),
+                                 sum(1 for _, hit in hits if hit == row))
+
+
+class BitBoardTestCase(BoardTestCase):
+    def setUp(self):
+        self.board = BitBoard()
+
+    def test_coords_match_board(self):
+        board = Board()
+        for coord, result in [(('a', 1), 'hit'), (('j', 10), 'miss'), (('e', 7), 'hit')]:
+            board.mark_strike(coord, result)
+            self.board.mark_strike(coord, result)
+        self.assertEqual(self.board.coords, board.coords)
+
+    def test_snapshot_restore(self):
+        self.board.mark_strike(('b', 2), 'hit')
+        snapshot = self.board.snapshot()
+        self.board.mark_strike(('b', 3), 'miss')
+        self.board.restore(snapshot)
+        self.assertEqual(self.board.get_coord(('b', 2)), 'hit')
+        self.assertIsNone(self.board.get_coord(('b', 3)))
+
+    def test_restore_keeps_standing_wrecks(self):
+        self.board.mark_strike(('b', 2), 'hit')
+        self.board.mark_sunk([('b', 2)])
+        snapshot = self.board.snapshot()
+        self.board.mark_strike(('d', 4), 'hit')
+        self.board.mark_sunk([('d', 4)])
+        self.board.restore(snapshot)
+        self.assertEqual(self.board.sunk, [(('b', 2),)])
+        self.assertEqual(self.board.unshot_count(), 99)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+tests for concurrent games, Game(concurrent=True), hammered from many threads
+
+Usage
+Run this suite only
+python -m unittest tests/test_concurrency.py
+
+Test Discovery
+python -m unittest
+"""
+import os
+import random
+import sys
+import threading
+from collections import Counter
+from unittest import TestCase, main
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.battlestern.games import Game, TurnError, HIT, DEJAVU
+
+THREADS = 16
+ATTEMPTS = 1500
+
+
+class ConcurrentGameTestCase(TestCase):
+    def setUp(self):
+        self.switchinterval = sys.getswitchinterval()
+        # switch threads as often as possible to provoke races
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.switchinterval)
+
+    def hammer(self, games):
+        """
+        Strikes random games, players and coordinates from many threads at once,
+        returning the strikes each game accepted
+        """
+        accepted = Counter()
+        rejected = Counter()
+        start = threading.Barrier(THREADS)
+        lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            counts = Counter()
+            refused = 0
+            start.wait()
+            for _ in range(ATTEMPTS):
+                number = rng.randrange(len(games))
+                game = games[number]
+                player = rng.choice((game.player1, game.player2))
+                coord = (rng.choice('abcdefghij'), rng.randint(1, 10))
+                try:
+                    game.strike(player, coord)
+                except TurnError:
+                    refused += 1
+                else:
+                    counts[number] += 1
+            with lock:
+                accepted.update(counts)
+                rejected[None] += refused
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertGreater(rejected[None], 0)
+        return accepted
+
+    def check_invariants(self, game, accepted):
+        records = list(game.log)
+        self.assertEqual(len(records), accepted)
+        # turns strictly alternate, player 1 first
+        self.assertEqual([number for number, _, _ in records],
+                         [1 + position % 2 for position in range(len(records))])
+        for player in (game.player1, game.player2):
+            fleet = player.opponent.fleet
+            moves = [(cell, result) for number, cell, result in records
+                     if number == player.number]
+            cells = [cell for cell, _ in moves]
+            # a shot is flagged as a repeat exactly when its cell was struck before
+            self.assertEqual([bool(result & DEJAVU) for _, result in moves],
+                             [cell in cells[:position] for position, cell in enumerate(cells)])
+            board = player.board.coords
+            self.assertEqual(len(board), len(set(cells)))
+            hits = {coord for coord, result in board.items() if result == 'hit'}
+            damaged = {coord for coords in fleet.armada.values()
+                       for coord, status in coords.items() if status == 'damaged'}
+            self.assertEqual(hits, damaged)
+            self.assertEqual(sum(1 for _, result in moves if result & HIT and not result & DEJAVU),
+                             len(hits))
+            for ship, coords in fleet.armada.items():
+                self.assertEqual(fleet.is_sunk(ship),
+                                 all(status == 'damaged' for status in coords.values()))
+
+    def test_shared_games(self):
+        for compact in (False, True):
+            games = [Game(seed=number, compact=compact, concurrent=True) for number in range(4)]
+            accepted = self.hammer(games)
+            for number, game in enumerate(games):
+                self.check_invariants(game, accepted[number])
+
+    def test_out_of_turn(self):
+        game = Game(seed=1, concurrent=True)
+        with self.assertRaises(TurnError):
+            game.strike(game.player2, ('a', 1))
+        game.strike(game.player1, ('a', 1))
+        with self.assertRaises(TurnError):
+            game.strike_many(game.player1, [('a', 2)])
+
+    def test_iter_strikes_out_of_turn(self):
+        game = Game(seed=2, concurrent=True)
+        with self.assertRaises(TurnError):
+            list(game.iter_strikes(game.player2, [('a', 1)]))
+        strikes = game.iter_strikes(game.player1, [('a', 1), ('a', 2), ('a', 3)])
+        next(strikes)
+        # the opponent strikes between two of player 1's
+        game.strike(game.player2, ('a', 1))
+        with self.assertRaises(TurnError):
+            next(strikes)
+        self.assertEqual(len(game.log), 2)
+        self.assertEqual(len(list(game.iter_strikes(game.player1, [('b', 1), ('b', 2)]))), 2)
+
+    def test_board_queries_lock(self):
+        game = Game(seed=3, concurrent=True)
+        board = game.player1.board
+        for name in ('unshot_count', 'random_unshot', 'open_hits', 'candidates',
+                     'row_count', 'col_count'):
+            self.assertIn(name, vars(board))
+        game.strike(game.player1, ('a', 1))
+        self.assertEqual(board.unshot_count(), 99)
+        self.assertEqual(board.row_count(1), 1)
+
+    def test_game_over(self):
+        game = Game(seed=1, concurrent=True, log=False)
+        cells = [game.geometry.coord(index) for index in range(game.geometry.area)]
+        game.strike_many(game.player1, cells)
+        with self.assertRaises(TurnError):
+            game.strike(game.player2, ('a', 1))
+
+    def test_not_concurrent_has_no_locks(self):
+        game = Game()
+        self.assertNotIn('strike', vars(game))
+        self.assertNotIn('_lock', vars(game))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+tests for battlestern.coordinates
+
+Usage
+Run this suite only
+python -m unittest tests/test_coordinates.py
+
+Test Discovery
+python -m unittest
+"""
+import os
+import pickle
+import sys
+from unittest import TestCase, main
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.battlestern.coordinates import Coordinate, CoordinateError
+from src.battlestern.geometry import Geometry
+
+
+class CoordinateTestCase(TestCase):
+    def test_mapping_access(self):
+        coord = Coordinate(col='c', row=7)
+        self.assertEqual((coord['col'], coord['row']), ('c', 7))
+        self.assertEqual((coord.col, coord.row), ('c', 7))
+        self.assertEqual(dict(coord), {'col': 'c', 'row': 7})
+        with self.assertRaises(CoordinateError):
+            coord['colour']
+
+    def test_interned(self):
+        self.assertIs(Coordinate(col='a', row=1), Coordinate('a', 1))
+        self.assertIs(Coordinate.intern(('j', 10)), Coordinate(col='j', row=10))
+
+    def test_interchangeable_with_tuples(self):
+        coord = Coordinate(col='e', row=5)
+        self.assertEqual(coord, ('e', 5))
+        self.assertEqual({('e', 5): 'hit'}[coord], 'hit')
+        col, row = coord
+        self.assertEqual((col, row), ('e', 5))
+
+    def test_immutable(self):
+        coord = Coordinate(col='e', row=5)
+        with self.assertRaises(AttributeError):
+            coord.other = 1
+
+    def test_invalid(self):
+        for kwargs in ({'col': 'k', 'row': 1}, {'col': 'a', 'row': 0},
+                       {'col': 'a'}, {'col': 'a', 'row': 1, 'deck': 2}):
+            with self.assertRaises(CoordinateError):
+                Coordinate(**kwargs)
+
+    def test_geometry(self):
+        geometry = Geometry(width=30, height=30)
+        self.assertEqual(Coordinate(col='ad', row=30, geometry=geometry), ('ad', 30))
+        self.assertIs(Coordinate(col='a', row=1, geometry=geometry), Coordinate('a', 1))
+        with self.assertRaises(CoordinateError):
+            Coordinate(col='j', row=10, geometry=Geometry(width=5, height=5))
+
+    def test_pickle(self):
+        coord = Coordinate(col='b', row=2)
+        self.assertIs(pickle.loads(pickle.dumps(coord)), coord)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+tests for battlestern.games
+
+Usage
+Run this suite only
+python -m unittest tests/test_games.py
+
+Test Discovery
+python -m unittest
+"""
+import os
+import random
+import sys
+from unittest import TestCase, main
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.battlestern.exceptions import BoardError
+from src.battlestern.games import Game, GamePool, HIT, MISS
+from src.battlestern.ships import Fleet
+
+
+class GameStrikeManyTestCase(TestCase):
+    def setUp(self):
+        self.rosters = list(Fleet.random_rosters(2, seed=11))
+        rng = random.Random(5)
+        cells = [(col, row) for col in 'abcdefghij' for row in range(1, 11)]
+        # plenty of repeats to exercise the Dejavu handling
+        self.coords = [rng.choice(cells) for _ in range(150)]
+
+    def new_game(self, **kwargs):
+        return Game(player1fleet=self.rosters[0], player2fleet=self.rosters[1], **kwargs)
+
+    def test_matches_sequential_strikes(self):
+        for compact in (False, True):
+            sequential = self.new_game(compact=compact)
+            expected = []
+            for coord in self.coords:
+                dejavu = sequential.player1.board.get_coord(coord) is not None
+                result, message = sequential.strike(sequential.player1, coord)
+                expected.append((result, dejavu, message))
+
+            batch = self.new_game(compact=compact)
+            results, dejavu, sinks = batch.strike_many(batch.player1, self.coords)
+            self.assertEqual(list(results),
+                             [HIT if result == 'hit' else MISS for result, _, _ in expected])
+            self.assertEqual(list(dejavu), [int(flag) for _, flag, _ in expected])
+            self.assertEqual(batch.player1.board.coords, sequential.player1.board.coords)
+            self.assertEqual(batch.player2.fleet.armada, sequential.player2.fleet.armada)
+            first_sinks = {}
+            for position, (_, _, message) in enumerate(expected):
+                if message.startswith('You sank my'):
+                    first_sinks.setdefault(message, position)
+            self.assertEqual([position for position, _ in sinks],
+                             sorted(first_sinks.values()))
+
+    def test_iter_strikes_matches_strike_many(self):
+        batch = self.new_game()
+        results, dejavu, sinks = batch.strike_many(batch.player1, self.coords)
+        stream = self.new_game()
+        streamed = list(stream.iter_strikes(stream.player1, iter(self.coords)))
+        self.assertEqual([result for result, _, _ in streamed],
+                         ['hit' if result == HIT else 'miss' for result in results])
+        self.assertEqual([int(flag) for _, flag, _ in streamed], list(dejavu))
+        self.assertEqual([(position, ship) for position, (_, _, ship) in enumerate(streamed)
+                          if ship], sinks)
+
+    def test_off_board(self):
+        for compact in (False, True):
+            game = self.new_game(compact=compact)
+            untouched = game.to_bytes()
+            with self.assertRaises(BoardError):
+                game.strike(game.player1, ('k', 1))
+            with self.assertRaises(BoardError):
+                game.strike_many(game.player1, [('a', 1), ('a', 11)])
+            self.assertEqual(game.to_bytes(), untouched)
+            self.assertEqual(len(game.log), 0)
+            with self.assertRaises(BoardError):
+                list(game.iter_strikes(game.player1, [('a', 1), ('z', 1)]))
+            self.assertEqual(len(game.log), 1)
+            self.assertEqual(list(game.player1.board.coords), [('a', 1)])
+
+
+
+class GameResetTestCase(TestCase):
+    def test_reset_matches_new_game(self):
+        for compact in (False, True):
+            game = Game(compact=compact, seed=1)
+            game.strike_many(game.player1, [('a', 1), ('b', 2), ('c', 3)])
+            fleets = (game.player1.fleet, game.player2.fleet)
+            game.reset(seed=2)
+            fresh = Game(compact=compact, seed=2)
+            self.assertEqual(game.to_bytes(), fresh.to_bytes())
+            self.assertEqual((game.player1.fleet, game.player2.fleet), fleets)
+            self.assertEqual(game.turn, 1)
+            self.assertEqual(len(game.log), 0)
+
+    def test_pool_recycles_games(self):
+        pool = GamePool(maxsize=1, log=False)
+        with pool.game(seed=1) as game:
+            game.strike(game.player1, ('a', 1))
+        self.assertEqual(len(pool), 1)
+        recycled = pool.acquire(seed=1)
+        self.assertIs(recycled, game)
+        self.assertEqual(recycled.player1.board.coords, {})
+        self.assertIsNone(recycled.log)
+        other = pool.acquire()
+        self.assertIsNot(other, recycled)
+        pool.release(recycled)
+        pool.release(other)
+        self.assertEqual(len(pool), 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+tests for battlestern.geometry
+
+Usage
+Run this suite only
+python -m unittest tests/test_geometry.py
+
+Test Discovery
+python -m unittest
+"""
+import os
+import sys
+from unittest import TestCase, main
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.battlestern.geometry import Geometry, DEFAULT_GEOMETRY, BoardError
+
+
+class GeometryTestCase(TestCase):
+    def test_default_is_classic_grid(self):
+        self.assertEqual(DEFAULT_GEOMETRY.cols, list('abcdefghij'))
+        self.assertEqual(list(DEFAULT_GEOMETRY.rows), list(range(1, 11)))
+
+    def test_column_labels(self):
+        geometry = Geometry(width=1000, height=1000)
+        self.assertEqual(geometry.cols[25:28], ['z', 'aa', 'ab'])
+        self.assertEqual(geometry.cols[701:703], ['zz', 'aaa'])
+        for index in (0, 25, 26, 701, 702, 999):
+            self.assertEqual(geometry.column_index(geometry.cols[index]), index)
+
+    def test_index_round_trip(self):
+        geometry = Geometry(width=30, height=7)
+        for index in range(geometry.area):
+            self.assertEqual(geometry.index(geometry.coord(index)), index)
+
+    def test_offset_off_grid(self):
+        self.assertEqual(DEFAULT_GEOMETRY.offset(('i', 3), cols=2), ('k', 3))
+        self.assertFalse(DEFAULT_GEOMETRY.contains(('k', 3)))
+        self.assertFalse(DEFAULT_GEOMETRY.contains(('a', 11)))
+
+    def test_equality(self):
+        self.assertEqual(Geometry(), DEFAULT_GEOMETRY)
+        self.assertNotEqual(Geometry(10, 11), DEFAULT_GEOMETRY)
+
+    def test_invalid(self):
+        with self.assertRaises(BoardError):
+            Geometry(width=0)
+
+
+if __name__ == '__main__':
+    main()
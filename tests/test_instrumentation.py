@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+tests for battlestern.instrumentation
+
+Usage
+Run this suite only
+python -m unittest tests/test_instrumentation.py
+
+Test Discovery
+python -m unittest
+"""
+import json
+import os
+import sys
+import tempfile
+from unittest import TestCase, main
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.battlestern.games import Game
+from src.battlestern.instrumentation import Exporter, Histogram, Instrumentation
+
+CELLS = [(col, row) for row in range(1, 11) for col in 'abcdefghij']
+
+
+class InstrumentationTestCase(TestCase):
+    def setUp(self):
+        self.events = []
+        self.metrics = Instrumentation(
+            on_sink=lambda game, player, ship: self.events.append((player.number, ship)),
+            on_game_over=lambda game, player: self.events.append((player.number, 'over')))
+
+    def play(self, compact=False):
+        game = Game(seed=1, compact=compact, log=False, instrumentation=self.metrics)
+        for coord in CELLS:
+            game.strike(game.player1, coord)
+        game.strike(game.player1, ('a', 1))
+        return game
+
+    def test_counters_and_hooks(self):
+        for compact in (False, True):
+            self.setUp()
+            self.play(compact)
+            counters = self.metrics.snapshot()['counters']
+            self.assertEqual(counters, {'strikes': 101, 'hits': 15, 'misses': 86, 'dejavu': 1,
+                                        'sinks': 5, 'games_over': 1, 'fleets': 2})
+            self.assertEqual(len(self.events), 6)
+            self.assertEqual(self.events[-1], (1, 'over'))
+            histograms = self.metrics.snapshot()['histograms']
+            self.assertEqual(histograms['game_strike']['count'], 101)
+            self.assertEqual(histograms['fleet_strike']['count'], 101)
+            self.assertEqual(histograms['fleet_create']['count'], 2)
+
+    def test_bulk_strikes_are_counted(self):
+        game = Game(seed=1, log=False, instrumentation=self.metrics)
+        game.strike_many(game.player1, CELLS)
+        counters = self.metrics.counters
+        self.assertEqual((counters['strikes'], counters['hits'], counters['misses'],
+                          counters['sinks'], counters['games_over']),
+                         (100, 15, 85, 5, 1))
+        self.assertEqual(self.metrics.histograms['board_mark_strike'].count, 100)
+        self.assertEqual(self.metrics.histograms['game_strike'].count, 0)
+        list(game.iter_strikes(game.player2, CELLS[:10]))
+        self.assertEqual(counters['strikes'], 110)
+
+    def test_uninstrumented_game_is_not_wrapped(self):
+        game = Game(log=False)
+        self.assertNotIn('strike', vars(game))
+        self.assertNotIn('mark_strike', vars(game.player1.board))
+        self.assertNotIn('_strike', vars(game.player1.fleet))
+
+    def test_histogram(self):
+        histogram = Histogram((1.0, 2.0, float('inf')))
+        for value in (0.5, 1.0, 1.5, 3.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.cumulative(), [(1.0, 2), (2.0, 3), (float('inf'), 4)])
+        self.assertEqual(histogram.sum, 6.0)
+
+    def test_export(self):
+        self.play()
+        text = self.metrics.to_prometheus()
+        self.assertIn('battlestern_dejavu_total 1\n', text)
+        self.assertIn('battlestern_game_strike_seconds_bucket{le="+Inf"} 101\n', text)
+        self.assertIn('battlestern_game_strike_seconds_count 101\n', text)
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'metrics.json')
+            with Exporter(self.metrics, filename, interval=60, format='json'):
+                pass
+            with open(filename) as exported:
+                self.assertEqual(json.load(exported)['counters']['sinks'], 5)
+
+
+if __name__ == '__main__':
+    main()
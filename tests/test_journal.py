@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+tests for battlestern.journal
+
+Usage
+Run this suite only
+python -m unittest tests/test_journal.py
+
+Test Discovery
+python -m unittest
+"""
+import os
+import sys
+import tempfile
+from unittest import TestCase, main
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.battlestern.games import Game
+from src.battlestern.journal import MoveLog, HIT, MISS, DEJAVU, SUNK
+from tests.test_serialization import SameGameMixin, play
+
+
+class MoveLogTestCase(SameGameMixin, TestCase):
+    def test_records(self):
+        roster = {"cruiser": {"col": "a", "row": 1, "orientation": "horizontal"}}
+        game = Game(player1fleet=roster, player2fleet=roster)
+        game.strike(game.player1, ('a', 1))
+        game.strike(game.player2, ('j', 10))
+        game.strike(game.player1, ('b', 1))
+        game.strike(game.player2, ('j', 10))
+        self.assertEqual(list(game.log), [(1, 0, HIT), (2, 99, MISS),
+                                          (1, 1, HIT | SUNK), (2, 99, MISS | DEJAVU)])
+
+    def test_replay(self):
+        game = Game(seed=1, log=MoveLog(checkpoint_interval=50))
+        play(game, 180, seed=2)
+        self.assertEqual([move for move, _ in game.log.checkpoints], [0, 50, 100, 150])
+        self.assertSameGame(game, Game.replay(game.log))
+
+    def test_replay_part(self):
+        game = Game(seed=3, log=MoveLog(checkpoint_interval=20))
+        play(game, 30, seed=4)
+        partial = Game(player1fleet=game.player1.fleet._fleetroster,
+                       player2fleet=game.player2.fleet._fleetroster)
+        play(partial, 25, seed=4)
+        self.assertSameGame(partial, Game.replay(game.log, move=25))
+
+    def test_strike_many_is_journaled(self):
+        game = Game(seed=5)
+        cells = [game.geometry.coord(index) for index in range(game.geometry.area)]
+        game.strike_many(game.player1, cells)
+        self.assertEqual(len(game.log), 100)
+        self.assertSameGame(game, Game.replay(game.log))
+
+    def test_strike_many_checkpoint_turn(self):
+        game = Game(seed=8, log=MoveLog(checkpoint_interval=3))
+        game.strike_many(game.player1, [('a', 1), ('b', 2), ('c', 3)])
+        self.assertEqual(game.log.checkpoints[-1][0], 3)
+        self.assertEqual(Game.replay(game.log).turn, 2)
+
+    def test_lazy_checkpoint(self):
+        log = MoveLog()
+        game = Game(seed=9, log=log)
+        self.assertEqual(log.checkpoints, [])
+        # reading the log takes the starting checkpoint
+        self.assertSameGame(game, Game.replay(game.log))
+        log = MoveLog()
+        game.reset(seed=10, log=log)
+        self.assertEqual(log.checkpoints, [])
+        game.strike(game.player1, ('a', 1))
+        self.assertEqual([move for move, _ in log.checkpoints], [0])
+        self.assertSameGame(game, Game.replay(log))
+
+    def test_file_backed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'game.log')
+            with MoveLog(filename, checkpoint_interval=40) as log:
+                game = Game(seed=6, log=log)
+                # past the initial file size to exercise growing the mapping
+                for _ in range(12):
+                    play(game, 100, seed=7)
+                self.assertEqual(len(log), 1200)
+            with MoveLog(filename) as log:
+                self.assertEqual(len(log), 1200)
+                self.assertEqual(log.checkpoints[-1][0], 1200)
+                self.assertSameGame(game, Game.replay(log))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+tests for battlestern.loaders
+
+Usage
+Run this suite only
+python -m unittest tests/test_loaders.py
+
+Test Discovery
+python -m unittest
+"""
+import io
+import json
+import os
+import sys
+import tempfile
+from unittest import TestCase, main
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.battlestern.loaders import (load_encoded, load_fleets,
+                                     PlacementError, SerializationError)
+from src.battlestern.serialization import decode_roster
+from src.battlestern.ships import Fleet
+
+OVERLAPPING = {"carrier": {"col": "a", "row": 1, "orientation": "horizontal"},
+               "patrol": {"col": "c", "row": 1, "orientation": "vertical"}}
+
+
+class LoaderTestCase(TestCase):
+    def setUp(self):
+        self.rosters = list(Fleet.random_rosters(50, seed=1))
+        self.lines = [json.dumps(roster) for roster in self.rosters]
+
+    def ndjson(self, lines):
+        return io.BytesIO('\n'.join(lines).encode('utf-8'))
+
+    def test_load_fleets(self):
+        fleets = list(load_fleets(self.ndjson(self.lines), chunksize=7))
+        self.assertEqual([fleet.armada for fleet in fleets],
+                         [Fleet(fleetroster=roster).armada for roster in self.rosters])
+
+    def test_load_encoded_from_a_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, 'rosters.ndjson')
+            with open(filename, 'w') as rosters:
+                rosters.write('\n'.join(self.lines + ['']))
+            encoded = list(load_encoded(filename, processes=2, chunksize=8, window=2))
+        self.assertEqual([decode_roster(data) for data in encoded], self.rosters)
+
+    def test_invalid_rosters(self):
+        lines = self.lines[:3] + ['', json.dumps(OVERLAPPING), '{"patrol": {"col": "z"}}',
+                                  'nonsense', '[]', '{}', '{"patrol": 3}'] + self.lines[3:5]
+        skipped = list(load_encoded(self.ndjson(lines), invalid='skip', chunksize=4))
+        self.assertEqual([decode_roster(data) for data in skipped], self.rosters[:5])
+
+        loaded = []
+        with self.assertRaises(PlacementError) as raised:
+            for data in load_encoded(self.ndjson(lines), chunksize=4):
+                loaded.append(data)
+        self.assertEqual(len(loaded), 3)
+        self.assertIn('line 5', str(raised.exception))
+
+        with self.assertRaises(SerializationError) as raised:
+            list(load_encoded(self.ndjson(lines[6:]), chunksize=4))
+        self.assertIn('line 1 is not JSON', str(raised.exception))
+
+        for line in ('{}', '{"patrol": 3}'):
+            with self.assertRaises(SerializationError) as raised:
+                list(load_encoded(self.ndjson([line])))
+            self.assertIn('line 1 is not a fleetroster object', str(raised.exception))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+tests for the battlestern package, its lazy attributes and import side effects
+
+Usage
+Run this suite only
+python -m unittest tests/test_package.py
+
+Test Discovery
+python -m unittest
+"""
+import json
+import os
+import subprocess
+import sys
+from unittest import TestCase, main
+
+sys.path.insert(0, os.path.abspath('.'))
+
+import src.battlestern as battlestern
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+
+def fresh_interpreter(code):
+    """
+    Runs code in a new interpreter with battlestern importable, returning what it prints as JSON
+    """
+    environment = dict(os.environ, PYTHONPATH=SRC)
+    output = subprocess.run([sys.executable, '-c', code], env=environment,
+                            stdout=subprocess.PIPE, check=True).stdout
+    return json.loads(output)
+
+
+class PackageTestCase(TestCase):
+    def test_lazy_attributes(self):
+        from src.battlestern.games import Game
+        self.assertIs(battlestern.Game, Game)
+        self.assertIn('Fleet', dir(battlestern))
+        with self.assertRaises(AttributeError):
+            battlestern.Nothing
+
+    def test_import_loads_no_submodules(self):
+        loaded = fresh_interpreter(
+            'import json, sys; import battlestern; '
+            'print(json.dumps(sorted(m for m in sys.modules if m.startswith("battlestern."))))')
+        self.assertEqual(loaded, [])
+
+    def test_import_does_not_change_sys_path(self):
+        changed = fresh_interpreter(
+            'import json, sys; before = list(sys.path); '
+            'import battlestern.games, battlestern.simulation, battlestern.server, '
+            'battlestern.loaders, battlestern.strategies; '
+            'print(json.dumps(sys.path != before))')
+        self.assertFalse(changed)
+
+
+if __name__ == '__main__':
+    main()
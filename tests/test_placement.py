@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+tests for battlestern.placement
+
+Usage
+Run this suite only
+python -m unittest tests/test_placement.py
+
+Test Discovery
+python -m unittest
+"""
+import os
+import sys
+from unittest import TestCase, main
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.battlestern.placement import (PlacementEngine, PlacementError, MAX_TABLE_AREA,
+                                       placement_table)
+from src.battlestern.geometry import Geometry
+from src.battlestern.ships import Fleet
+
+
+class PlacementTestCase(TestCase):
+    def test_rosters_are_legal(self):
+        for roster in Fleet.random_rosters(200, seed=1):
+            fleet = Fleet(fleetroster=roster)
+            self.assertEqual(fleet.duplicates, {})
+            self.assertEqual(fleet.out_of_bounds, {})
+            self.assertEqual(list(roster), list(Fleet.shipyard))
+
+    def test_seed_is_reproducible(self):
+        self.assertEqual(list(Fleet.random_rosters(5, seed=42)),
+                         list(Fleet.random_rosters(5, seed=42)))
+        self.assertEqual(Fleet(None, seed=7)._fleetroster,
+                         Fleet(None, seed=7)._fleetroster)
+
+    def test_crowded_board(self):
+        # 15 cells for 15 cells worth of ships, only a few legal layouts exist
+        geometry = Geometry(width=5, height=3)
+        engine = PlacementEngine(geometry, seed=3)
+        ships = {'a': 5, 'b': 5, 'c': 5}
+        for roster in engine.rosters(ships, 20):
+            fleet = Fleet(fleetroster={'carrier': roster['a']}, geometry=geometry)
+            self.assertEqual(fleet.out_of_bounds, {})
+        occupied = set()
+        for name, specs in engine.roster(ships).items():
+            bow = geometry.index((specs['col'], specs['row']))
+            cells = set(engine.cells(ships[name], (bow, specs['orientation'])))
+            self.assertTrue(occupied.isdisjoint(cells))
+            occupied |= cells
+        self.assertEqual(len(occupied), geometry.area)
+
+    def test_impossible(self):
+        engine = PlacementEngine(Geometry(width=3, height=3), seed=0)
+        with self.assertRaises(PlacementError):
+            engine.roster({'carrier': 5})
+        with self.assertRaises(PlacementError):
+            engine.roster({'a': 3, 'b': 3, 'c': 3, 'd': 1})
+
+
+
+class PlacementTableTestCase(TestCase):
+    def test_table_matches_engine(self):
+        geometry = Geometry(7, 5)
+        engine = PlacementEngine(geometry)
+        for length in range(1, 8):
+            table = placement_table(geometry, length)
+            self.assertEqual(table.slots, list(engine.slots(length)))
+            for number, slot in enumerate(table.slots):
+                cells = tuple(engine.cells(length, slot))
+                self.assertEqual(table.cells[number], cells)
+                self.assertEqual(table.coords[number], tuple(map(geometry.coord, cells)))
+                self.assertEqual(table.masks[number], sum(1 << cell for cell in cells))
+                self.assertEqual(table.numbers[slot], number)
+
+    def test_tables_are_cached(self):
+        self.assertIs(placement_table(Geometry(), 3), placement_table(Geometry(), 3))
+        self.assertIsNone(placement_table(Geometry(MAX_TABLE_AREA + 1, 1), 3))
+
+    def test_expansion_without_a_table(self):
+        geometry = Geometry(100, 100)
+        roster = next(Fleet.random_rosters(1, geometry=geometry, seed=4))
+        armada = Fleet(fleetroster=roster, geometry=geometry).armada
+        for ship, coords in armada.items():
+            self.assertEqual(len(coords), Fleet.shipyard[ship].length)
+            self.assertTrue(all(geometry.contains(coord) for coord in coords))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+tests for battlestern.serialization
+
+Usage
+Run this suite only
+python -m unittest tests/test_serialization.py
+
+Test Discovery
+python -m unittest
+"""
+import os
+import random
+import sys
+from unittest import TestCase, main
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.battlestern.games import Game
+from src.battlestern.geometry import Geometry
+from src.battlestern.serialization import (encode_roster, decode_roster,
+                                           SerializationError)
+from src.battlestern.ships import Fleet
+
+
+def play(game, shots, seed):
+    rng = random.Random(seed)
+    cells = [game.geometry.coord(index) for index in range(game.geometry.area)]
+    for number in range(shots):
+        player = game.player1 if number % 2 == 0 else game.player2
+        game.strike(player, rng.choice(cells))
+
+
+class SameGameMixin(object):
+    """
+    Compares a game with one restored from its encoding or its journal
+    """
+    def assertSameGame(self, game, restored):
+        self.assertEqual(restored.geometry.area, game.geometry.area)
+        self.assertEqual(restored.turn, game.turn)
+        for player, other in ((game.player1, restored.player1),
+                              (game.player2, restored.player2)):
+            self.assertEqual(other.name, player.name)
+            self.assertEqual(other.board.coords, player.board.coords)
+            self.assertEqual(other.fleet.armada, player.fleet.armada)
+            self.assertEqual(other.fleet.all_sunk, player.fleet.all_sunk)
+            self.assertEqual(type(other.fleet), type(player.fleet))
+
+
+class SerializationTestCase(SameGameMixin, TestCase):
+
+    def test_round_trip(self):
+        for compact in (False, True):
+            for shots in (0, 7, 120):
+                game = Game(player1name='Eddy', seed=shots, compact=compact)
+                play(game, shots, seed=1)
+                data = game.to_bytes()
+                self.assertSameGame(game, Game.from_bytes(data))
+                self.assertSameGame(game, Game.from_bytes(memoryview(bytearray(data))))
+
+    def test_size(self):
+        game = Game(seed=1)
+        self.assertLess(len(game.to_bytes()), 100)
+        play(game, 150, seed=2)
+        self.assertLess(len(game.to_bytes()), 120)
+
+    def test_large_board(self):
+        game = Game(geometry=Geometry(300, 300), seed=5)
+        play(game, 20, seed=3)
+        data = game.to_bytes()
+        self.assertLess(len(data), 200)
+        self.assertSameGame(game, Game.from_bytes(data))
+
+    def test_roster(self):
+        roster = next(Fleet.random_rosters(1, seed=8))
+        self.assertEqual(decode_roster(encode_roster(roster)), roster)
+
+    def test_invalid(self):
+        data = Game(seed=1).to_bytes()
+        with self.assertRaises(SerializationError):
+            Game.from_bytes(b'XX' + data[2:])
+        with self.assertRaises(SerializationError):
+            Game.from_bytes(data[:2] + b'\x09' + data[3:])
+        with self.assertRaises(SerializationError):
+            Game.from_bytes(b'BS')
+
+    def test_truncated(self):
+        for compact in (False, True):
+            game = Game(seed=6, compact=compact)
+            play(game, 60, seed=7)
+            data = game.to_bytes()
+            for size in (12, 20, 40, len(data) - 3):
+                with self.assertRaises(SerializationError):
+                    Game.from_bytes(data[:size])
+
+    def test_corrupt(self):
+        data = Game(seed=8).to_bytes()
+        for position in range(2, len(data)):
+            for value in (0x00, 0x13, 0x7f, 0xff):
+                corrupt = bytearray(data)
+                corrupt[position] = value
+                # either decodes to some game or fails cleanly
+                try:
+                    Game.from_bytes(corrupt)
+                except SerializationError:
+                    pass
+
+
+if __name__ == '__main__':
+    main()
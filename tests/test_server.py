@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+tests for battlestern.server
+
+Usage
+Run this suite only
+python -m unittest tests/test_server.py
+
+Test Discovery
+python -m unittest
+"""
+import asyncio
+import os
+import sys
+import time
+from unittest import TestCase, main
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.battlestern.server import GameServer, LocalClient, SessionError, TurnError
+from src.battlestern.geometry import DEFAULT_GEOMETRY
+
+CELLS = [DEFAULT_GEOMETRY.coord(index) for index in range(DEFAULT_GEOMETRY.area)]
+
+
+class GameServerTestCase(TestCase):
+    def run_async(self, coroutine):
+        return asyncio.run(coroutine)
+
+    def test_play_to_the_end(self):
+        async def play():
+            async with GameServer(seed=1) as server:
+                game_id = server.create_game()
+                clients = [LocalClient(server, game_id, 1), LocalClient(server, game_id, 2)]
+                for coord in CELLS:
+                    for client in clients:
+                        await client.strike(coord)
+                        if await client.winner():
+                            return await client.winner(), await clients[0].board()
+        winner, board = self.run_async(play())
+        self.assertEqual(winner, 1)
+        self.assertEqual(list(board.values()).count('hit'), 15)
+
+    def test_turns_can_not_interleave(self):
+        async def play():
+            async with GameServer() as server:
+                game_id = server.create_game()
+                bob = LocalClient(server, game_id, 1)
+                outcomes = await asyncio.gather(*(bob.strike(coord) for coord in CELLS[:10]),
+                                                return_exceptions=True)
+                with self.assertRaises(SessionError):
+                    await server.strike('nope', 1, ('a', 1))
+                return outcomes
+        outcomes = self.run_async(play())
+        self.assertFalse(isinstance(outcomes[0], Exception))
+        self.assertTrue(all(isinstance(outcome, TurnError) for outcome in outcomes[1:]))
+
+    def test_many_games(self):
+        async def play():
+            async with GameServer(max_pending=50) as server:
+                game_ids = [server.create_game(log=False) for _ in range(200)]
+                for coord in CELLS[:5]:
+                    for player in (1, 2):
+                        await asyncio.gather(*(server.strike(game_id, player, coord)
+                                               for game_id in game_ids))
+                return [server.game(game_id).turn for game_id in game_ids]
+        self.assertEqual(set(self.run_async(play())), {1})
+
+    def test_idle_games_are_parked(self):
+        async def play():
+            async with GameServer(idle_timeout=60) as server:
+                game_id = server.create_game(seed=2)
+                await server.strike(game_id, 1, ('c', 3))
+                board = dict(server.game(game_id).player1.board.coords)
+                self.assertEqual(server.evict_idle(now=time.monotonic() + 120), 1)
+                self.assertEqual((len(server), server.parked), (0, 1))
+                await server.strike(game_id, 2, ('d', 4))
+                self.assertEqual((len(server), server.parked), (1, 0))
+                return board, dict(server.game(game_id).player1.board.coords)
+        before, after = self.run_async(play())
+        self.assertEqual(before, after)
+
+
+if __name__ == '__main__':
+    main()
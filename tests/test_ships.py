@@ -1 +1,162 @@
-#!/usr/bin/env python3
\ No newline at end of file
+#!/usr/bin/env python3
+"""
+tests for battlestern.ships
+
+Usage
+Run this suite only
+python -m unittest tests/test_ships.py
+
+Test Discovery
+python -m unittest
+"""
+import os
+import random
+import sys
+from unittest import TestCase, main, skipUnless
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.battlestern.ships import Fleet, BitFleet, CoordinateError, _numpy
+from src.battlestern.geometry import Geometry
+
+FLEETROSTER = {
+    "carrier": {"col": "a", "row": 1, "orientation": "horizontal"},
+    "battleship": {"col": "a", "row": 2, "orientation": "horizontal"},
+    "submarine": {"col": "a", "row": 3, "orientation": "horizontal"},
+    "cruiser": {"col": "a", "row": 4, "orientation": "horizontal"},
+    "patrol": {"col": "a", "row": 5, "orientation": "horizontal"},
+}
+
+
+class FleetStrikeTestCase(TestCase):
+    def setUp(self):
+        self.fleet = Fleet(fleetroster=FLEETROSTER)
+
+    def test_index_covers_armada(self):
+        for ship, coords in self.fleet.armada.items():
+            for coord in coords:
+                self.assertEqual(self.fleet.ship_at(coord), ship)
+        self.assertIsNone(self.fleet.ship_at(('j', 10)))
+
+    def test_miss(self):
+        self.assertEqual(self.fleet._strike(('j', 10)), ('miss', 'You missed'))
+
+    def test_hit_and_sink(self):
+        result, message = self.fleet._strike(('a', 4))
+        self.assertEqual(result, 'hit')
+        self.assertIn(message, Fleet.hitmessages)
+        self.assertFalse(self.fleet.is_sunk('cruiser'))
+        self.assertEqual(self.fleet._strike(('b', 4)),
+                         ('hit', 'You sank my cruiser !'))
+        self.assertTrue(self.fleet.is_sunk('cruiser'))
+        self.assertEqual(self.fleet.armada['cruiser'][('b', 4)], 'damaged')
+
+    def test_repeat_hit_does_no_more_damage(self):
+        self.fleet._strike(('a', 1))
+        self.assertEqual(self.fleet._resolve_strike(('a', 1)), ('carrier', False))
+        self.assertEqual(self.fleet._intact['carrier'], 4)
+
+    def test_all_sunk(self):
+        coords = [coord for coords in self.fleet.armada.values() for coord in coords]
+        for coord in coords:
+            self.assertFalse(self.fleet.all_sunk)
+            self.fleet._strike(coord)
+        self.assertTrue(self.fleet.all_sunk)
+
+    def test_random_fleet(self):
+        fleet = type(self.fleet)(fleetroster=None)
+        self.assertEqual(set(fleet.armada), set(Fleet.shipyard))
+
+    def test_large_geometry(self):
+        roster = {"carrier": {"col": "y", "row": 40, "orientation": "horizontal"},
+                  "patrol": {"col": "a", "row": 100, "orientation": "vertical"}}
+        fleet = type(self.fleet)(fleetroster=roster, geometry=Geometry(100, 100))
+        self.assertEqual(sorted(fleet.armada['carrier']),
+                         [('aa', 40), ('ab', 40), ('ac', 40), ('y', 40), ('z', 40)])
+        self.assertEqual(fleet.out_of_bounds, {})
+        self.assertEqual(fleet._strike(('a', 100)), ('hit', 'You sank my patrol !'))
+
+    def test_out_of_bounds(self):
+        roster = {"cruiser": {"col": "j", "row": 1, "orientation": "horizontal"}}
+        fleet = type(self.fleet)(fleetroster=roster)
+        self.assertEqual(fleet.out_of_bounds, {('k', 1): ['cruiser']})
+        fleet._strike(('j', 1))
+        self.assertFalse(fleet.is_sunk('cruiser'))
+
+    def test_reset_repairs_in_place(self):
+        ships = list(self.fleet._fleet)
+        for coord in [('a', 4), ('b', 4), ('a', 1)]:
+            self.fleet._strike(coord)
+        self.fleet.reset()
+        self.assertFalse(self.fleet.is_sunk('cruiser'))
+        self.assertEqual(self.fleet.armada, Fleet(fleetroster=FLEETROSTER).armada)
+        self.assertEqual(self.fleet._fleet, ships)
+
+    def test_reset_moves_ships(self):
+        self.fleet._strike(('a', 1))
+        roster = next(Fleet.random_rosters(1, seed=3))
+        self.fleet.reset(roster)
+        fresh = type(self.fleet)(fleetroster=roster)
+        self.assertEqual(self.fleet.armada, fresh.armada)
+        for coord in [coord for coords in fresh.armada.values() for coord in coords]:
+            self.assertEqual(self.fleet._resolve_strike(coord), fresh._resolve_strike(coord))
+        self.assertTrue(self.fleet.all_sunk)
+
+
+class BitFleetStrikeTestCase(FleetStrikeTestCase):
+    def setUp(self):
+        self.fleet = BitFleet(fleetroster=FLEETROSTER)
+
+    def test_repeat_hit_does_no_more_damage(self):
+        self.fleet._strike(('a', 1))
+        damage = self.fleet.snapshot()
+        self.assertEqual(self.fleet._resolve_strike(('a', 1)), ('carrier', False))
+        self.assertEqual(self.fleet.snapshot(), damage)
+
+    def test_armada_matches_fleet(self):
+        fleet = Fleet(fleetroster=FLEETROSTER)
+        for coord in [('a', 1), ('b', 1), ('j', 10), ('a', 5)]:
+            fleet._strike(coord)
+            self.fleet._strike(coord)
+        self.assertEqual(self.fleet.armada, fleet.armada)
+        self.assertEqual(self.fleet.is_sunk('patrol'), fleet.is_sunk('patrol'))
+
+
+
+class ValidateManyTestCase(TestCase):
+    def setUp(self):
+        rng = random.Random(1)
+        self.rosters = [{name: {'col': rng.choice('abcdefghij'),
+                                'row': rng.randint(1, 10),
+                                'orientation': rng.choice(['horizontal', 'vertical'])}
+                         for name in Fleet.shipyard}
+                        for _ in range(300)]
+        self.rosters.extend(Fleet.random_rosters(100, seed=2))
+        self.expected = [(fleet.duplicates, fleet.out_of_bounds)
+                         for fleet in map(Fleet, self.rosters)]
+
+    def test_matches_fleet(self):
+        results = Fleet.validate_many(self.rosters, vectorise=False)
+        self.assertEqual(results, self.expected)
+        self.assertTrue(any(duplicates for duplicates, _ in results))
+        self.assertTrue(any(out_of_bounds for _, out_of_bounds in results))
+
+    @skipUnless(_numpy(), 'numpy is not installed')
+    def test_vectorised_matches_fleet(self):
+        self.assertEqual(Fleet.validate_many(self.rosters, vectorise=True), self.expected)
+
+    def test_large_geometry(self):
+        geometry = Geometry(100, 100)
+        roster = {"carrier": {"col": "cu", "row": 40, "orientation": "horizontal"},
+                  "patrol": {"col": "cv", "row": 40, "orientation": "vertical"}}
+        duplicates, out_of_bounds = Fleet.validate_many([roster], geometry)[0]
+        self.assertEqual(duplicates, {('cv', 40): ['carrier', 'patrol']})
+        self.assertEqual(set(out_of_bounds), {('cw', 40), ('cx', 40), ('cy', 40)})
+
+    def test_invalid_bow(self):
+        with self.assertRaises(CoordinateError):
+            Fleet.validate_many([{"patrol": {"col": "k", "row": 1, "orientation": "vertical"}}])
+
+
+if __name__ == '__main__':
+    main()
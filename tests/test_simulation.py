@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+tests for battlestern.simulation
+
+Usage
+Run this suite only
+python -m unittest tests/test_simulation.py
+
+Test Discovery
+python -m unittest
+"""
+import os
+import sys
+from unittest import TestCase, main
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.battlestern.games import Game
+from src.battlestern.simulation import play_game, simulate
+from src.battlestern.spectators import Delta, decode_frame
+from src.battlestern.strategies import random_strategy
+from src.battlestern.geometry import Geometry
+
+
+class SimulationTestCase(TestCase):
+    def test_play_game(self):
+        result = play_game(random_strategy, random_strategy, seed=3)
+        self.assertIn(result.winner, (1, 2))
+        # 15 ship coordinates can't be sunk in fewer shots, nor need more than the board
+        self.assertTrue(15 <= result.shots <= 100)
+        self.assertEqual(result, play_game(random_strategy, random_strategy, seed=3))
+
+    def test_plays_through_the_game(self):
+        game = Game(concurrent=True)
+        frames = []
+        game.subscribe(frames.append)
+        result = play_game(random_strategy, random_strategy, seed=3, game=game)
+        self.assertEqual(result, play_game(random_strategy, random_strategy, seed=3))
+        # the winner took the last shot so it's the loser's turn
+        self.assertEqual(game.turn, 3 - result.winner)
+        deltas = [frame for frame in map(decode_frame, frames) if isinstance(frame, Delta)]
+        self.assertEqual(len(deltas), 2 * result.shots - (result.winner == 1))
+
+    def test_max_shots_draw(self):
+        result = play_game(random_strategy, random_strategy, seed=3, max_shots=10)
+        self.assertEqual(result.winner, 0)
+
+    def test_larger_board(self):
+        result = play_game(random_strategy, random_strategy, seed=1,
+                           geometry=Geometry(20, 15))
+        self.assertIn(result.winner, (1, 2))
+
+    def test_simulate_is_deterministic_across_processes(self):
+        serial = simulate(random_strategy, random_strategy, games=60, seed=9,
+                          processes=1, chunksize=7)
+        parallel = simulate(random_strategy, random_strategy, games=60, seed=9,
+                            processes=2, chunksize=7)
+        self.assertEqual(serial.games, 60)
+        self.assertEqual(sum(serial.wins), 60)
+        self.assertEqual(serial.wins, parallel.wins)
+        self.assertEqual(serial.shots, parallel.shots)
+        self.assertEqual(serial.as_dict()['wins']['draw'], 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+tests for battlestern.solver
+
+Usage
+Run this suite only
+python -m unittest tests/test_solver.py
+
+Test Discovery
+python -m unittest
+"""
+import os
+import random
+import sys
+import time
+from unittest import TestCase, main
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.battlestern.solver import EndgameSolver
+from src.battlestern.boards import Board
+from src.battlestern.exceptions import SolverError
+from src.battlestern.games import Game
+from src.battlestern.geometry import Geometry
+
+
+def late_game(sunk, misses, seed=3):
+    """
+    A game where player 1 has sunk some ships and missed a number of times
+    """
+    game = Game(seed=seed, log=False)
+    fleet = game.player2.fleet
+    for ship in sunk:
+        for coord in fleet.ship_coordinates(ship):
+            game.strike(game.player1, coord)
+    cells = [game.geometry.coord(index) for index in range(game.geometry.area)]
+    random.Random(1).shuffle(cells)
+    board = game.player1.board
+    for coord in [coord for coord in cells
+                  if fleet.ship_at(coord) is None and board.get_coord(coord) is None][:misses]:
+        game.strike(game.player1, coord)
+    return game
+
+
+class EndgameSolverTestCase(TestCase):
+    def test_patrol_on_three_cells(self):
+        geometry = Geometry(3, 1)
+        solver = EndgameSolver(geometry=geometry, ships={'patrol': 1})
+        solution = solver.solve(Board(geometry=geometry))
+        self.assertAlmostEqual(solution.expected, 2.0)
+        self.assertEqual(solution.configs, 3)
+
+    def test_two_long_ship_on_four_cells(self):
+        geometry = Geometry(4, 1)
+        solver = EndgameSolver(geometry=geometry, ships={'cruiser': 2})
+        solution = solver.solve(Board(geometry=geometry))
+        self.assertAlmostEqual(solution.expected, 8 / 3)
+        self.assertIn(solution.coord, [('b', 1), ('c', 1)])
+
+    def test_observed_board(self):
+        geometry = Geometry(4, 1)
+        solver = EndgameSolver(geometry=geometry, ships={'cruiser': 2})
+        board = Board(geometry=geometry)
+        board.mark_strike(('b', 1), 'hit')
+        # the cruiser is a1-b1 or b1-c1, either way one more shot may miss
+        solution = solver.solve(board)
+        self.assertAlmostEqual(solution.expected, 1.5)
+        self.assertEqual(solution.configs, 2)
+
+    def test_every_ship_sunk(self):
+        geometry = Geometry(3, 1)
+        solver = EndgameSolver(geometry=geometry, ships={'patrol': 1})
+        board = Board(geometry=geometry)
+        board.mark_strike(('c', 1), 'hit')
+        board.mark_sunk([('c', 1)])
+        self.assertEqual(solver.solve(board), (0.0, None, 1))
+
+    def test_table_counters(self):
+        geometry = Geometry(5, 1)
+        solver = EndgameSolver(geometry=geometry, ships={'cruiser': 2})
+        solver.solve(Board(geometry=geometry))
+        self.assertGreater(solver.table_misses, 0)
+        misses, hits = solver.table_misses, solver.table_hits
+        solver.solve(Board(geometry=geometry))
+        self.assertEqual(solver.table_misses, misses)
+        self.assertGreater(solver.table_hits, hits)
+
+    def test_table_is_bounded(self):
+        geometry = Geometry(6, 1)
+        solver = EndgameSolver(geometry=geometry, ships={'cruiser': 2, 'patrol': 1},
+                               table_size=8, max_nodes=100000)
+        solver.solve(Board(geometry=geometry))
+        self.assertLessEqual(len(solver.table), 8)
+
+    def test_reflections_share_the_table(self):
+        geometry = Geometry(3, 2)
+        ships = {'cruiser': 2, 'patrol': 1}
+        solver = EndgameSolver(geometry=geometry, ships=ships)
+        board = Board(geometry=geometry)
+        board.mark_strike(('a', 1), 'miss')
+        expected = solver.solve(board).expected
+        misses = solver.table_misses
+        mirrored = Board(geometry=geometry)
+        mirrored.mark_strike(('c', 2), 'miss')
+        self.assertAlmostEqual(solver.solve(mirrored).expected, expected)
+        self.assertEqual(solver.table_misses, misses)
+        self.assertAlmostEqual(EndgameSolver(geometry=geometry, ships=ships)
+                               .solve(mirrored).expected, expected)
+
+    def test_too_many_fleets(self):
+        solver = EndgameSolver(max_configs=100)
+        with self.assertRaises(SolverError):
+            solver.solve(Board())
+
+    def test_too_many_states(self):
+        game = late_game(('carrier', 'battleship', 'submarine', 'patrol'), 40)
+        with self.assertRaises(SolverError):
+            EndgameSolver(max_nodes=10).solve(game.player1.board)
+
+    def test_inconsistent_boards(self):
+        geometry = Geometry(3, 1)
+        solver = EndgameSolver(geometry=geometry, ships={'patrol': 1})
+        board = Board(geometry=geometry)
+        for col in 'abc':
+            board.mark_strike((col, 1), 'miss')
+        with self.assertRaises(SolverError):
+            solver.solve(board)
+        board = Board(geometry=geometry)
+        board.mark_strike(('a', 1), 'hit')
+        board.mark_strike(('b', 1), 'hit')
+        board.mark_sunk([('a', 1), ('b', 1)])
+        with self.assertRaises(SolverError):
+            solver.solve(board)
+        board = Board(geometry=geometry)
+        board.mark_sunk([('a', 1)])
+        with self.assertRaises(SolverError):
+            solver.solve(board)
+
+    def test_late_game_in_milliseconds(self):
+        game = late_game(('carrier', 'battleship', 'patrol'), 70)
+        solver = EndgameSolver()
+        started = time.perf_counter()
+        solution = solver.solve(game.player1.board)
+        self.assertLess(time.perf_counter() - started, 0.25)
+        self.assertGreaterEqual(solution.expected, 5)
+        self.assertIsNone(game.player1.board.get_coord(solution.coord))
+
+    def test_last_ship(self):
+        game = late_game(('carrier', 'battleship', 'submarine', 'cruiser'), 0)
+        started = time.perf_counter()
+        solution = EndgameSolver().solve(game.player1.board)
+        self.assertLess(time.perf_counter() - started, 0.5)
+        # the patrol is equally likely on any of the 83 unshot coordinates
+        self.assertAlmostEqual(solution.expected, (solution.configs + 1) / 2)
+
+
+if __name__ == '__main__':
+    main()
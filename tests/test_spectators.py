@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+tests for battlestern.spectators
+
+Usage
+Run this suite only
+python -m unittest tests/test_spectators.py
+
+Test Discovery
+python -m unittest
+"""
+import os
+import random
+import sys
+from unittest import TestCase, main
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.battlestern.exceptions import SerializationError, TurnError
+from src.battlestern.games import Game
+from src.battlestern.journal import HIT, MISS, DEJAVU, SUNK
+from src.battlestern.spectators import (Mirror, Delta, Keyframe, decode_frame,
+                                        encode_delta)
+
+
+def shoot(game, shots, seed):
+    rng = random.Random(seed)
+    cells = [game.geometry.coord(index) for index in range(game.geometry.area)]
+    for number in range(shots):
+        player = game.player1 if number % 2 == 0 else game.player2
+        game.strike(player, rng.choice(cells))
+
+
+class SpectatorTestCase(TestCase):
+    def assertSameGame(self, game, mirrored):
+        self.assertEqual(mirrored.turn, game.turn)
+        for player, other in ((game.player1, mirrored.player1),
+                              (game.player2, mirrored.player2)):
+            self.assertEqual(other.board.coords, player.board.coords)
+            self.assertEqual(other.fleet.armada, player.fleet.armada)
+
+    def test_deltas(self):
+        game = Game(seed=1, log=False)
+        spectator = game.subscribe()
+        keyframe = decode_frame(spectator.frames()[0])
+        self.assertIsInstance(keyframe, Keyframe)
+        self.assertEqual(keyframe.sequence, 0)
+        coords = game.player2.fleet.ship_coordinates('cruiser')
+        cells = [game.geometry.coord(index) for index in range(game.geometry.area)]
+        misses = [coord for coord in cells if game.player1.fleet.ship_at(coord) is None]
+        game.strike(game.player1, coords[0])
+        game.strike(game.player2, misses[0])
+        game.strike(game.player1, coords[1])
+        game.strike(game.player2, misses[0])
+        frames = spectator.frames()
+        self.assertEqual([decode_frame(frame) for frame in frames], [
+            Delta(1, 1, game.geometry.index(coords[0]), HIT, None),
+            Delta(2, 2, game.geometry.index(misses[0]), MISS, None),
+            Delta(3, 1, game.geometry.index(coords[1]), HIT | SUNK, 'cruiser'),
+            Delta(4, 2, game.geometry.index(misses[0]), MISS | DEJAVU, None),
+        ])
+        self.assertEqual(spectator.frames(), [])
+
+    def test_shared_frames(self):
+        game = Game(seed=2, log=False)
+        received = [[] for _ in range(1000)]
+        for frames in received:
+            game.subscribe(frames.append)
+        game.strike(game.player1, ('a', 1))
+        first = received[0][-1]
+        for frames in received:
+            self.assertEqual(len(frames), 2)
+            self.assertIs(frames[-1], first)
+
+    def test_unsubscribe(self):
+        game = Game(seed=3, log=False)
+        frames = []
+        subscription = game.subscribe(frames.append)
+        game.strike(game.player1, ('a', 1))
+        subscription.unsubscribe()
+        game.strike(game.player2, ('a', 1))
+        self.assertEqual(len(frames), 2)
+
+    def test_late_joiner(self):
+        for compact in (False, True):
+            game = Game(seed=4, compact=compact, log=False)
+            early = game.subscribe(keyframe_interval=8)
+            shoot(game, 21, seed=5)
+            late = game.subscribe()
+            frames = late.frames()
+            # the keyframe taken after strike 16 and the 5 strikes since
+            self.assertEqual(len(frames), 6)
+            self.assertEqual(decode_frame(frames[0]).sequence, 16)
+            mirror = Mirror()
+            for frame in frames:
+                mirror.apply(frame)
+            self.assertSameGame(game, mirror.game)
+            # the early spectator fell behind too and also starts from the keyframe
+            self.assertEqual(early.frames(), frames)
+
+    def test_mirror(self):
+        game = Game(seed=6, log=False)
+        mirror = Mirror()
+        game.subscribe(mirror.apply, keyframe_interval=10)
+        shoot(game, 37, seed=7)
+        game.strike_many(game.player2, [('b', 2), ('c', 3)])
+        for result in game.iter_strikes(game.player1, [('d', 4)]):
+            pass
+        self.assertEqual(mirror.sequence, 40)
+        self.assertSameGame(game, mirror.game)
+
+    def test_reset(self):
+        game = Game(seed=8, log=False)
+        mirror = Mirror()
+        game.subscribe(mirror.apply)
+        puller = game.subscribe()
+        shoot(game, 10, seed=9)
+        puller.frames()
+        game.reset(seed=10)
+        frames = puller.frames()
+        self.assertEqual(len(frames), 1)
+        self.assertIsInstance(decode_frame(frames[0]), Keyframe)
+        shoot(game, 3, seed=11)
+        self.assertSameGame(game, mirror.game)
+
+    def test_missed_frames(self):
+        game = Game(seed=12, log=False)
+        frames = []
+        game.subscribe(frames.append)
+        shoot(game, 3, seed=13)
+        mirror = Mirror()
+        mirror.apply(frames[0])
+        mirror.apply(frames[1])
+        with self.assertRaises(SerializationError):
+            mirror.apply(frames[3])
+
+    def test_corrupt_frames(self):
+        frame = encode_delta(1, 1, 5, HIT | SUNK, 'carrier')
+        for size in (0, 3, 12, 15):
+            with self.assertRaises(SerializationError):
+                decode_frame(frame[:size])
+        with self.assertRaises(SerializationError):
+            decode_frame(b'\x09' + frame[1:])
+
+    def test_concurrent(self):
+        game = Game(seed=14, log=False, concurrent=True)
+        frames = []
+        game.subscribe(frames.append)
+        game.strike(game.player1, ('a', 1))
+        with self.assertRaises(TurnError):
+            game.strike(game.player1, ('a', 2))
+        self.assertEqual(len(frames), 2)
+
+    def test_unwatched(self):
+        game = Game(seed=15, log=False)
+        shoot(game, 5, seed=16)
+        self.assertIsNone(game._feed)
+
+
+if __name__ == '__main__':
+    main()
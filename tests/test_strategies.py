@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+tests for battlestern.strategies
+
+Usage
+Run this suite only
+python -m unittest tests/test_strategies.py
+
+Test Discovery
+python -m unittest
+"""
+import os
+import random
+import sys
+from unittest import TestCase, main
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.battlestern.strategies import DensityStrategy, random_strategy, hunt_target_strategy
+from src.battlestern.simulation import simulate
+from src.battlestern.games import Game
+from src.battlestern.geometry import Geometry, DEFAULT_GEOMETRY
+
+
+def recomputed_density(strategy):
+    """
+    The density map built from scratch from the strategy's live placements
+    """
+    density = [0] * DEFAULT_GEOMETRY.area
+    for length, placements in strategy._placements.items():
+        for number, cells in enumerate(placements):
+            if strategy._live[length][number]:
+                weight = strategy.hit_weight ** strategy._hits[length][number]
+                for cell in cells:
+                    density[cell] += strategy._afloat[length] * weight
+    return density
+
+
+class DensityStrategyTestCase(TestCase):
+    def test_incremental_matches_recomputed(self):
+        game = Game(seed=4)
+        strategy = DensityStrategy(DEFAULT_GEOMETRY, random.Random(0))
+        fleet = game.player2.fleet
+        while not fleet.all_sunk:
+            coord = strategy(game.player1.board)
+            self.assertIsNone(game.player1.board.get_coord(coord))
+            ship, sunk = fleet._resolve_strike(coord)
+            result = 'miss' if ship is None else 'hit'
+            game.player1.board.mark_strike(coord, result)
+            wreck = fleet.ship_coordinates(ship) if sunk else None
+            strategy.observe(coord, result, ship if sunk else None, wreck)
+            self.assertEqual(strategy.density, recomputed_density(strategy))
+        self.assertEqual(strategy._placements, {})
+
+    def test_adjacent_hits(self):
+        # the cruiser at b1 c1 is sunk alongside an open hit on the submarine at a1,
+        # a1 b1 would fit the cruiser as well
+        roster = {'cruiser': {'col': 'b', 'row': 1, 'orientation': 'horizontal'},
+                  'submarine': {'col': 'a', 'row': 1, 'orientation': 'vertical'}}
+        game = Game(player2fleet=roster, log=False)
+        fleet = game.player2.fleet
+        strategy = DensityStrategy(DEFAULT_GEOMETRY, random.Random(0))
+        for coord in (('a', 1), ('c', 1), ('b', 1)):
+            ship, sunk = fleet._resolve_strike(coord)
+            wreck = fleet.ship_coordinates(ship) if sunk else None
+            strategy.observe(coord, 'hit', ship if sunk else None, wreck)
+        self.assertEqual(strategy._open, {DEFAULT_GEOMETRY.index(('a', 1))})
+        self.assertEqual(strategy.density, recomputed_density(strategy))
+        # a submarine can still lie through the open hit
+        self.assertGreater(strategy.density[DEFAULT_GEOMETRY.index(('a', 2))], 0)
+        self.assertEqual(strategy.density[DEFAULT_GEOMETRY.index(('c', 1))], 0)
+
+    def test_beats_random(self):
+        stats = simulate(DensityStrategy, random_strategy, games=40, seed=2, processes=1)
+        self.assertGreater(stats.win_rate(1), 0.75)
+
+
+class HuntTargetStrategyTestCase(TestCase):
+    def test_beats_random(self):
+        stats = simulate(hunt_target_strategy, random_strategy, games=40, seed=2, processes=1)
+        self.assertGreater(stats.win_rate(1), 0.75)
+
+    def test_large_board(self):
+        game = Game(geometry=Geometry(200, 200), seed=1, log=False)
+        choose = hunt_target_strategy(game.geometry, random.Random(1))
+        board = game.player1.board
+        for _ in range(500):
+            coord = choose(board)
+            self.assertIsNone(board.get_coord(coord))
+            game.strike(game.player1, coord)
+        self.assertEqual(board.unshot_count(), game.geometry.area - 500)
+
+
+if __name__ == '__main__':
+    main()
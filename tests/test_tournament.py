@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+tests for battlestern.tournament
+
+Usage
+Run this suite only
+python -m unittest tests/test_tournament.py
+
+Test Discovery
+python -m unittest
+"""
+import json
+import os
+import sys
+import tempfile
+from itertools import combinations
+from unittest import TestCase, main
+
+sys.path.insert(0, os.path.abspath('.'))
+
+from src.battlestern.exceptions import TournamentError
+from src.battlestern.strategies import (random_strategy, hunt_target_strategy,
+                                        DensityStrategy)
+from src.battlestern.tournament import (Tournament, round_robin, swiss_pairings,
+                                        play_match)
+
+ENTRANTS = {'random': random_strategy,
+            'random2': random_strategy,
+            'hunter': hunt_target_strategy,
+            'density': DensityStrategy}
+
+
+class ScheduleTestCase(TestCase):
+    def test_round_robin(self):
+        for count in (2, 3, 6, 7):
+            names = [str(number) for number in range(count)]
+            rounds = round_robin(names)
+            self.assertEqual(len(rounds), count - 1 if count % 2 == 0 else count)
+            met = [frozenset(pair) for pairs in rounds for pair in pairs]
+            self.assertEqual(sorted(met, key=sorted),
+                             sorted((frozenset(pair) for pair in combinations(names, 2)),
+                                    key=sorted))
+            for pairs in rounds:
+                seated = [name for pair in pairs for name in pair]
+                self.assertEqual(len(seated), len(set(seated)))
+
+    def test_swiss_pairings(self):
+        names = ['a', 'b', 'c', 'd', 'e']
+        points = {'a': 1, 'b': 1, 'c': 0.5, 'd': 0.5, 'e': 0}
+        ratings = dict.fromkeys(names, 1500)
+        played = {'a': {'b'}, 'b': {'a'}, 'c': {'d'}, 'd': {'c'}, 'e': set()}
+        pairs, bye = swiss_pairings(names, points, ratings, played, byes={'e'})
+        self.assertEqual(bye, 'd')
+        self.assertEqual(pairs, [('a', 'c'), ('b', 'e')])
+        # with no way to avoid a rematch the top names meet again
+        pairs, bye = swiss_pairings(['a', 'b'], points, ratings, played, byes=set())
+        self.assertEqual((pairs, bye), ([('a', 'b')], None))
+
+
+class MatchTestCase(TestCase):
+    def test_mirrored(self):
+        # both sides of a pair share a fleetroster and a seed,
+        # so a strategy against itself wins exactly one game of each pair
+        self.assertEqual(play_match(random_strategy, random_strategy, pairs=20, seed=1),
+                         ([20, 20], 0))
+
+    def test_stronger(self):
+        wins, draws = play_match(DensityStrategy, random_strategy, pairs=10, seed=2)
+        self.assertEqual(sum(wins) + draws, 20)
+        self.assertGreater(wins[0], wins[1])
+
+    def test_reproducible(self):
+        self.assertEqual(play_match(hunt_target_strategy, random_strategy, 5, seed=3),
+                         play_match(hunt_target_strategy, random_strategy, 5, seed=3))
+
+
+class TournamentTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.checkpoint = os.path.join(self.directory.name, 'tournament.ndjson')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_robin(self):
+        tournament = Tournament(ENTRANTS, pairs=4, processes=1)
+        standings = tournament.run()
+        self.assertEqual(len(tournament.results), 6)
+        self.assertEqual(standings[0].name, 'density')
+        self.assertEqual(sum(standing.points for standing in standings), 6)
+        self.assertAlmostEqual(sum(standing.rating for standing in standings), 4 * 1500)
+        for standing in standings:
+            self.assertEqual(standing.wins + standing.losses + standing.draws, 3 * 8)
+
+    def test_live(self):
+        tournament = Tournament(ENTRANTS, pairs=2, processes=1)
+        for number, result in enumerate(tournament.play(), 1):
+            self.assertEqual(len(tournament.results), number)
+            self.assertEqual(sum(standing.points for standing in tournament.standings()),
+                             number)
+
+    def test_processes(self):
+        played = Tournament(ENTRANTS, pairs=3, processes=1)
+        played.run()
+        pooled = Tournament(ENTRANTS, pairs=3, processes=2)
+        pooled.run()
+        self.assertEqual(sorted(pooled.results), sorted(played.results))
+        self.assertEqual(pooled.points, played.points)
+
+    def test_resume(self):
+        uninterrupted = Tournament(ENTRANTS, pairs=2, processes=1)
+        uninterrupted.run()
+        tournament = Tournament(ENTRANTS, pairs=2, processes=1, checkpoint=self.checkpoint)
+        for number, result in enumerate(tournament.play(), 1):
+            if number == 2:
+                break
+        # a line cut short by a crash
+        with open(self.checkpoint, 'ab') as checkpoint:
+            checkpoint.write(b'{"round": 3, "play')
+        resumed = Tournament(ENTRANTS, pairs=2, processes=1, checkpoint=self.checkpoint)
+        self.assertEqual(len(list(resumed.play())), 4)
+        self.assertEqual(resumed.results, uninterrupted.results)
+        self.assertEqual(resumed.standings(), uninterrupted.standings())
+        with open(self.checkpoint, 'rb') as checkpoint:
+            lines = [json.loads(line) for line in checkpoint]
+        self.assertEqual(lines[0], resumed.settings)
+        self.assertEqual(len(lines), 7)
+        # finished, nothing left to play
+        self.assertEqual(list(Tournament(ENTRANTS, pairs=2, processes=1,
+                                         checkpoint=self.checkpoint).play()), [])
+
+    def test_other_checkpoint(self):
+        Tournament(ENTRANTS, pairs=1, processes=1, checkpoint=self.checkpoint).run()
+        with self.assertRaises(TournamentError):
+            Tournament(ENTRANTS, pairs=2, processes=1, checkpoint=self.checkpoint).run()
+
+    def test_swiss(self):
+        entrants = dict(ENTRANTS, hunter2=hunt_target_strategy, random3=random_strategy)
+        tournament = Tournament(entrants, format='swiss', pairs=2, processes=1)
+        self.assertEqual(tournament.rounds, 3)
+        tournament.run()
+        byes = [result for result in tournament.results if result.player2 is None]
+        self.assertEqual(len(byes), 0)
+        self.assertEqual(len(tournament.results), 9)
+        met = [frozenset((result.player1, result.player2)) for result in tournament.results]
+        self.assertEqual(len(met), len(set(met)))
+
+    def test_swiss_resume(self):
+        entrants = dict(ENTRANTS, hunter2=hunt_target_strategy)
+        uninterrupted = Tournament(entrants, format='swiss', pairs=2, processes=1)
+        uninterrupted.run()
+        self.assertEqual(len([result for result in uninterrupted.results
+                              if result.player2 is None]), 3)
+        tournament = Tournament(entrants, format='swiss', pairs=2, processes=1,
+                                checkpoint=self.checkpoint)
+        for number, result in enumerate(tournament.play(), 1):
+            # part way through round 2
+            if number == 3:
+                break
+        resumed = Tournament(entrants, format='swiss', pairs=2, processes=1,
+                             checkpoint=self.checkpoint)
+        resumed.run()
+        self.assertEqual(resumed.results, uninterrupted.results)
+        self.assertEqual(resumed.standings(), uninterrupted.standings())
+
+    def test_invalid(self):
+        with self.assertRaises(TournamentError):
+            Tournament(ENTRANTS, format='knockout')
+        with self.assertRaises(TournamentError):
+            Tournament({'random': random_strategy})
+
+
+if __name__ == '__main__':
+    main()